@@ -0,0 +1,190 @@
+"""
+Form progression compression benchmark.
+
+Builds progression documents for a few realistic forms, from a short contact
+form to long forms with repeatable sections and uploaded images (answers hold
+the SAS URLs of upload_file_to_storage), and compares them stored as they are
+and with compressed answers (forms.services.progression_codec). For each it
+reports the document size, the time to encode and decode, and the request
+charge of an upsert and a point read.
+
+Usage, from backend/webcontent:
+
+    python benchmarks/progression_compression.py
+    python benchmarks/progression_compression.py --level 9 --runs 200
+    COSMOS_ENDPOINT=... COSMOS_KEY=... python benchmarks/progression_compression.py --backend azure
+
+The "memory" backend charges an approximation (1 RU per KB read, 5 RU per KB
+written); --backend azure writes to the FormProgression container and reports
+the charges Cosmos returns, which also include the indexing of every answer
+path that the compressed encoding avoids. Benchmark documents are deleted
+afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import string
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+SAS_URL = ("https://bloomsitestorage.blob.core.windows.net/images/{user}/{blob}.{ext}"
+           "?se=2026-10-25T12%3A00%3A00Z&sp=r&sv=2025-05-05&sr=b&sig={sig}")
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(words))
+
+
+def _sas_url(rng: random.Random, user: str) -> str:
+    sig = "".join(rng.choices(string.ascii_letters + string.digits, k=43)) + "%3D"
+    return SAS_URL.format(user=user, blob=uuid.UUID(int=rng.getrandbits(128)), ext=rng.choice(("png", "jpg")), sig=sig)
+
+
+def _answers(rng: random.Random, user: str, sections: int, instances: int, fields: int,
+             images: int) -> Dict[str, Any]:
+    """
+    Answers in the progression layout, {section: {instance: {field: value}}},
+    with a mix of short values, free text and ``images`` image fields per instance.
+    """
+    answers: Dict[str, Any] = {}
+    for s in range(sections):
+        section = answers[str(s)] = {}
+        for i in range(instances):
+            instance = section[str(i)] = {}
+            for f in range(fields):
+                kind = f % 4
+                if kind == 0:
+                    value: Any = _text(rng, 2).title()
+                elif kind == 1:
+                    value = rng.choice(("Ja", "Nee", "Misschien"))
+                elif kind == 2:
+                    value = _text(rng, rng.randint(8, 40))
+                else:
+                    value = rng.randint(0, 500)
+                instance[str(f)] = value
+            for f in range(fields, fields + images):
+                instance[str(f)] = _sas_url(rng, user)
+    return answers
+
+
+# name -> (sections, instances per section, fields per instance, image fields per instance)
+PROFILES: Dict[str, Tuple[int, int, int, int]] = {
+    "contact form": (1, 1, 8, 0),
+    "onboarding": (4, 1, 12, 0),
+    "repeatable sections": (6, 6, 10, 0),
+    "photo inventory": (3, 8, 6, 2),
+    "long form with images": (10, 5, 12, 1),
+}
+
+
+def _document(user: str, name: str, answers: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": f"form:benchmark-{name.replace(' ', '-')}version1",
+        "userId": f"user:{user}",
+        "formId": f"benchmark-{name.replace(' ', '-')}",
+        "formVersion": "1",
+        "answers": answers,
+        "updatedAt": "2026-10-18 12:00:00+02:00",
+    }
+
+
+def _timed(fn: Callable[[], Any], runs: int) -> float:
+    """
+    :return: The median time of ``fn`` in µs.
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(times)
+
+
+def _charges(container: Any, doc: Dict[str, Any]) -> Tuple[float, float]:
+    """
+    Upsert and point-read the document.
+
+    :return: The request charge of the upsert and of the read.
+    """
+    charges: List[float] = []
+
+    def hook(headers, result):
+        charges.append(float(headers.get("x-ms-request-charge", 0)))
+
+    container.upsert_item(doc, response_hook=hook)
+    container.read_item(doc["id"], partition_key=doc["userId"], response_hook=hook)
+    container.delete_item(doc["id"], partition_key=doc["userId"])
+    return charges[0], charges[1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="memory", choices=("memory", "sqlite", "azure"),
+                        help="Cosmos backend to measure the request charge on (default memory)")
+    parser.add_argument("--level", type=int, default=6, help="zlib compression level (default 6)")
+    parser.add_argument("--runs", type=int, default=50, help="Number of timed encodes and decodes")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the generated answers")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ["COSMOS_BACKEND"] = args.backend
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "webcontent.settings")
+    sys.path.insert(0, str(PROJECT_DIR))
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.test import override_settings
+
+    from forms.services.cosmos_client import get_container
+    from forms.services.progression_codec import decode_progression, encode_progression
+
+    container = get_container(settings.COSMOS["DATABASE_USER_DATA"], settings.COSMOS["CONTAINER_FORM_PROGRESSION"])
+    rng = random.Random(args.seed)
+    user = str(uuid.UUID(int=rng.getrandbits(128)))
+
+    results = []
+    print(f"{'form':<24}{'plain':>10}{'zlib':>10}{'saved':>8}{'encode':>10}{'decode':>10}"
+          f"{'write RU':>16}{'read RU':>14}")
+    with override_settings(FORM_PROGRESSION_COMPRESSION={"ENABLED": True, "THRESHOLD": 0, "LEVEL": args.level}):
+        for name, shape in PROFILES.items():
+            plain = _document(user, name, _answers(rng, user, *shape))
+            compressed = encode_progression(plain)
+            plain_bytes = len(json.dumps(plain, separators=(",", ":")))
+            compressed_bytes = len(json.dumps(compressed, separators=(",", ":")))
+
+            encode_us = _timed(lambda: encode_progression(plain), args.runs)
+            decode_us = _timed(lambda: decode_progression(compressed), args.runs)
+            plain_write, plain_read = _charges(container, plain)
+            compressed_write, compressed_read = _charges(container, compressed)
+
+            saved = 1 - compressed_bytes / plain_bytes
+            print(f"{name:<24}{plain_bytes / 1024:>8.1f}KB{compressed_bytes / 1024:>8.1f}KB{saved:>8.0%}"
+                  f"{encode_us:>8.0f}µs{decode_us:>8.0f}µs"
+                  f"{plain_write:>7.1f} → {compressed_write:<6.1f}{plain_read:>6.1f} → {compressed_read:<6.1f}")
+            results.append({
+                "form": name,
+                "plainBytes": plain_bytes,
+                "compressedBytes": compressed_bytes,
+                "encodeUs": round(encode_us, 1),
+                "decodeUs": round(decode_us, 1),
+                "writeRu": [plain_write, compressed_write],
+                "readRu": [plain_read, compressed_read],
+            })
+
+    print(f"\nBackend: {args.backend}, zlib level {args.level}, median of {args.runs} encodes/decodes.")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"backend": args.backend, "level": args.level, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Worker cold-start benchmark.
+
+Boots the Django project in fresh interpreters under ``python -X importtime``,
+the way a gunicorn worker does (WSGI application plus the URLconf), and reports
+the wall time of the boot and where the import time goes.
+
+Usage, from backend/webcontent:
+
+    python benchmarks/startup_importtime.py
+    python benchmarks/startup_importtime.py --runs 10 --top 25
+    python benchmarks/startup_importtime.py --json startup.json --max-ms 1500
+
+--json appends one result per run of the script, to track cold starts over
+time. --max-ms exits non-zero when the median boot is slower, for CI.
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+BOOT = """
+import time
+start = time.perf_counter()
+from webcontent.wsgi import application
+from django.conf import settings
+from django.urls import get_resolver
+get_resolver(settings.ROOT_URLCONF).url_patterns
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _boot() -> Tuple[float, List[Tuple[str, int, int]]]:
+    """
+    Boot the project once.
+
+    :return: The boot time in ms, and (module, self µs, cumulative µs) per import.
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "webcontent.settings", "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"Boot failed:\n{result.stderr[-4000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return float(result.stdout.strip().splitlines()[-1]), imports
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold boots (default 5)")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--json", help="Append the result to this JSON lines file")
+    parser.add_argument("--max-ms", type=float, help="Fail when the median boot takes longer")
+    args = parser.parse_args()
+
+    # The first boot warms the filesystem cache and is not counted.
+    _boot()
+    boots = [_boot() for _ in range(args.runs)]
+
+    boot_ms = statistics.median(ms for ms, _ in boots)
+    import_ms = statistics.median(sum(s for _, s, _ in imports) for _, imports in boots) / 1000
+
+    per_package: Dict[str, List[int]] = defaultdict(list)
+    slowest: Dict[str, List[int]] = defaultdict(list)
+    for _, imports in boots:
+        totals: Dict[str, int] = defaultdict(int)
+        for name, self_us, cumulative_us in imports:
+            totals[name.split(".")[0]] += self_us
+            slowest[name].append(cumulative_us)
+        for package, total in totals.items():
+            per_package[package].append(total)
+
+    print(f"Boot (wsgi + urlconf), median of {args.runs}: {boot_ms:.1f} ms")
+    print(f"Import time, median of {args.runs}:          {import_ms:.1f} ms\n")
+
+    print("Self import time per top-level package:")
+    packages = sorted(per_package.items(), key=lambda item: -statistics.median(item[1]))
+    for package, totals in packages[:args.top]:
+        print(f"  {statistics.median(totals) / 1000:8.1f} ms  {package}")
+
+    print("\nSlowest imports (cumulative):")
+    modules = sorted(slowest.items(), key=lambda item: -statistics.median(item[1]))
+    for name, totals in modules[:args.top]:
+        print(f"  {statistics.median(totals) / 1000:8.1f} ms  {name}")
+
+    if args.json:
+        record = {
+            "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "runs": args.runs,
+            "bootMs": round(boot_ms, 1),
+            "importMs": round(import_ms, 1),
+            "packagesMs": {p: round(statistics.median(t) / 1000, 1) for p, t in packages[:args.top]},
+        }
+        with open(args.json, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    if args.max_ms is not None and boot_ms > args.max_ms:
+        print(f"\nMedian boot {boot_ms:.1f} ms exceeds --max-ms {args.max_ms:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
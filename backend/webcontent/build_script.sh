@@ -1 +1,2 @@
-python manage.py migrate 
\ No newline at end of file
+python manage.py migrate
+python manage.py publish_forms --once
\ No newline at end of file
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Form, FormField, FormSection, FormSubmission
+from .models import (Form, FormDefinitionSnapshot, FormField,
+                     FormPublishOutbox, FormSection, FormSubmission,
+                     FormVersion)
 
 # Register your models here.
 @admin.register(Form)
@@ -34,11 +36,30 @@ class FormFieldAdmin(admin.ModelAdmin):
             return f"{obj.form_section.form.title} - {obj.form_section.title}"
         return "—"
 
+@admin.register(FormDefinitionSnapshot)
+class FormDefinitionSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['form', 'version', 'created_at']
+    list_filter = ['form']
+    readonly_fields = ['form', 'version', 'payload', 'created_at']
+
+@admin.register(FormVersion)
+class FormVersionAdmin(admin.ModelAdmin):
+    list_display = ['form_id', 'version', 'title', 'created_at']
+    search_fields = ['form_id', 'title']
+    readonly_fields = ['form_id', 'version', 'form_type', 'title', 'schema', 'created_at']
+
+@admin.register(FormPublishOutbox)
+class FormPublishOutboxAdmin(admin.ModelAdmin):
+    list_display = ['form_id', 'action', 'attempts', 'available_at', 'updated_at']
+    list_filter = ['action']
+    search_fields = ['form_id']
+    readonly_fields = ['form_id', 'action', 'revision', 'attempts', 'last_error', 'created_at', 'updated_at']
+
 @admin.register(FormSubmission)
 class FormSubmissionAdmin(admin.ModelAdmin):
     list_filter = ['user', 'form_name']
     search_fields = ['user__username', 'form_name']
-    list_display = ['user', 'form_name', 'form__version', 'submitted_at']
+    list_display = ['user', 'form_name', 'version', 'submitted_at']
     readonly_fields = ['id']
 
 
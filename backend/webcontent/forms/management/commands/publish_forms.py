@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from forms.services.cosmos_metrics import cosmos_scope
+from forms.services.outbox import drain, outbox_config
+
+
+class Command(BaseCommand):
+    help = "Publishes pending form definitions from the outbox to Cosmos DB"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+        parser.add_argument('--batch-size', type=int, default=None, help='Number of forms published per batch')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds to wait when the outbox is empty')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] if options['interval'] is not None else outbox_config()['POLL_INTERVAL']
+
+        if options['once']:
+            total = failed = 0
+            while True:
+                with cosmos_scope("publish_forms"):
+                    published, errors = drain(options['batch_size'])
+                total, failed = total + published, failed + errors
+                if not (published or errors):
+                    break
+            self.stdout.write(self.style.SUCCESS(f"✅ Published {total} forms, {failed} failed."))
+            return
+
+        self.stdout.write("Publishing forms from the outbox, press CTRL-C to stop.")
+        try:
+            while True:
+                close_old_connections()
+                with cosmos_scope("publish_forms"):
+                    published, failed = drain(options['batch_size'])
+                if published or failed:
+                    self.stdout.write(f"Published {published} forms, {failed} failed.")
+                if not (published or failed):
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from forms.services.snapshots import rebuild_all_snapshots
+
+
+class Command(BaseCommand):
+    help = "Re-renders the FormDefinitionSnapshot of every active form"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=100, help='Number of forms loaded per batch')
+
+    def handle(self, *args, **options):
+        count = rebuild_all_snapshots(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {count} form definition snapshots."))
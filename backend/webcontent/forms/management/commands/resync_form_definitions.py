@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from forms.models import FormType
+from forms.services.cosmos_metrics import cosmos_scope
+from forms.services.resync import resync_definitions
+
+
+class Command(BaseCommand):
+    help = "Republishes the FormDefinition document of every form to Cosmos DB"
+
+    def add_arguments(self, parser):
+        status = parser.add_mutually_exclusive_group()
+        status.add_argument('--active', dest='is_active', action='store_const', const=True,
+                            help='Only resync active forms')
+        status.add_argument('--inactive', dest='is_active', action='store_const', const=False,
+                            help='Only resync inactive forms')
+        parser.add_argument('--type', dest='form_type', choices=FormType.values, help='Only resync forms of this type')
+        parser.add_argument('--workers', type=int, default=8, help='Number of concurrent upserts')
+        parser.add_argument('--chunk-size', type=int, default=100, help='Number of forms loaded per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Build the definitions without writing them')
+
+    def handle(self, *args, **options):
+        with cosmos_scope("resync_form_definitions"):
+            report = resync_definitions(
+                is_active=options['is_active'],
+                form_type=options['form_type'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+            )
+
+        verb = "Built" if report.dry_run else "Resynced"
+        self.stdout.write(
+            f"{verb} {report.published} form definitions ({report.bytes / 1024:.1f} KiB) "
+            f"in {report.seconds:.2f}s, {report.per_second:.1f} forms/s."
+        )
+        if not report.dry_run:
+            if report.charged:
+                self.stdout.write(f"Request charge: {report.request_charge:.1f} RU "
+                                  f"({report.request_charge / report.charged:.2f} RU per upsert).")
+            else:
+                self.stdout.write("Request charge: not reported by the container.")
+        if report.legacy:
+            verb = "Found" if report.dry_run else "Deleted"
+            self.stdout.write(f"{verb} {report.legacy} legacy per-version form definitions.")
+
+        if report.failed:
+            self.stdout.write(self.style.ERROR(f"❌ {len(report.failed)} failed: {', '.join(report.failed)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Done."))
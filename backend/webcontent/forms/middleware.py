@@ -0,0 +1,40 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import sync_and_async_middleware
+
+from forms.services.cosmos_metrics import cosmos_scope
+
+
+logger = logging.getLogger(__name__)
+
+
+def _view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    return (match.view_name if match else None) or request.path
+
+
+@sync_and_async_middleware
+def cosmos_metrics_middleware(get_response):
+    """
+    Attribute the Cosmos operations of a request to its view, and log one
+    summary line for requests that made any.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with cosmos_scope(request.path) as usage:
+                response = await get_response(request)
+                usage.name = _view_name(request)
+            if usage.operations:
+                logger.info("%s %s %s", request.method, response.status_code, usage.summary())
+            return response
+    else:
+        def middleware(request):
+            with cosmos_scope(request.path) as usage:
+                response = get_response(request)
+                usage.name = _view_name(request)
+            if usage.operations:
+                logger.info("%s %s %s", request.method, response.status_code, usage.summary())
+            return response
+
+    return middleware
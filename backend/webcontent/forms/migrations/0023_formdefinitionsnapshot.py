@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0022_alter_formsection_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormDefinitionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('payload', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='forms.form')),
+            ],
+            options={
+                'verbose_name': 'Form Definition Snapshot',
+                'verbose_name_plural': 'Form Definition Snapshots',
+                'constraints': [models.UniqueConstraint(fields=('form', 'version'), name='unique_form_snapshot_version')],
+            },
+        ),
+    ]
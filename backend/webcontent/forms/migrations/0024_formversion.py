@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0023_formdefinitionsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='form_key',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='formsubmission',
+            name='version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='FormVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form_id', models.CharField(db_index=True, max_length=100)),
+                ('version', models.PositiveIntegerField()),
+                ('form_type', models.CharField(choices=[('user_generated', 'User Generated'), ('ai_generated', 'AI Generated')], default='user_generated')),
+                ('title', models.CharField(max_length=255)),
+                ('schema', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Form Version',
+                'verbose_name_plural': 'Form Versions',
+                'constraints': [models.UniqueConstraint(fields=('form_id', 'version'), name='unique_form_version')],
+            },
+        ),
+        migrations.AddField(
+            model_name='formsubmission',
+            name='form_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='submissions', to='forms.formversion'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:40
+
+from django.db import migrations
+
+
+def _schema(form):
+    sections = []
+    for section in form.sections.order_by("order", "pk"):
+        sections.append({
+            "title": section.title,
+            "description": section.description,
+            "isRepeatable": section.is_repeatable,
+            "repeatableCount": section.repeatable_count,
+            "fields": [
+                {
+                    "label": field.label,
+                    "description": field.description,
+                    "type": field.field_type,
+                    "required": field.is_required,
+                    "placeholder": field.placeholder,
+                    "options": field.options,
+                }
+                for field in section.fields.order_by("order", "pk")
+            ],
+        })
+    return {
+        "formId": form.form_id,
+        "title": form.title,
+        "icon": form.icon,
+        "description": form.description,
+        "sections": sections,
+        "shortDescription": form.short_description,
+        "version": str(form.version),
+    }
+
+
+def backfill_form_versions(apps, schema_editor):
+    """
+    Freeze the current version of every form and attach existing submissions to it.
+    Earlier versions were never stored, so this is the best attribution available.
+    """
+    Form = apps.get_model('forms', 'Form')
+    FormVersion = apps.get_model('forms', 'FormVersion')
+    FormSubmission = apps.get_model('forms', 'FormSubmission')
+
+    for form in Form.objects.all():
+        form_version, _ = FormVersion.objects.get_or_create(
+            form_id=form.form_id,
+            version=form.version,
+            defaults={"form_type": form.form_type, "title": form.title, "schema": _schema(form)},
+        )
+        FormSubmission.objects.filter(form=form, form_version__isnull=True).update(
+            form_version=form_version, form_key=form.form_id, version=form.version,
+        )
+
+
+def reverse_backfill_form_versions(apps, schema_editor):
+    """Reverse operation - not needed but required for reversibility"""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0024_formversion"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_form_versions,
+            reverse_backfill_form_versions,
+        ),
+    ]
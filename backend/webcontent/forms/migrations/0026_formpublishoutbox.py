@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0025_backfill_form_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormPublishOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form_id', models.CharField(max_length=100, unique=True)),
+                ('action', models.CharField(choices=[('publish', 'Publish'), ('delete', 'Delete')], default='publish', max_length=10)),
+                ('revision', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(db_index=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Form Publish Outbox Entry',
+                'verbose_name_plural': 'Form Publish Outbox',
+            },
+        ),
+    ]
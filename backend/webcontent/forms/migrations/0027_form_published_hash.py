@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0026_formpublishoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='form',
+            name='published_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='formversion',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
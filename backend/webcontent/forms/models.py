@@ -41,6 +41,9 @@ class Form(models.Model):
 
     order = models.PositiveIntegerField(default=0)
 
+    # definition_hash of the FormDefinition document last upserted to Cosmos DB
+    published_hash = models.CharField(max_length=64, blank=True, editable=False)
+
     class Meta:
         verbose_name = 'Form'
         verbose_name_plural = 'Forms'
@@ -120,12 +123,65 @@ class FormField(models.Model):
         return self.label
 
 
+class FormDefinitionSnapshot(models.Model):
+    """
+    The FormDetailView payload of a published form version, already encoded as JSON.
+    """
+    form = models.ForeignKey(Form, on_delete=models.CASCADE, related_name="snapshots")
+    version = models.PositiveIntegerField()
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Form Definition Snapshot'
+        verbose_name_plural = 'Form Definition Snapshots'
+        constraints = [
+            models.UniqueConstraint(fields=["form", "version"], name="unique_form_snapshot_version"),
+        ]
+
+    def __str__(self):
+        return f"{self.form} v{self.version}"
+
+
+class FormVersion(models.Model):
+    """
+    Append-only record of a form as it was at one version.
+
+    ``schema`` holds the frozen FormDetailView payload. Rows are never updated
+    and outlive the form itself, so historical submissions keep their schema.
+    """
+    form_id = models.CharField(max_length=100, db_index=True)
+    version = models.PositiveIntegerField()
+    form_type = models.CharField(choices=FormType.choices, default=FormType.USER_GENERATED)
+    title = models.CharField(max_length=255)
+    schema = models.JSONField()
+    # definition_hash of the version's FormDefinition document, blank for versions recorded before it existed
+    content_hash = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Form Version'
+        verbose_name_plural = 'Form Versions'
+        constraints = [
+            models.UniqueConstraint(fields=["form_id", "version"], name="unique_form_version"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} v{self.version}"
+
+
 class FormSubmission(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="submissions")
     is_confirmed = models.BooleanField(default=False)
     form = models.ForeignKey(Form, 
                                 on_delete=models.SET_NULL, null=True,
                                 related_name="submissions")
+    # The exact version that was filled in, with its public id and number
+    # copied onto the row so history can be listed without joins.
+    form_version = models.ForeignKey(FormVersion, on_delete=models.PROTECT, null=True, blank=True,
+                                     related_name="submissions")
+    form_key = models.CharField(max_length=100, blank=True)
+    version = models.PositiveIntegerField(null=True, blank=True)
     form_name = models.CharField(max_length=255)
     submitted_at = models.DateTimeField(auto_now_add=True)
     form_data = models.JSONField()
@@ -135,3 +191,34 @@ class FormSubmission(models.Model):
     def __str__(self):
         return f"{self.user}'s {self.form_name}"
 
+
+
+class PublishAction(models.TextChoices):
+    PUBLISH = 'publish', "Publish"
+    DELETE = 'delete', "Delete"
+
+
+class FormPublishOutbox(models.Model):
+    """
+    Pending Cosmos DB publication of a form, written in the same transaction
+    as the edit and drained by the ``publish_forms`` worker.
+
+    There is at most one row per form: later edits overwrite the action and
+    bump ``revision``, so a worker never deletes a row changed while it was
+    publishing.
+    """
+    form_id = models.CharField(max_length=100, unique=True)
+    action = models.CharField(max_length=10, choices=PublishAction.choices, default=PublishAction.PUBLISH)
+    revision = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(db_index=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Form Publish Outbox Entry'
+        verbose_name_plural = 'Form Publish Outbox'
+
+    def __str__(self):
+        return f"{self.action} {self.form_id}"
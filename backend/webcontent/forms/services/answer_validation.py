@@ -0,0 +1,323 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from forms.models import Form, FormType
+from forms.services.form_tree import ensure_form_tree, load_form_tree
+from forms.services.versions import get_version
+
+
+logger = logging.getLogger(__name__)
+
+
+MULTIPLE_CHOICE_TYPES = {"multiselect"}
+SINGLE_CHOICE_TYPES = {"select", "select_few"}
+
+
+@dataclass(frozen=True)
+class CompiledField:
+    label: str
+    type: str
+    required: bool
+    choices: Optional[FrozenSet[str]]
+
+
+@dataclass(frozen=True)
+class CompiledSection:
+    title: str
+    max_instances: int
+    fields: Tuple[CompiledField, ...]
+    fields_by_label: Dict[str, int]
+    required: FrozenSet[int]
+
+
+def _option_values(options: Any) -> Optional[FrozenSet[str]]:
+    # Options are plain strings or {"value", "label"} objects, like the frontend accepts.
+    if not options:
+        return None
+    values = set()
+    for option in options:
+        if isinstance(option, dict) and "value" in option:
+            values.add(str(option["value"]))
+        else:
+            values.add(str(option))
+    return frozenset(values)
+
+
+class CompiledFormValidator:
+    """
+    Checks answers against the fields of one form version.
+
+    Built once per (form_id, version) from the form tree, after which every
+    check is a single pass over the answer dict without database access.
+
+    Two answer layouts are supported, the ones the frontend sends:
+    - submissions: {section title: {"Instance N": {field label: value}}}
+    - progression: {section index: {instance index: {field index: value}}}
+    """
+
+    def __init__(self, form_id: str, version: int, form_type: str, sections: List[CompiledSection]):
+        self.form_id = form_id
+        self.version = version
+        # Only user generated forms follow the section/field layout. AI generated
+        # forms are answered as free-form question/answer lists.
+        self.enforced = form_type == FormType.USER_GENERATED
+        self.sections = tuple(sections)
+        self.sections_by_title = {}
+        for index, section in enumerate(self.sections):
+            self.sections_by_title.setdefault(section.title or f"Section {index + 1}", index)
+
+    @classmethod
+    def from_form(cls, form: Form) -> "CompiledFormValidator":
+        form = ensure_form_tree(form)
+        sections = []
+        for section in form.sections.all():
+            fields = tuple(
+                CompiledField(
+                    label=field.label,
+                    type=field.field_type,
+                    required=field.is_required,
+                    choices=_option_values(field.options),
+                )
+                for field in section.fields.all()
+            )
+            fields_by_label = {}
+            for index, field in enumerate(fields):
+                fields_by_label.setdefault(field.label or f"Field {index}", index)
+            sections.append(CompiledSection(
+                title=section.title,
+                # the frontend caps instances on repeatableCount alone
+                max_instances=max(section.repeatable_count, 1),
+                fields=fields,
+                fields_by_label=fields_by_label,
+                required=frozenset(i for i, field in enumerate(fields) if field.required),
+            ))
+        return cls(form.form_id, form.version, form.form_type, sections)
+
+    @classmethod
+    def from_definition(cls, form_id: str, version: int, form_type: str,
+                        definition: Dict[str, Any]) -> "CompiledFormValidator":
+        """
+        Compile from a FormDetailView payload, like the schema frozen in a FormVersion.
+        """
+        sections = []
+        for section in definition.get("sections") or []:
+            fields = tuple(
+                CompiledField(
+                    label=field.get("label"),
+                    type=field.get("type"),
+                    required=bool(field.get("required")),
+                    choices=_option_values(field.get("options")),
+                )
+                for field in section.get("fields") or []
+            )
+            fields_by_label = {}
+            for index, field in enumerate(fields):
+                fields_by_label.setdefault(field.label or f"Field {index}", index)
+            sections.append(CompiledSection(
+                title=section.get("title"),
+                max_instances=max(section.get("repeatableCount") or 0, 1),
+                fields=fields,
+                fields_by_label=fields_by_label,
+                required=frozenset(i for i, field in enumerate(fields) if field.required),
+            ))
+        return cls(form_id, version, form_type, sections)
+
+    # -- checks -------------------------------------------------------------
+
+    def validate_submission(self, answers: Any) -> List[Dict[str, str]]:
+        """
+        Validate completed answers keyed by section title, instance label and field label.
+
+        :return: A list of {"path", "error"} dicts, empty when the answers are valid.
+        """
+        if not self.enforced:
+            return []
+        if not isinstance(answers, dict):
+            return [{"path": "", "error": "answers must be an object"}]
+
+        errors: List[Dict[str, str]] = []
+        answered_sections = set()
+
+        for section_key, instances in answers.items():
+            index = self.sections_by_title.get(section_key)
+            if index is None:
+                errors.append({"path": section_key, "error": "unknown section"})
+                continue
+            answered_sections.add(index)
+            section = self.sections[index]
+
+            if not isinstance(instances, dict):
+                errors.append({"path": section_key, "error": "section answers must be an object"})
+                continue
+            if len(instances) > section.max_instances:
+                errors.append({"path": section_key, "error": f"at most {section.max_instances} instances allowed"})
+            if not instances and section.required:
+                errors.append({"path": section_key, "error": "section is required"})
+
+            for instance_key, values in instances.items():
+                path = f"{section_key}.{instance_key}"
+                if not isinstance(values, dict):
+                    errors.append({"path": path, "error": "instance answers must be an object"})
+                    continue
+                filled = set()
+                for label, value in values.items():
+                    field_index = section.fields_by_label.get(label)
+                    if field_index is None:
+                        errors.append({"path": f"{path}.{label}", "error": "unknown field"})
+                        continue
+                    error = self._check_value(section.fields[field_index], value)
+                    if error:
+                        errors.append({"path": f"{path}.{label}", "error": error})
+                    elif value not in ("", None):
+                        filled.add(field_index)
+                for field_index in section.required - filled:
+                    errors.append({"path": f"{path}.{section.fields[field_index].label}", "error": "field is required"})
+
+        for index, section in enumerate(self.sections):
+            if index not in answered_sections and section.required:
+                errors.append({"path": section.title, "error": "section is required"})
+
+        return errors
+
+    def validate_progression(self, answers: Any) -> List[Dict[str, str]]:
+        """
+        Validate partial answers keyed by section, instance and field index.
+        Required fields are not enforced, the form is still being filled in.
+
+        :return: A list of {"path", "error"} dicts, empty when the answers are valid.
+        """
+        if not self.enforced:
+            return []
+        if not isinstance(answers, dict):
+            return [{"path": "", "error": "answers must be an object"}]
+
+        errors: List[Dict[str, str]] = []
+        for section_key, instances in answers.items():
+            section_index = _index(section_key)
+            if section_index is None or section_index >= len(self.sections):
+                errors.append({"path": str(section_key), "error": "unknown section"})
+                continue
+            section = self.sections[section_index]
+
+            if not isinstance(instances, dict):
+                errors.append({"path": str(section_key), "error": "section answers must be an object"})
+                continue
+
+            for instance_key, values in instances.items():
+                path = f"{section_key}.{instance_key}"
+                instance_index = _index(instance_key)
+                if instance_index is None or instance_index >= section.max_instances:
+                    errors.append({"path": path, "error": "instance out of range"})
+                    continue
+                if not isinstance(values, dict):
+                    errors.append({"path": path, "error": "instance answers must be an object"})
+                    continue
+                for field_key, value in values.items():
+                    field_index = _index(field_key)
+                    if field_index is None or field_index >= len(section.fields):
+                        errors.append({"path": f"{path}.{field_key}", "error": "unknown field"})
+                        continue
+                    error = self._check_value(section.fields[field_index], value)
+                    if error:
+                        errors.append({"path": f"{path}.{field_key}", "error": error})
+
+        return errors
+
+    @staticmethod
+    def _check_value(field: CompiledField, value: Any) -> Optional[str]:
+        if value is None or value == "":
+            return None
+        if not isinstance(value, str):
+            return "value must be a string"
+
+        if field.type == "email":
+            try:
+                validate_email(value)
+            except ValidationError:
+                return "invalid email address"
+        elif field.choices is not None and field.type in SINGLE_CHOICE_TYPES:
+            if value not in field.choices:
+                return "value is not one of the options"
+        elif field.choices is not None and field.type in MULTIPLE_CHOICE_TYPES:
+            if any(v not in field.choices for v in value.split(",") if v):
+                return "value is not one of the options"
+        return None
+
+
+def _index(key: Any) -> Optional[int]:
+    try:
+        index = int(key)
+    except (TypeError, ValueError):
+        return None
+    return index if index >= 0 else None
+
+
+_validators: "OrderedDict[Tuple[str, int], CompiledFormValidator]" = OrderedDict()
+_validators_lock = threading.Lock()
+MAX_VALIDATORS = 256
+
+# (form_id, version) -> when a lookup of that unknown version may run again, so a
+# bogus version can't make every request load the form tree. Bounded like _validators.
+_missing: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+MISSING_TIMEOUT = 60
+
+
+def _remember(validator: CompiledFormValidator) -> CompiledFormValidator:
+    with _validators_lock:
+        _validators[(validator.form_id, validator.version)] = validator
+        _missing.pop((validator.form_id, validator.version), None)
+        while len(_validators) > MAX_VALIDATORS:
+            _validators.popitem(last=False)
+    return validator
+
+
+def _remember_missing(key: Tuple[str, int]) -> None:
+    with _validators_lock:
+        _missing[key] = time.monotonic() + MISSING_TIMEOUT
+        while len(_missing) > MAX_VALIDATORS:
+            _missing.popitem(last=False)
+
+
+def get_validator(form_id: str, version: int, form: Optional[Form] = None) -> Optional[CompiledFormValidator]:
+    """
+    Return the compiled validator of a form version, compiling it on first use.
+
+    :param form: The form, when the caller already loaded it; avoids one query.
+    :return: The validator, or None when that version is neither the current
+             one nor recorded as a FormVersion; that answer is cached for
+             MISSING_TIMEOUT seconds.
+    """
+    version = _index(version)
+    if version is None:
+        return None
+
+    key = (form_id, version)
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is not None:
+            _validators.move_to_end(key)
+            return validator
+        if _missing.get(key, 0) > time.monotonic():
+            return None
+
+    if form is None or form.version != key[1]:
+        form = load_form_tree(form_id=form_id)
+    if form is not None and form.version == version:
+        return _remember(CompiledFormValidator.from_form(form))
+
+    # Older versions are compiled from the schema frozen when they were published.
+    form_version = get_version(form_id, version)
+    if form_version is None:
+        logger.debug("No field definitions for %s v%s, answers are not validated", form_id, version)
+        _remember_missing(key)
+        return None
+    return _remember(CompiledFormValidator.from_definition(
+        form_id, version, form_version.form_type, form_version.schema
+    ))
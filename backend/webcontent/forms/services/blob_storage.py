@@ -1,16 +1,10 @@
 import logging
 import datetime
 import os
+import threading
 import uuid
 import time
-from typing import IO
-
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import (
-    BlobServiceClient,
-    generate_blob_sas,
-    BlobSasPermissions,
-)
+from typing import IO, Any, Dict, Set
 
 from dotenv import load_dotenv
 
@@ -23,6 +17,38 @@ class UploadError(Exception):
     """Raised when an upload to blob storage fails after retries."""
 
 
+# Blob service clients per account URL and the containers known to exist.
+# Built on first upload; the azure SDK imports are deferred until then as well.
+_service_clients: Dict[str, Any] = {}
+_ensured_containers: Set[tuple] = set()
+_clients_lock = threading.Lock()
+
+
+def _blob_service_client(blob_service_url: str) -> Any:
+    """
+    Return the shared BlobServiceClient of an account, creating it on first use.
+    """
+    with _clients_lock:
+        client = _service_clients.get(blob_service_url)
+        if client is not None:
+            return client
+
+        from azure.identity import DefaultAzureCredential
+        from azure.storage.blob import BlobServiceClient
+
+        # Use DefaultAzureCredential for service client auth if available; account key needed for SAS generation
+        try:
+            credential = DefaultAzureCredential()
+        except Exception as e:
+            logger.warning("DefaultAzureCredential initialization failed: %s", e)
+            credential = None
+
+        logger.info("Connecting to BlobServiceClient at %s", blob_service_url)
+        client = BlobServiceClient(blob_service_url, credential=credential)
+        _service_clients[blob_service_url] = client
+        return client
+
+
 def _get_env_var(name: str) -> str:
     val = os.environ.get(name)
     if not val:
@@ -64,27 +90,23 @@ def upload_file_to_storage(user_id: str, file_obj: IO, *, max_retries: int = 3)
 
     blob_service_url = f"https://{storage_account_name}.blob.core.windows.net"
 
-    # Use DefaultAzureCredential for service client auth if available; account key needed for SAS generation
-    try:
-        credential = DefaultAzureCredential()
-    except Exception as e:
-        logger.warning("DefaultAzureCredential initialization failed: %s", e)
-        credential = None
+    from azure.storage.blob import generate_blob_sas, BlobSasPermissions
 
-    logger.info("Connecting to BlobServiceClient at %s", blob_service_url)
     try:
-        blob_service_client = BlobServiceClient(blob_service_url, credential=credential)
+        blob_service_client = _blob_service_client(blob_service_url)
     except Exception as e:
         logger.exception("Failed to create BlobServiceClient: %s", e)
         raise UploadError(f"Failed to initialize blob service client: {e}") from e
 
     container_client = blob_service_client.get_container_client(container_name)
 
-    # Ensure container exists (idempotent)
+    # Ensure container exists (idempotent), once per process
     try:
-        if not container_client.exists():
-            logger.info("Container '%s' does not exist. Creating...", container_name)
-            container_client.create_container()
+        if (blob_service_url, container_name) not in _ensured_containers:
+            if not container_client.exists():
+                logger.info("Container '%s' does not exist. Creating...", container_name)
+                container_client.create_container()
+            _ensured_containers.add((blob_service_url, container_name))
     except Exception as e:
         logger.exception("Failed to ensure container '%s' exists: %s", container_name, e)
         raise UploadError(f"Failed to ensure container exists: {e}") from e
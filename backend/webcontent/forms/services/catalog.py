@@ -0,0 +1,147 @@
+import datetime
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.renderers import JSONRenderer
+
+from forms.models import Form
+from forms.services.definition_cache import DEFAULTS as CACHE_DEFAULTS
+
+
+logger = logging.getLogger(__name__)
+
+
+CATALOG_KEY = "forms:catalog"
+CATALOG_VERSION_KEY = "forms:catalog:version"
+ALL_FORMS = "*"
+
+# This process's copy: (version, expires_at, catalog). With a shared cache,
+# expires_at is when its version is next compared with the shared one.
+_local_catalog: Optional[tuple] = None
+_local_lock = threading.Lock()
+
+
+def _config() -> Dict[str, Any]:
+    return {**CACHE_DEFAULTS, **getattr(settings, "FORM_DEFINITION_CACHE", {})}
+
+
+def _partition(items: List[Dict[str, Any]], last_modified: Optional[datetime.datetime]) -> Dict[str, Any]:
+    payload = JSONRenderer().render(items)
+    return {
+        "payload": payload,
+        "etag": f'"{hashlib.sha1(payload).hexdigest()}"',
+        "lastModified": last_modified,
+    }
+
+
+def catalog_version(catalog: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Digest of every partition's ETag, the same on every worker that built the same catalog.
+    """
+    etags = "".join(f"{key}={catalog[key]['etag']}" for key in sorted(catalog))
+    return hashlib.sha1(etags.encode()).hexdigest()
+
+
+def _keep_local(catalog: Dict[str, Dict[str, Any]], version: str, ttl: float) -> None:
+    global _local_catalog
+    with _local_lock:
+        _local_catalog = (version, time.monotonic() + ttl, catalog)
+
+
+def build_catalog() -> Dict[str, Dict[str, Any]]:
+    """
+    Build the FormsOverviewView payloads of every form_type partition in one query.
+
+    :return: A dict mapping form_type (or ALL_FORMS) to its encoded payload,
+             ETag and Last-Modified.
+    """
+    forms = (Form.objects
+             .filter(is_active=True)
+             .only(
+                   "form_id",
+                   "form_type",
+                   "title",
+                   "description",
+                   "short_description",
+                   "icon",
+                   "version",
+                   "updated_at",
+                   )
+             .order_by("order", "form_id"))
+
+    items: Dict[str, List[Dict[str, Any]]] = {ALL_FORMS: []}
+    last_modified: Dict[str, datetime.datetime] = {}
+    for f in forms:
+        item = {
+            "formId": f.form_id,
+            "title": f.title,
+            "icon": f.icon,
+            "formType": f.form_type,
+            "description": f.description,
+            "shortDescription": f.short_description,
+            "version": str(f.version),
+        }
+        for key in (ALL_FORMS, f.form_type):
+            items.setdefault(key, []).append(item)
+            if key not in last_modified or f.updated_at > last_modified[key]:
+                last_modified[key] = f.updated_at
+
+    return {key: _partition(partition, last_modified.get(key)) for key, partition in items.items()}
+
+
+def rebuild_catalog() -> Dict[str, Dict[str, Any]]:
+    """
+    Rebuild the catalog and swap it in with a single cache write.
+    """
+    catalog = build_catalog()
+    version = catalog_version(catalog)
+    config = _config()
+
+    if config["SHARED_CACHE"]:
+        caches[config["SHARED_CACHE"]].set_many({CATALOG_KEY: catalog, CATALOG_VERSION_KEY: version},
+                                                config["CATALOG_TIMEOUT"])
+        _keep_local(catalog, version, config["CATALOG_CHECK_INTERVAL"])
+    else:
+        _keep_local(catalog, version, config["CATALOG_TIMEOUT"])
+
+    logger.debug("Rebuilt forms catalog with partitions %s", list(catalog))
+    return catalog
+
+
+def get_catalog_partition(form_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Return the precomputed overview payload for a form_type, or for all forms.
+
+    Only the first read after a rebuild window touches the database. Other
+    reads are served from this process's copy, and the shared cache is only
+    read every CATALOG_CHECK_INTERVAL seconds, for the small version key, and
+    for the whole catalog once its version changed.
+    """
+    config = _config()
+    with _local_lock:
+        local = _local_catalog
+    if local and local[1] > time.monotonic():
+        catalog = local[2]
+    elif not config["SHARED_CACHE"]:
+        catalog = rebuild_catalog()
+    else:
+        shared = caches[config["SHARED_CACHE"]]
+        version = shared.get(CATALOG_VERSION_KEY)
+        if local and version == local[0]:
+            catalog = local[2]
+        else:
+            catalog = shared.get(CATALOG_KEY) if version else None
+        if catalog is None:
+            catalog = rebuild_catalog()
+        else:
+            _keep_local(catalog, catalog_version(catalog), config["CATALOG_CHECK_INTERVAL"])
+
+    partition = catalog.get(form_type or ALL_FORMS)
+    if partition is None:
+        partition = _partition([], None)
+    return partition
@@ -0,0 +1,57 @@
+import datetime
+import hashlib
+from typing import Optional, Tuple
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from forms.models import Form
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a quoted, strong ETag from the given parts.
+    """
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def form_etag(form_id: str, version: int, updated_at: Optional[datetime.datetime]) -> str:
+    """
+    ETag of a single form definition.
+    """
+    return make_etag("form", form_id, version, updated_at.isoformat() if updated_at else "")
+
+
+def form_head(form_id: str) -> Optional[Tuple[int, datetime.datetime]]:
+    """
+    Fetch (version, updated_at) of an active form with one index lookup on form_id.
+    """
+    return (Form.objects
+            .filter(form_id=form_id, is_active=True)
+            .values_list("version", "updated_at")
+            .first())
+
+
+def not_modified(request, etag: str, last_modified: Optional[datetime.datetime] = None):
+    """
+    Evaluate If-None-Match / If-Modified-Since against the given validators.
+
+    :return: A 304 response when the client copy is still fresh, otherwise None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag: str, last_modified: Optional[datetime.datetime] = None):
+    """
+    Attach ETag / Last-Modified and make clients revalidate before reusing a copy.
+    """
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
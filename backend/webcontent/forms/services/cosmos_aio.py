@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from forms.services.cosmos_client import get_cosmos_registry
+from forms.services.cosmos_metrics import AsyncInstrumentedContainer
+from forms.services.progression_codec import decode_progression, encode_progression
+
+
+if TYPE_CHECKING:
+    from azure.cosmos.aio import CosmosClient
+
+
+logger = logging.getLogger(__name__)
+
+# Async data path for ASGI deployments, on azure.cosmos.aio (which needs aiohttp).
+# The sync views and the publish_forms worker keep using services/cosmos_client.py,
+# so only the documents the async views touch have helpers here.
+
+
+class _LoopClients:
+
+    def __init__(self):
+        self.client: Optional["CosmosClient"] = None
+        self.containers: Dict[Tuple[str, str], Any] = {}
+
+
+class AsyncCosmosClientRegistry:
+    """
+    One azure.cosmos.aio CosmosClient per event loop, with container proxies
+    cached by (database, container).
+
+    An async client's connection pool belongs to the loop that opened it, so
+    clients are never shared between loops. Under an ASGI server that is one
+    client per worker, shared by every request; a sync server running async
+    views builds a loop, and with it a client, per request, so only enable the
+    async views under ASGI (ASYNC_COSMOS_VIEWS). Clients are never closed,
+    they live as long as the worker.
+
+    With COSMOS['BACKEND'] set to "memory" or "sqlite" the containers are async
+    faces of the sync registry's local stand-ins, sharing their documents.
+    Operations are recorded like the sync ones, see cosmos_metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = weakref.WeakKeyDictionary()
+
+    def _current(self) -> _LoopClients:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._loops.get(loop)
+            if clients is None:
+                clients = self._loops[loop] = _LoopClients()
+            return clients
+
+    def client(self) -> "CosmosClient":
+        from azure.cosmos.aio import CosmosClient
+
+        clients = self._current()
+        if clients.client is None:
+            logger.debug("Creating async Cosmos DB client for loop %s", id(asyncio.get_running_loop()))
+            clients.client = CosmosClient(url=settings.COSMOS['ENDPOINT'], credential=settings.COSMOS['KEY'])
+        return clients.client
+
+    def container(self, database_name: str, container_name: str) -> Any:
+        clients = self._current()
+        key = (database_name, container_name)
+        container = clients.containers.get(key)
+        if container is None:
+            sync_registry = get_cosmos_registry()
+            if sync_registry.is_local:
+                from forms.services.cosmos_local import AsyncLocalContainer
+
+                container = AsyncLocalContainer(sync_registry.container(database_name, container_name))
+            else:
+                container = self.client().get_database_client(database_name).get_container_client(container_name)
+            container = clients.containers[key] = AsyncInstrumentedContainer(container, container_name)
+        return container
+
+
+_registry = AsyncCosmosClientRegistry()
+
+
+def get_async_cosmos_registry() -> AsyncCosmosClientRegistry:
+    """
+    The process-wide async registry, see AsyncCosmosClientRegistry.
+    """
+    return _registry
+
+
+def get_async_container(database_name: str, container_name: str) -> Any:
+    """
+    Get an azure.cosmos.aio container proxy for the running event loop.
+
+    :param database_name: Name of the database.
+    :param container_name: Name of the container.
+    :return: The container proxy, cached per loop.
+    """
+    return _registry.container(database_name, container_name)
+
+
+def progression_container() -> Any:
+    return get_async_container(settings.COSMOS['DATABASE_USER_DATA'], settings.COSMOS['CONTAINER_FORM_PROGRESSION'])
+
+
+def _profiles_container() -> Any:
+    return get_async_container(settings.COSMOS['DATABASE_USER_DATA'], settings.COSMOS['CONTAINER_USER_PROFILES'])
+
+
+async def read_progression(doc_id: str, pk: str) -> Dict[str, Any]:
+    """
+    Point-read a form progression document, with its answers decoded (see progression_codec).
+
+    :raises CosmosResourceNotFoundError: If the user has no progression for the form version.
+    """
+    return decode_progression(await progression_container().read_item(item=doc_id, partition_key=pk))
+
+
+async def upsert_progression(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Upsert a form progression document.
+    """
+    return await progression_container().upsert_item(encode_progression(doc))
+
+
+async def replace_progression(doc: Dict[str, Any], etag: str) -> Dict[str, Any]:
+    """
+    Replace a form progression document if its ``_etag`` is still ``etag``.
+
+    :raises CosmosAccessConditionFailedError: If the document changed since.
+    :raises CosmosResourceNotFoundError: If the document does not exist.
+    """
+    from azure.core import MatchConditions
+
+    return await progression_container().replace_item(
+        doc["id"], encode_progression(doc), etag=etag, match_condition=MatchConditions.IfNotModified
+    )
+
+
+async def upsert_user_profile(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Upsert a user profile document, see users.services.cosmosdb.
+    """
+    return await _profiles_container().upsert_item(user_data)
@@ -1,50 +1,66 @@
+import hashlib
+import json
 import logging 
 
 from typing import Dict, Any
 from django.utils.text import slugify
-from forms.models import Form, FormField, FormSection
+from forms.models import Form
+from forms.services.form_tree import ensure_form_tree
 
 
 logger = logging.getLogger(__name__)
 
+# Keys of a FormDefinition that change on every publish without changing the form.
+# They are left out of definition_hash, and the stored document keeps the ones of
+# the publish that last changed its content (see publishing.publish_form).
+VOLATILE_KEYS = ("version", "updatedAt")
+
+
+def definition_id(form_id: str) -> str:
+    """
+    Document id of a form's FormDefinition. One document per form, partitioned by form_id,
+    so it can be point-read without knowing the current version.
+    """
+    return f"form_def_{form_id}"
+
 
 def build_form_definition(form: Form) -> Dict[str, Any]:
     """
     Creates a denormalized FormDefinition doc from Form → Sections → Fields.
     Stored in ONE Cosmos container with partition key '/pk'.
+    Pass a form loaded through forms.services.form_tree to avoid reloading the tree.
     """
     version_str = str(form.version)
-    doc_id = f"form_def_{form.pk}_v{version_str}"
+    doc_id = definition_id(form.form_id)
     title_slug = slugify(form.title) or f"form-{form.pk}"
     form_id = form.form_id
     is_active = form.is_active
 
-    form_with_related = (
-        Form.objects.filter(pk=form.pk)
-        .prefetch_related("sections__fields")
-        .select_related("created_by")
-        .first()
-    )
+    form = ensure_form_tree(form)
 
     sections: list[Dict[str, Any]] = []
-    for section in form_with_related.sections.all().order_by("order"):
+    for section in form.sections.all():
         fields = []
-        for field in section.fields.all().order_by("order"):
+        for field in section.fields.all():
             fields.append({
                 "id": slugify(field.label) or f"field-{field.pk}",
                 "label": field.label,
+                "description": field.description or "",
+                "type": field.field_type,
                 "fieldType": _map_field_type(field.field_type),
                 "isRequired": field.is_required,
                 "placeholder": field.placeholder or "",
                 "options": field.options or [],
                 "order": field.order,
             })
-            sections.append({
-                "id": slugify(section.title) or f"section-{section.pk}",
-                "title": section.title,
-                "description": section.description or "",
-                "fields": fields,
-            })
+        sections.append({
+            "id": slugify(section.title) or f"section-{section.pk}",
+            "title": section.title,
+            "description": section.description or "",
+            "isRepeatable": section.is_repeatable,
+            "repeatableCount": section.repeatable_count,
+            "fields": fields,
+        })
 
 
     # Create the final document structure
@@ -53,13 +69,16 @@ def build_form_definition(form: Form) -> Dict[str, Any]:
         "type": "FormDefinition",
         "slug": title_slug,
         "id": doc_id,
+        "pk": form_id,
         "isActive": is_active, 
         "formId": form_id,
         # Metadata
         "title": form.title,
         "version": version_str,
         "description": form.description or "",
-        "createdBy": form.created_by.username,
+        "shortDescription": form.short_description or "",
+        "icon": form.icon,
+        "createdBy": form.created_by.username if form.created_by else None,
         "createdAt": form.created_at.isoformat(),
         "updatedAt": form.updated_at.isoformat(),
         "sections": sections,
@@ -68,6 +87,51 @@ def build_form_definition(form: Form) -> Dict[str, Any]:
     return doc 
 
 
+def definition_hash(doc: Dict[str, Any]) -> str:
+    """
+    Stable SHA-256 over the semantic content of a FormDefinition document,
+    i.e. everything but VOLATILE_KEYS. Two documents with the same hash render
+    the same form.
+    """
+    content = {key: value for key, value in doc.items() if key not in VOLATILE_KEYS}
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def definition_to_detail(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a FormDefinition document back into the FormDetailView payload.
+    """
+    return {
+        "formId": doc["formId"],
+        "title": doc["title"],
+        "icon": doc.get("icon", "settings"),
+        "description": doc.get("description", ""),
+        "sections": [
+            {
+                "title": section["title"],
+                "description": section.get("description", ""),
+                "isRepeatable": section.get("isRepeatable", False),
+                "repeatableCount": section.get("repeatableCount", 1),
+                "fields": [
+                    {
+                        "label": field["label"],
+                        "description": field.get("description", ""),
+                        "type": field.get("type", field.get("fieldType")),
+                        "required": field.get("isRequired", False),
+                        "placeholder": field.get("placeholder", ""),
+                        "options": field.get("options"),
+                    }
+                    for field in section.get("fields", [])
+                ],
+            }
+            for section in doc.get("sections", [])
+        ],
+        "shortDescription": doc.get("shortDescription", ""),
+        "version": doc["version"],
+    }
+
+
 def _map_field_type(ft: str) -> str:
     return {
         "text": "text",
@@ -1,20 +1,152 @@
-from typing import Dict, Any
-from azure.cosmos import CosmosClient
+import logging
+import os
+import re
+import threading
+from typing import (TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional,
+                    Sequence, Tuple)
+
 from django.conf import settings
 from dotenv import load_dotenv
 
+from forms.services.cosmos_metrics import InstrumentedContainer
+
+
+if TYPE_CHECKING:
+    from azure.cosmos import CosmosClient
+
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+PUBLISHED_DEFINITIONS_QUERY = "SELECT * FROM c WHERE c.type = 'FormDefinition' AND c.isActive = true"
+# Run within one user's partition, see forms.views.make_progression_id.
+USER_PROGRESSIONS_QUERY = "SELECT * FROM c WHERE c.userId = @userId"
+
+BACKEND_AZURE = "azure"
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+
+
+def _local_container(database_name: str, container_name: str) -> Any:
+    """
+    Build the local stand-in of a container, see cosmos_local.
+    """
+    from forms.services.cosmos_local import InMemoryContainer, SQLiteContainer
+
+    config = settings.COSMOS
+    backend = config.get('BACKEND')
+    options = {
+        "id": f"{database_name}/{container_name}",
+        "partition_key_path": config.get('PARTITION_KEYS', {}).get(container_name, "/id"),
+        "latency_ms": config.get('LOCAL_LATENCY_MS', 0),
+    }
+    if backend == BACKEND_MEMORY:
+        return InMemoryContainer(**options)
+    if backend == BACKEND_SQLITE:
+        return SQLiteContainer(config['LOCAL_PATH'], **options)
+    raise ValueError(f"Unknown COSMOS['BACKEND'] {backend!r}, expected azure, memory or sqlite")
+
 
-def _client() -> CosmosClient:
+class CosmosClientRegistry:
     """
-    Create a Cosmos DB client using the configuration from settings.
+    One CosmosClient per process, with container proxies cached by
+    (database, container).
+
+    The azure.cosmos SDK is imported on first use, not when Django starts, so
+    worker boots, management commands and tests that never talk to Cosmos
+    don't pay for it. Import ``azure.cosmos.exceptions`` inside the functions
+    that catch them for the same reason.
+
+    With COSMOS['BACKEND'] set to "memory" or "sqlite" every container is a
+    local stand-in instead, so the app runs and can be benchmarked without an
+    account. Every proxy records its request charge and latency, see
+    cosmos_metrics.
+
+    A client owns a connection pool and the account metadata it fetched, so it
+    is built on first use and then shared by every request. Forked children
+    (e.g. gunicorn workers of a preloading master) never reuse the parent's
+    client, its sockets can't be shared between processes.
     """
-    return CosmosClient(
-        url=settings.COSMOS['ENDPOINT'],
-        credential=settings.COSMOS['KEY']
-    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._client: Optional["CosmosClient"] = None
+        self._containers: Dict[Tuple[str, str], Any] = {}
+
+    def reset(self) -> None:
+        """
+        Drop the client and every cached proxy; the next use builds new ones.
+        """
+        with self._lock:
+            self._pid = None
+            self._client = None
+            self._containers = {}
+
+    def _ensure_process(self) -> None:
+        # Caller holds the lock.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._client = None
+            self._containers = {}
+
+    def client(self) -> "CosmosClient":
+        from azure.cosmos import CosmosClient
+
+        with self._lock:
+            self._ensure_process()
+            if self._client is None:
+                logger.debug("Creating Cosmos DB client for process %s", self._pid)
+                self._client = CosmosClient(
+                    url=settings.COSMOS['ENDPOINT'],
+                    credential=settings.COSMOS['KEY']
+                )
+            return self._client
+
+    def container(self, database_name: str, container_name: str) -> Any:
+        key = (database_name, container_name)
+        with self._lock:
+            self._ensure_process()
+            container = self._containers.get(key)
+        if container is not None:
+            return container
+
+        if self.is_local:
+            container = _local_container(database_name, container_name)
+        else:
+            client = self.client()
+            container = client.get_database_client(database_name).get_container_client(container_name)
+        container = InstrumentedContainer(container, container_name)
+        with self._lock:
+            return self._containers.setdefault(key, container)
+
+    @property
+    def is_local(self) -> bool:
+        """
+        Whether containers are local stand-ins (COSMOS['BACKEND'] "memory" or "sqlite").
+        """
+        return settings.COSMOS.get('BACKEND', BACKEND_AZURE) != BACKEND_AZURE
+
+
+_registry = CosmosClientRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_registry.reset)
+
+
+def get_cosmos_registry() -> CosmosClientRegistry:
+    """
+    Return the process-wide Cosmos client registry.
+    """
+    return _registry
+
+
+def _client() -> "CosmosClient":
+    """
+    The shared Cosmos DB client of this process.
+    """
+    return _registry.client()
 
 def _container(database_name: str, container_name: str) -> Any:
     """
@@ -22,11 +154,15 @@ def _container(database_name: str, container_name: str) -> Any:
     
     :param database_name: Name of the database.
     :param container_name: Name of the container.
-    :return: The specified container.
+    :return: The specified container, a cached proxy of the shared client.
     """
-    client = _client()
-    database = client.get_database_client(database_name)
-    return database.get_container_client(container_name)
+    return _registry.container(database_name, container_name)
+
+def get_container(database_name: str, container_name: str) -> Any:
+    """
+    Public accessor for containers outside this module, see _container.
+    """
+    return _container(database_name, container_name)
 
 def upsert_item(item: Dict[str, Any]) -> None:
     """
@@ -38,11 +174,6 @@ def upsert_item(item: Dict[str, Any]) -> None:
         database_name=settings.COSMOS['DATABASE_FORM_DATA'], 
         container_name=settings.COSMOS['CONTAINER_FORM_DEFINITIONS']
         )
-    
-    print(container)
-    print(settings.COSMOS['DATABASE_FORM_DATA'])
-    print(settings.COSMOS['CONTAINER_FORM_DEFINITIONS'])
-    
     container.upsert_item(item)
 
 def delete_item(doc_id: str, pk: str) -> None:
@@ -52,7 +183,7 @@ def delete_item(doc_id: str, pk: str) -> None:
     :param doc_id: The document ID of the item to delete.
     :param pk: The partition key of the item to delete.
     """
-    container = _container(settings.COSMOS['DATABASE'], settings.COSMOS['CONTAINER'])
+    container = _container(settings.COSMOS['DATABASE_FORM_DATA'], settings.COSMOS['CONTAINER_FORM_DEFINITIONS'])
     container.delete_item(doc_id, partition_key=pk)
 
 def upsert_definition(definition: Dict[str, Any]) -> None:
@@ -64,18 +195,109 @@ def upsert_definition(definition: Dict[str, Any]) -> None:
     container = _container(settings.COSMOS['DATABASE_FORM_DATA'], settings.COSMOS['CONTAINER_FORM_DEFINITIONS'])
     container.upsert_item(definition)
 
-def get_published_definitions() -> list[Dict[str, Any]]:
+def read_definition(doc_id: str, pk: str) -> Dict[str, Any]:
     """
-    Fetch all published definitions from the Cosmos DB.
-    
-    :return: A list of dictionaries containing the published definitions.
+    Point-read a form definition from the Cosmos DB.
+
+    :param doc_id: The document ID of the definition.
+    :param pk: The partition key of the definition.
+    :raises CosmosResourceNotFoundError: If the definition does not exist.
     """
-    container = _container(settings.COSMOS['DATABASE'], settings.COSMOS['CONTAINER'])
-    query = "SELECT * FROM c WHERE c.published = true"
-    
-    items = container.query_items(
-        query=query,
-        enable_cross_partition_query=True
-    )
-    
-    return list(items)  # Convert to list to return all items at once
\ No newline at end of file
+    container = _container(settings.COSMOS['DATABASE_FORM_DATA'], settings.COSMOS['CONTAINER_FORM_DEFINITIONS'])
+    return container.read_item(item=doc_id, partition_key=pk)
+
+class QueryPage(NamedTuple):
+    items: List[Dict[str, Any]]
+    # Pass back to query_pages/query_page to resume after this page, None after the last one.
+    continuation_token: Optional[str]
+
+
+_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_SELECT_ALL = re.compile(r"^\s*SELECT\s+\*\s+FROM\s+c\b", re.IGNORECASE)
+
+
+def project(query: str, fields: Optional[Sequence[str]]) -> str:
+    """
+    Narrow a ``SELECT * FROM c ...`` query to the given top-level fields, so
+    Cosmos only returns (and charges for) what the caller reads.
+
+    :raises ValueError: For a query that doesn't select ``*`` from ``c``, or an invalid field name.
+    """
+    if not fields:
+        return query
+    if not _SELECT_ALL.match(query):
+        raise ValueError("Only 'SELECT * FROM c' queries can be projected")
+    for name in fields:
+        if not _FIELD.match(name):
+            raise ValueError(f"Invalid field name {name!r}")
+    return _SELECT_ALL.sub("SELECT " + ", ".join(f"c.{name}" for name in fields) + " FROM c", query, count=1)
+
+
+def query_pages(container: Any, query: str, parameters: Optional[List[Dict[str, Any]]] = None, *,
+                partition_key: Any = None, fields: Optional[Sequence[str]] = None,
+                max_item_count: int = 100, continuation_token: Optional[str] = None) -> Iterator[QueryPage]:
+    """
+    Run a query page by page; only one page is held in memory at a time.
+
+    :param container: A container proxy, see get_container.
+    :param partition_key: Scope the query to one partition; cross-partition when None.
+    :param fields: Only return these top-level fields, see project.
+    :param max_item_count: Maximum number of items per page.
+    :param continuation_token: Resume after the page that handed out this token.
+    :return: An iterator of QueryPage.
+    """
+    options: Dict[str, Any] = {"max_item_count": max_item_count}
+    if partition_key is not None:
+        options["partition_key"] = partition_key
+    else:
+        options["enable_cross_partition_query"] = True
+
+    paged = container.query_items(query=project(query, fields), parameters=parameters, **options)
+    pages = paged.by_page(continuation_token)
+    for page in pages:
+        items = list(page)
+        yield QueryPage(items, pages.continuation_token)
+
+
+def query_page(container: Any, query: str, parameters: Optional[List[Dict[str, Any]]] = None,
+               **options: Any) -> QueryPage:
+    """
+    Fetch the single page of a query that follows ``continuation_token``, for
+    endpoints that hand the token to their client. Takes the options of query_pages.
+    """
+    return next(query_pages(container, query, parameters, **options), QueryPage([], None))
+
+
+def iter_query(container: Any, query: str, parameters: Optional[List[Dict[str, Any]]] = None,
+               **options: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the items of a query in constant memory. Takes the options of query_pages.
+    """
+    for page in query_pages(container, query, parameters, **options):
+        yield from page.items
+
+
+def get_published_definitions(fields: Optional[Sequence[str]] = None,
+                              max_item_count: int = 100) -> Iterator[Dict[str, Any]]:
+    """
+    Stream all active form definitions from the Cosmos DB, a page at a time.
+
+    :param fields: Only return these top-level fields of each definition.
+    :return: An iterator over the definitions.
+    """
+    container = _container(settings.COSMOS['DATABASE_FORM_DATA'], settings.COSMOS['CONTAINER_FORM_DEFINITIONS'])
+    return iter_query(container, PUBLISHED_DEFINITIONS_QUERY, fields=fields, max_item_count=max_item_count)
+
+
+def get_user_progressions(pk: str, fields: Optional[Sequence[str]] = None,
+                          max_item_count: int = 100) -> Iterator[Dict[str, Any]]:
+    """
+    Stream every form progression of a user with a single-partition query.
+
+    :param pk: The user's partition key value, ``user:{uuid}``.
+    :param fields: Only return these top-level fields of each progression.
+    :return: An iterator over the progression documents.
+    """
+    container = _container(settings.COSMOS['DATABASE_USER_DATA'], settings.COSMOS['CONTAINER_FORM_PROGRESSION'])
+    return iter_query(container, USER_PROGRESSIONS_QUERY, [{"name": "@userId", "value": pk}],
+                      partition_key=pk, fields=fields, max_item_count=max_item_count)
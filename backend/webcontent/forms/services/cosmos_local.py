@@ -0,0 +1,469 @@
+import asyncio
+import copy
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from azure.cosmos import exceptions as CosmosExceptions
+from azure.cosmos.partition_key import NonePartitionKeyValue
+
+from forms.services.cosmos_sql import UNDEFINED, Query, resolve
+
+
+# Cosmos rejects patch requests with more operations than this.
+MAX_PATCH_OPERATIONS = 10
+
+
+class MemoryStore:
+    """
+    Documents of one container kept in a dict, private to the process.
+    """
+
+    def __init__(self):
+        self._items: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def get(self, pk: str, item_id: str) -> Optional[Dict[str, Any]]:
+        return self._items.get((pk, item_id))
+
+    def put(self, pk: str, item_id: str, body: Dict[str, Any]) -> None:
+        self._items[(pk, item_id)] = body
+
+    def delete(self, pk: str, item_id: str) -> bool:
+        return self._items.pop((pk, item_id), None) is not None
+
+    def scan(self, pk: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        for (item_pk, _), body in list(self._items.items()):
+            if pk is None or item_pk == pk:
+                yield body
+
+
+class SQLiteStore:
+    """
+    Documents of one container in a SQLite file, shared by every process that
+    opens it, e.g. the runserver workers and a publish_forms worker.
+    """
+
+    def __init__(self, path: str, container: str):
+        self.container = container
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " container TEXT NOT NULL, pk TEXT NOT NULL, id TEXT NOT NULL, body TEXT NOT NULL,"
+            " PRIMARY KEY (container, pk, id))"
+        )
+
+    def get(self, pk: str, item_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection.execute(
+            "SELECT body FROM items WHERE container = ? AND pk = ? AND id = ?", (self.container, pk, item_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, pk: str, item_id: str, body: Dict[str, Any]) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO items (container, pk, id, body) VALUES (?, ?, ?, ?)",
+            (self.container, pk, item_id, json.dumps(body)),
+        )
+
+    def delete(self, pk: str, item_id: str) -> bool:
+        cursor = self._connection.execute(
+            "DELETE FROM items WHERE container = ? AND pk = ? AND id = ?", (self.container, pk, item_id)
+        )
+        return cursor.rowcount > 0
+
+    def scan(self, pk: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        if pk is None:
+            rows = self._connection.execute("SELECT body FROM items WHERE container = ?", (self.container,))
+        else:
+            rows = self._connection.execute(
+                "SELECT body FROM items WHERE container = ? AND pk = ?", (self.container, pk)
+            )
+        for (body,) in rows.fetchall():
+            yield json.loads(body)
+
+
+class LocalItemPaged:
+    """
+    Query results shaped like the SDK's ItemPaged: iterable, or read page by
+    page with ``by_page``, resuming from a continuation token.
+    """
+
+    def __init__(self, results: List[Any], max_item_count: Optional[int] = None):
+        self._results = results
+        self._page_size = max_item_count if max_item_count and max_item_count > 0 else 100
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._results)
+
+    def by_page(self, continuation_token: Optional[str] = None) -> "_LocalPageIterator":
+        if continuation_token is not None and not continuation_token.isdigit():
+            raise CosmosExceptions.CosmosHttpResponseError(status_code=400, message="Invalid continuation token.")
+        return _LocalPageIterator(self._results, self._page_size, int(continuation_token or 0))
+
+
+class _LocalPageIterator:
+
+    def __init__(self, results: List[Any], page_size: int, start: int):
+        self._results = results
+        self._page_size = page_size
+        self._next = start
+        self.continuation_token: Optional[str] = str(start) if start else None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Iterator[Any]:
+        if self._next >= len(self._results):
+            raise StopIteration
+        page = self._results[self._next:self._next + self._page_size]
+        self._next += len(page)
+        self.continuation_token = str(self._next) if self._next < len(self._results) else None
+        return iter(page)
+
+
+class LocalContainer:
+    """
+    A local stand-in for a Cosmos ContainerProxy, for tests, local runs and
+    benchmarks without a Cosmos account.
+
+    Items are stored per (partition key value, id) and returned as copies, with
+    the ``_etag`` and ``_ts`` system properties Cosmos would add. Missing and
+    conflicting items raise the SDK's exceptions, as do writes whose ``etag``
+    and ``match_condition`` don't hold. ``query_items`` understands
+    the SQL subset of cosmos_sql.
+
+    :param latency_ms: Added to every operation, to approximate a remote account.
+    """
+
+    def __init__(self, id: str = "local", partition_key_path: str = "/pk", store: Any = None,
+                 latency_ms: float = 0):
+        self.id = id
+        self.partition_key_path = partition_key_path
+        self.latency_ms = latency_ms
+        self._store = store if store is not None else MemoryStore()
+        self._lock = threading.Lock()
+
+    # -- helpers ------------------------------------------------------------
+
+    def _wait(self) -> None:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _partition_value(self, item: Dict[str, Any]) -> Any:
+        value = resolve(item, self.partition_key_path.strip("/").split("/"))
+        return None if value is UNDEFINED else value
+
+    @staticmethod
+    def _key(partition_key: Any) -> str:
+        # Documents without the partition key property are addressed with NonePartitionKeyValue.
+        return json.dumps(None if partition_key is NonePartitionKeyValue else partition_key)
+
+    @staticmethod
+    def _not_found(item_id: str):
+        return CosmosExceptions.CosmosResourceNotFoundError(
+            status_code=404, message=f"Entity with the specified id does not exist in the system. id={item_id}"
+        )
+
+    @staticmethod
+    def _bad_request(message: str):
+        return CosmosExceptions.CosmosHttpResponseError(status_code=400, message=message)
+
+    @staticmethod
+    def _check_etag(stored: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> None:
+        # etag/match_condition as azure.core's MatchConditions.IfNotModified / IfModified.
+        etag, condition = kwargs.get("etag"), kwargs.get("match_condition")
+        if etag is None or condition is None or stored is None:
+            return
+        unchanged = stored.get("_etag") == etag
+        if unchanged != (getattr(condition, "name", condition) == "IfNotModified"):
+            raise CosmosExceptions.CosmosAccessConditionFailedError(
+                status_code=412,
+                message="Operation cannot be performed because one of the specified precondition criteria was not met.",
+            )
+
+    def _stamp(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        stored = copy.deepcopy(item)
+        stored["_etag"] = f'"{uuid.uuid4()}"'
+        stored["_ts"] = int(time.time())
+        return stored
+
+    @staticmethod
+    def _respond(kwargs: Dict[str, Any], result: Any, write: bool = False, status_code: int = 200) -> Any:
+        # Hand an approximate request charge to response_hook: about 1 RU per
+        # KB read and 5 RU per KB written, as for a small, default-indexed item.
+        # raw_response_hook gets the HTTP status Cosmos would answer.
+        hook = kwargs.get("response_hook")
+        if hook is not None:
+            kb = len(json.dumps(result)) / 1024 if result is not None else 0
+            charge = max(5.0, 5 * kb) if write else max(1.0, kb)
+            hook({"x-ms-request-charge": f"{charge:.2f}"}, result)
+        raw_hook = kwargs.get("raw_response_hook")
+        if raw_hook is not None:
+            raw_hook(SimpleNamespace(http_response=SimpleNamespace(status_code=status_code)))
+        return result
+
+    def _write(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(body.get("id"), str) or not body["id"]:
+            raise self._bad_request("The input content is invalid because the required property, id, is missing.")
+        stored = self._stamp(body)
+        self._store.put(self._key(self._partition_value(body)), body["id"], stored)
+        return copy.deepcopy(stored)
+
+    # -- ContainerProxy API -------------------------------------------------
+
+    def read_item(self, item: str, partition_key: Any, **kwargs) -> Dict[str, Any]:
+        self._wait()
+        with self._lock:
+            stored = self._store.get(self._key(partition_key), item)
+            if stored is None:
+                raise self._not_found(item)
+            return self._respond(kwargs, copy.deepcopy(stored))
+
+    def upsert_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self._wait()
+        with self._lock:
+            stored = self._store.get(self._key(self._partition_value(body)), body.get("id"))
+            self._check_etag(stored, kwargs)
+            return self._respond(kwargs, self._write(body), write=True, status_code=200 if stored else 201)
+
+    def create_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self._wait()
+        with self._lock:
+            if self._store.get(self._key(self._partition_value(body)), body.get("id")) is not None:
+                raise CosmosExceptions.CosmosResourceExistsError(
+                    status_code=409, message=f"Entity with the specified id already exists. id={body['id']}"
+                )
+            return self._respond(kwargs, self._write(body), write=True, status_code=201)
+
+    def replace_item(self, item: Any, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self._wait()
+        item_id = item["id"] if isinstance(item, dict) else item
+        with self._lock:
+            stored = self._store.get(self._key(self._partition_value(body)), item_id)
+            if stored is None:
+                raise self._not_found(item_id)
+            self._check_etag(stored, kwargs)
+            return self._respond(kwargs, self._write(body), write=True)
+
+    def patch_item(self, item: str, partition_key: Any, patch_operations: List[Dict[str, Any]],
+                   *, filter_predicate: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self._wait()
+        if not patch_operations or len(patch_operations) > MAX_PATCH_OPERATIONS:
+            raise self._bad_request(f"A patch request takes 1 to {MAX_PATCH_OPERATIONS} operations.")
+
+        with self._lock:
+            stored = self._store.get(self._key(partition_key), item)
+            if stored is None:
+                raise self._not_found(item)
+            if filter_predicate and not Query(f"SELECT * {filter_predicate}").matches(stored):
+                raise CosmosExceptions.CosmosAccessConditionFailedError(
+                    status_code=412, message="Precondition of the patch filter predicate failed."
+                )
+
+            body = copy.deepcopy(stored)
+            for operation in patch_operations:
+                _apply_patch(body, operation)
+            if body.get("id") != item or self._partition_value(body) != partition_key:
+                raise self._bad_request("Patch can't change the id or the partition key.")
+            return self._respond(kwargs, self._write(body), write=True)
+
+    def delete_item(self, item: str, partition_key: Any, **kwargs) -> None:
+        self._wait()
+        with self._lock:
+            if not self._store.delete(self._key(partition_key), item):
+                raise self._not_found(item)
+        self._respond(kwargs, None, write=True, status_code=204)
+
+    def query_items(self, query: str, parameters: Optional[List[Dict[str, Any]]] = None,
+                    partition_key: Any = None, max_item_count: Optional[int] = None, **kwargs) -> LocalItemPaged:
+        self._wait()
+        parsed = Query(query, parameters)
+        with self._lock:
+            items = self._store.scan(None if partition_key is None else self._key(partition_key))
+            results = parsed.run(copy.deepcopy(list(items)))
+        return LocalItemPaged(results, max_item_count)
+
+
+class InMemoryContainer(LocalContainer):
+    """
+    A LocalContainer whose documents live in the process.
+    """
+
+
+class SQLiteContainer(LocalContainer):
+    """
+    A LocalContainer whose documents live in a SQLite file shared between processes.
+    """
+
+    def __init__(self, path: str, id: str = "local", partition_key_path: str = "/pk", latency_ms: float = 0):
+        super().__init__(id, partition_key_path, SQLiteStore(path, id), latency_ms)
+
+
+# -- patch operations -------------------------------------------------------
+
+def _split_path(path: str) -> List[str]:
+    if not path.startswith("/"):
+        raise CosmosExceptions.CosmosHttpResponseError(status_code=400, message=f"Invalid patch path {path!r}")
+    return [part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")]
+
+
+def _missing(path: str):
+    return CosmosExceptions.CosmosHttpResponseError(status_code=400, message=f"Patch path {path!r} does not exist")
+
+
+def _parent(body: Dict[str, Any], path: str) -> Tuple[Any, str]:
+    # Like Cosmos, no operation creates missing parents of its target.
+    parts = _split_path(path)
+    parent: Any = body
+    for part in parts[:-1]:
+        if isinstance(parent, list) and part.isdigit() and int(part) < len(parent):
+            parent = parent[int(part)]
+        elif isinstance(parent, dict) and part in parent:
+            parent = parent[part]
+        else:
+            raise _missing(path)
+    if not isinstance(parent, (dict, list)):
+        raise _missing(path)
+    return parent, parts[-1]
+
+
+def _apply_patch(body: Dict[str, Any], operation: Dict[str, Any]) -> None:
+    """
+    Apply one patch operation the way Cosmos does: add, set, replace, remove,
+    incr or move, addressed with JSON Pointer paths.
+    """
+    op, path = operation.get("op"), operation.get("path", "")
+    value = copy.deepcopy(operation.get("value"))
+
+    if op == "move":
+        source, key = _parent(body, operation.get("from", ""))
+        if not isinstance(source, dict) or key not in source:
+            raise _missing(operation.get("from", ""))
+        value = source.pop(key)
+        op = "set"
+
+    parent, key = _parent(body, path)
+
+    if isinstance(parent, list):
+        if op == "add" and key == "-":
+            parent.append(value)
+            return
+        if not key.isdigit() or int(key) > len(parent) or (op != "add" and int(key) >= len(parent)):
+            raise _missing(path)
+        index = int(key)
+        if op == "add":
+            parent.insert(index, value)
+        elif op in ("set", "replace"):
+            parent[index] = value
+        elif op == "remove":
+            del parent[index]
+        elif op == "incr":
+            parent[index] += value
+        else:
+            raise CosmosExceptions.CosmosHttpResponseError(status_code=400, message=f"Unknown patch op {op!r}")
+        return
+
+    if op in ("add", "set"):
+        parent[key] = value
+    elif op == "replace":
+        if key not in parent:
+            raise _missing(path)
+        parent[key] = value
+    elif op == "remove":
+        if key not in parent:
+            raise _missing(path)
+        del parent[key]
+    elif op == "incr":
+        current = parent.get(key, 0)
+        if isinstance(current, bool) or not isinstance(current, (int, float)):
+            raise CosmosExceptions.CosmosHttpResponseError(
+                status_code=400, message=f"Patch incr on {path!r} needs a number"
+            )
+        parent[key] = current + value
+    else:
+        raise CosmosExceptions.CosmosHttpResponseError(status_code=400, message=f"Unknown patch op {op!r}")
+
+
+# -- async stand-ins ---------------------------------------------------------
+
+class AsyncLocalItemPaged:
+    """
+    Query results shaped like the aio SDK's AsyncItemPaged.
+    """
+
+    def __init__(self, results: List[Any], max_item_count: Optional[int] = None, latency_ms: float = 0):
+        self._paged = LocalItemPaged(results, max_item_count)
+        self._latency_ms = latency_ms
+
+    async def _wait(self) -> None:
+        if self._latency_ms:
+            await asyncio.sleep(self._latency_ms / 1000)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        await self._wait()
+        for item in self._paged:
+            yield item
+
+    async def by_page(self, continuation_token: Optional[str] = None) -> AsyncIterator[AsyncIterator[Any]]:
+        async def page_items(page):
+            for item in page:
+                yield item
+
+        for page in self._paged.by_page(continuation_token):
+            await self._wait()
+            yield page_items(page)
+
+
+class AsyncLocalContainer:
+    """
+    The azure.cosmos.aio face of a LocalContainer, sharing its documents.
+
+    The simulated latency is awaited instead of slept, so many calls can be in
+    flight on one event loop, like with the real async client.
+    """
+
+    def __init__(self, container: LocalContainer):
+        self.id = container.id
+        self.partition_key_path = container.partition_key_path
+        self.latency_ms = container.latency_ms
+        self._sync = LocalContainer(container.id, container.partition_key_path, store=container._store)
+        self._sync._lock = container._lock
+
+    async def _wait(self) -> None:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    async def read_item(self, item: str, partition_key: Any, **kwargs) -> Dict[str, Any]:
+        await self._wait()
+        return self._sync.read_item(item, partition_key, **kwargs)
+
+    async def upsert_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._wait()
+        return self._sync.upsert_item(body, **kwargs)
+
+    async def create_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._wait()
+        return self._sync.create_item(body, **kwargs)
+
+    async def replace_item(self, item: Any, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._wait()
+        return self._sync.replace_item(item, body, **kwargs)
+
+    async def patch_item(self, item: str, partition_key: Any, patch_operations: List[Dict[str, Any]],
+                         **kwargs) -> Dict[str, Any]:
+        await self._wait()
+        return self._sync.patch_item(item, partition_key, patch_operations, **kwargs)
+
+    async def delete_item(self, item: str, partition_key: Any, **kwargs) -> None:
+        await self._wait()
+        self._sync.delete_item(item, partition_key, **kwargs)
+
+    def query_items(self, query: str, parameters: Optional[List[Dict[str, Any]]] = None,
+                    partition_key: Any = None, max_item_count: Optional[int] = None, **kwargs) -> AsyncLocalItemPaged:
+        # Not a coroutine, like the SDK; the latency is awaited per page.
+        paged = self._sync.query_items(query, parameters, partition_key, max_item_count, **kwargs)
+        return AsyncLocalItemPaged(list(paged), max_item_count, self.latency_ms)
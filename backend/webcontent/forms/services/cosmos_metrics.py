@@ -0,0 +1,359 @@
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Request charge and latency of every Cosmos operation, wrapped around the
+# container proxies handed out by services/cosmos_client.py and cosmos_aio.py.
+# Aggregated per view (or per management command), served by CosmosMetricsView
+# and summed into one log line per request by forms.middleware.
+
+REQUEST_CHARGE = "x-ms-request-charge"
+RETRY_COUNT = "x-ms-throttle-retry-count"
+BACKGROUND = "(background)"
+
+# Point operations; queries are timed while their pages are read.
+OPERATIONS = ("read_item", "upsert_item", "create_item", "replace_item", "patch_item", "delete_item")
+
+
+@dataclass(frozen=True)
+class CosmosOperation:
+    operation: str
+    container: str
+    duration_ms: float
+    request_charge: float
+    status_code: int
+    retries: int
+
+
+class CosmosUsage:
+    """
+    The operations recorded inside one scope, e.g. one request.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.operations: List[CosmosOperation] = []
+
+    @property
+    def request_charge(self) -> float:
+        return sum(op.request_charge for op in self.operations)
+
+    @property
+    def duration_ms(self) -> float:
+        return sum(op.duration_ms for op in self.operations)
+
+    def summary(self) -> str:
+        return (f"cosmos view={self.name} ops={len(self.operations)} ru={self.request_charge:.2f} "
+                f"ms={self.duration_ms:.1f} retries={sum(op.retries for op in self.operations)} "
+                f"errors={sum(1 for op in self.operations if op.status_code >= 400)}")
+
+
+_scope: "contextvars.ContextVar[Optional[CosmosUsage]]" = contextvars.ContextVar("cosmos_usage", default=None)
+
+
+class CosmosMetrics:
+    """
+    Per-process totals by (scope, container, operation): count, errors,
+    latency, request charge, retries and status codes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    def add(self, name: str, operations: List[CosmosOperation]) -> None:
+        with self._lock:
+            for op in operations:
+                totals = self._totals.setdefault((name, op.container, op.operation), {
+                    "count": 0, "errors": 0, "totalMs": 0.0, "maxMs": 0.0,
+                    "requestCharge": 0.0, "retries": 0, "statusCodes": Counter(),
+                })
+                totals["count"] += 1
+                totals["errors"] += op.status_code >= 400
+                totals["totalMs"] += op.duration_ms
+                totals["maxMs"] = max(totals["maxMs"], op.duration_ms)
+                totals["requestCharge"] += op.request_charge
+                totals["retries"] += op.retries
+                totals["statusCodes"][op.status_code] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the totals grouped per view, most expensive view first.
+        """
+        views: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (name, container, operation), totals in self._totals.items():
+                view = views.setdefault(name, {"requestCharge": 0.0, "count": 0, "operations": []})
+                view["requestCharge"] += totals["requestCharge"]
+                view["count"] += totals["count"]
+                view["operations"].append({
+                    "container": container,
+                    "operation": operation,
+                    "count": totals["count"],
+                    "errors": totals["errors"],
+                    "avgMs": round(totals["totalMs"] / totals["count"], 2),
+                    "maxMs": round(totals["maxMs"], 2),
+                    "requestCharge": round(totals["requestCharge"], 2),
+                    "avgRequestCharge": round(totals["requestCharge"] / totals["count"], 2),
+                    "retries": totals["retries"],
+                    "statusCodes": {str(code): n for code, n in totals["statusCodes"].items()},
+                })
+        for view in views.values():
+            view["requestCharge"] = round(view["requestCharge"], 2)
+            view["operations"].sort(key=lambda op: -op["requestCharge"])
+        return dict(sorted(views.items(), key=lambda item: -item[1]["requestCharge"]))
+
+
+_metrics = CosmosMetrics()
+
+
+def get_cosmos_metrics() -> CosmosMetrics:
+    """
+    The process-wide Cosmos metrics, see CosmosMetrics.
+    """
+    return _metrics
+
+
+@contextlib.contextmanager
+def cosmos_scope(name: str) -> Iterator[CosmosUsage]:
+    """
+    Attribute the Cosmos operations made inside the block to ``name`` (which
+    may still be changed on the yielded usage); they are added to the metrics
+    when the block exits. Operations outside any scope are counted under
+    "(background)".
+    """
+    usage = CosmosUsage(name)
+    token = _scope.set(usage)
+    try:
+        yield usage
+    finally:
+        _scope.reset(token)
+        _metrics.add(usage.name, usage.operations)
+
+
+def record(operation: CosmosOperation) -> None:
+    usage = _scope.get()
+    if usage is not None:
+        usage.operations.append(operation)
+    else:
+        _metrics.add(BACKGROUND, [operation])
+
+
+class _Call:
+    """
+    Times one operation and collects its response headers through the SDK's
+    ``response_hook`` and its HTTP status through azure.core's
+    ``raw_response_hook``, chaining the caller's own hooks.
+    """
+
+    def __init__(self, operation: str, container: str, kwargs: Dict[str, Any]):
+        self.operation = operation
+        self.container = container
+        self.headers: Dict[str, Any] = {}
+        self.status_code: Optional[int] = None
+        hook: Optional[Callable] = kwargs.get("response_hook")
+        raw_hook: Optional[Callable] = kwargs.get("raw_response_hook")
+
+        def response_hook(headers, result):
+            # The sync SDK passes its shared last_response_headers, copy them right away.
+            self.headers = dict(headers or {})
+            if hook is not None:
+                hook(headers, result)
+
+        def raw_response_hook(response):
+            # azure.core's hook on the HTTP response; the status isn't among the Cosmos headers.
+            self.status_code = response.http_response.status_code
+            if raw_hook is not None:
+                raw_hook(response)
+
+        kwargs["response_hook"] = response_hook
+        kwargs["raw_response_hook"] = raw_response_hook
+        self.started = time.perf_counter()
+
+    def done(self, error: Optional[BaseException] = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        headers = headers if headers is not None else self.headers
+        if error is not None and not self.headers:
+            headers = dict(getattr(error, "headers", None) or {})
+        record(CosmosOperation(
+            operation=self.operation,
+            container=self.container,
+            duration_ms=(time.perf_counter() - self.started) * 1000,
+            request_charge=float(headers.get(REQUEST_CHARGE) or 0),
+            status_code=self._status_code(error),
+            retries=int(headers.get(RETRY_COUNT) or 0),
+        ))
+
+    def _status_code(self, error: Optional[BaseException]) -> int:
+        if error is not None:
+            return getattr(error, "status_code", None) or 500
+        # Query pages don't go through the hook, they are reported as 200.
+        return self.status_code or 200
+
+
+def _last_headers(container: Any) -> Dict[str, Any]:
+    # Queries don't pass page headers to response_hook; the client's last
+    # response headers are the best available, exact unless pages of several
+    # threads interleave.
+    connection = getattr(container, "client_connection", None)
+    return dict(getattr(connection, "last_response_headers", None) or {})
+
+
+class _InstrumentedPages:
+
+    def __init__(self, pages: Any, container: Any, name: str):
+        self._pages = pages
+        self._container = container
+        self._name = name
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        call = _Call("query_items", self._name, {})
+        try:
+            page = list(next(self._pages))
+        except StopIteration:
+            raise
+        except Exception as e:
+            call.done(e)
+            raise
+        call.done(headers=_last_headers(self._container))
+        return iter(page)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pages, name)
+
+
+class _InstrumentedPaged:
+
+    def __init__(self, paged: Any, container: Any, name: str):
+        self._paged = paged
+        self._container = container
+        self._name = name
+
+    def __iter__(self):
+        for page in self.by_page():
+            yield from page
+
+    def by_page(self, continuation_token: Optional[str] = None) -> _InstrumentedPages:
+        return _InstrumentedPages(self._paged.by_page(continuation_token), self._container, self._name)
+
+
+class InstrumentedContainer:
+    """
+    Wraps a sync container proxy and records every operation; anything else
+    is passed through.
+    """
+
+    def __init__(self, container: Any, name: str):
+        self._container = container
+        self._name = name
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._container, name)
+        if name not in OPERATIONS:
+            return attribute
+
+        def operation(*args, **kwargs):
+            call = _Call(name, self._name, kwargs)
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as e:
+                call.done(e)
+                raise
+            call.done()
+            return result
+
+        return operation
+
+    def query_items(self, *args, **kwargs) -> _InstrumentedPaged:
+        return _InstrumentedPaged(self._container.query_items(*args, **kwargs), self._container, self._name)
+
+
+class _AsyncInstrumentedPages:
+
+    def __init__(self, pages: Any, container: Any, name: str):
+        self._pages = pages
+        self._container = container
+        self._name = name
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        call = _Call("query_items", self._name, {})
+        try:
+            page = [item async for item in await self._pages.__anext__()]
+        except StopAsyncIteration:
+            raise
+        except Exception as e:
+            call.done(e)
+            raise
+        call.done(headers=_last_headers(self._container))
+
+        async def items():
+            for item in page:
+                yield item
+
+        return items()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pages, name)
+
+
+class _AsyncInstrumentedPaged:
+
+    def __init__(self, paged: Any, container: Any, name: str):
+        self._paged = paged
+        self._container = container
+        self._name = name
+
+    async def __aiter__(self):
+        async for page in self.by_page():
+            async for item in page:
+                yield item
+
+    def by_page(self, continuation_token: Optional[str] = None) -> _AsyncInstrumentedPages:
+        return _AsyncInstrumentedPages(self._paged.by_page(continuation_token), self._container, self._name)
+
+
+class AsyncInstrumentedContainer:
+    """
+    InstrumentedContainer for azure.cosmos.aio container proxies.
+    """
+
+    def __init__(self, container: Any, name: str):
+        self._container = container
+        self._name = name
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._container, name)
+        if name not in OPERATIONS:
+            return attribute
+
+        async def operation(*args, **kwargs):
+            call = _Call(name, self._name, kwargs)
+            try:
+                result = await attribute(*args, **kwargs)
+            except Exception as e:
+                call.done(e)
+                raise
+            call.done()
+            return result
+
+        return operation
+
+    def query_items(self, *args, **kwargs) -> _AsyncInstrumentedPaged:
+        return _AsyncInstrumentedPaged(self._container.query_items(*args, **kwargs), self._container, self._name)
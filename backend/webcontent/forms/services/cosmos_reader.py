@@ -0,0 +1,54 @@
+import datetime
+import logging
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from rest_framework.renderers import JSONRenderer
+
+from forms.services.cosmos_builder import definition_id, definition_to_detail
+from forms.services.cosmos_client import read_definition
+from forms.services.definition_cache import get_definition_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+SOURCE_DATABASE = "database"
+SOURCE_COSMOS = "cosmos"
+
+
+def reads_from_cosmos() -> bool:
+    """
+    Whether FormDetailView should try the Cosmos FormDefinition container before Postgres.
+    """
+    return getattr(settings, "FORM_DEFINITION_SOURCE", SOURCE_DATABASE) == SOURCE_COSMOS
+
+
+def read_through_cosmos(form_id: str) -> Optional[Tuple[int, datetime.datetime]]:
+    """
+    Point-read the published definition of a form and put it in the definition cache.
+
+    :return: The (version, updated_at) head of the cached definition, or None when
+             the document is missing, inactive or Cosmos is unavailable, in which
+             case the caller falls back to Postgres.
+    """
+    from azure.cosmos import exceptions as CosmosExceptions
+
+    try:
+        doc = read_definition(definition_id(form_id), form_id)
+    except CosmosExceptions.CosmosResourceNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Cosmos read of form definition %s failed, falling back to the database: %s", form_id, e)
+        return None
+
+    if not doc.get("isActive", False):
+        return None
+
+    version = int(doc["version"])
+    updated_at = parse_datetime(doc["updatedAt"])
+    payload = JSONRenderer().render(definition_to_detail(doc))
+
+    get_definition_cache().set(form_id, version, payload, updated_at)
+    return version, updated_at
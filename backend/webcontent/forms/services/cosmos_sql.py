@@ -0,0 +1,408 @@
+"""
+A small evaluator for the Cosmos DB SQL subset the app and its benchmarks use,
+for the local container stand-ins in cosmos_local.
+
+Supported:
+
+    SELECT [TOP n] [VALUE] * | COUNT(1) | c.a [AS x], c.b.c, c["d"] ...
+    FROM c
+    [WHERE <condition>]
+    [ORDER BY c.a [ASC|DESC], ...]
+    [OFFSET n LIMIT m]
+
+Conditions use =, !=, <>, <, <=, >, >=, AND, OR, NOT, IN (...), parentheses,
+@parameters, literals (numbers, 'strings', true, false, null) and the functions
+IS_DEFINED, IS_NULL, ARRAY_CONTAINS, ARRAY_LENGTH, STARTSWITH, ENDSWITH,
+CONTAINS, LOWER and UPPER.
+
+Like Cosmos, a comparison with a missing property or between values of
+different types is undefined, and undefined rows are filtered out.
+"""
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from azure.cosmos import exceptions as CosmosExceptions
+
+
+class _Undefined:
+    def __repr__(self):
+        return "undefined"
+
+
+UNDEFINED = _Undefined()
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<param>@\w+)
+      | (?P<op><>|!=|<=|>=|=|<|>)
+      | (?P<punct>[(),.*\[\]])
+      | (?P<name>[A-Za-z_]\w*)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {"SELECT", "VALUE", "TOP", "FROM", "WHERE", "ORDER", "BY", "ASC", "DESC", "AND", "OR", "NOT",
+             "IN", "AS", "OFFSET", "LIMIT", "TRUE", "FALSE", "NULL", "COUNT"}
+
+
+def _bad_request(message: str):
+    return CosmosExceptions.CosmosHttpResponseError(status_code=400, message=f"Syntax error: {message}")
+
+
+def _tokenize(query: str) -> List[Tuple[str, str, str]]:
+    """
+    Split a query into (kind, value, source text) tokens; keywords are upper cased.
+    """
+    tokens, position = [], 0
+    query = query.strip()
+    while position < len(query):
+        match = _TOKEN.match(query, position)
+        if not match or match.end() == position:
+            raise _bad_request(f"unexpected input at {query[position:position + 20]!r}")
+        kind = match.lastgroup
+        value = source = match.group(kind)
+        if kind == "name" and value.upper() in _KEYWORDS:
+            kind, value = "keyword", value.upper()
+        tokens.append((kind, value, source))
+        position = match.end()
+    return tokens
+
+
+def _type_rank(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    return 4
+
+
+def _compare(op: str, left: Any, right: Any) -> Any:
+    if left is UNDEFINED or right is UNDEFINED:
+        return UNDEFINED
+    if _type_rank(left) != _type_rank(right):
+        return UNDEFINED
+    if op == "=":
+        return left == right
+    if op in ("!=", "<>"):
+        return left != right
+    if _type_rank(left) == 4:
+        return UNDEFINED
+    return {"<": left < right, "<=": left <= right, ">": left > right, ">=": left >= right}[op]
+
+
+def _string_function(func: Callable[[str, str], bool]) -> Callable:
+    def apply(value, other, *args):
+        if not isinstance(value, str) or not isinstance(other, str):
+            return UNDEFINED
+        if args and args[0] is True:
+            value, other = value.lower(), other.lower()
+        return func(value, other)
+    return apply
+
+
+_FUNCTIONS: Dict[str, Callable] = {
+    "IS_DEFINED": lambda value: value is not UNDEFINED,
+    "IS_NULL": lambda value: value is None,
+    "ARRAY_CONTAINS": lambda array, value, *args: (
+        UNDEFINED if not isinstance(array, list) else value in array
+    ),
+    "ARRAY_LENGTH": lambda array: len(array) if isinstance(array, list) else UNDEFINED,
+    "STARTSWITH": _string_function(str.startswith),
+    "ENDSWITH": _string_function(str.endswith),
+    "CONTAINS": _string_function(lambda value, other: other in value),
+    "LOWER": lambda value: value.lower() if isinstance(value, str) else UNDEFINED,
+    "UPPER": lambda value: value.upper() if isinstance(value, str) else UNDEFINED,
+}
+
+
+def resolve(item: Any, path: Iterable[Any]) -> Any:
+    """
+    Follow a property path into a document; UNDEFINED when it doesn't exist.
+    """
+    value = item
+    for part in path:
+        if isinstance(value, dict) and isinstance(part, str) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and isinstance(part, int) and 0 <= part < len(value):
+            value = value[part]
+        else:
+            return UNDEFINED
+    return value
+
+
+class Query:
+    """
+    A parsed query, evaluated against an iterable of documents with ``run``.
+    """
+
+    def __init__(self, query: str, parameters: Optional[List[Dict[str, Any]]] = None):
+        self.parameters = {p["name"]: p["value"] for p in parameters or []}
+        self._tokens = _tokenize(query)
+        self._position = 0
+
+        self.value = False
+        self.top: Optional[int] = None
+        self.count = False
+        self.projection: Optional[List[Tuple[str, List[Any]]]] = None
+        self.where: Optional[Callable[[Any], Any]] = None
+        self.order_by: List[Tuple[List[Any], bool]] = []
+        self.offset = 0
+        self.limit: Optional[int] = None
+        self._parse()
+
+    # -- parser -------------------------------------------------------------
+
+    def _peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        index = self._position + offset
+        return self._tokens[index][:2] if index < len(self._tokens) else (None, None)
+
+    def _accept(self, kind: str, value: Optional[str] = None) -> Optional[str]:
+        token_kind, token_value = self._peek()
+        if token_kind == kind and (value is None or token_value == value):
+            self._position += 1
+            return token_value
+        return None
+
+    def _expect(self, kind: str, value: Optional[str] = None) -> str:
+        token = self._accept(kind, value)
+        if token is None:
+            raise _bad_request(f"expected {value or kind}, got {self._peek()[1]!r}")
+        return token
+
+    def _integer(self) -> int:
+        kind, value = self._peek()
+        if kind == "param":
+            self._position += 1
+            return int(self._param(value))
+        return int(self._expect("number"))
+
+    def _param(self, name: str) -> Any:
+        if name not in self.parameters:
+            raise _bad_request(f"parameter {name} is not defined")
+        return self.parameters[name]
+
+    def _parse(self) -> None:
+        self._expect("keyword", "SELECT")
+        if self._accept("keyword", "TOP"):
+            self.top = self._integer()
+        self.value = bool(self._accept("keyword", "VALUE"))
+
+        if self._accept("punct", "*"):
+            self.projection = None
+        elif self._accept("keyword", "COUNT"):
+            self._expect("punct", "(")
+            self._expect("number")
+            self._expect("punct", ")")
+            self.count = True
+        else:
+            self.projection = [self._projection_item()]
+            while self._accept("punct", ","):
+                self.projection.append(self._projection_item())
+
+        self._expect("keyword", "FROM")
+        self.alias = self._expect("name")
+
+        if self._accept("keyword", "WHERE"):
+            self.where = self._or()
+        if self._accept("keyword", "ORDER"):
+            self._expect("keyword", "BY")
+            while True:
+                path = self._path()
+                descending = bool(self._accept("keyword", "DESC"))
+                if not descending:
+                    self._accept("keyword", "ASC")
+                self.order_by.append((path, descending))
+                if not self._accept("punct", ","):
+                    break
+        if self._accept("keyword", "OFFSET"):
+            self.offset = self._integer()
+            self._expect("keyword", "LIMIT")
+            self.limit = self._integer()
+        if self._peek()[0] is not None:
+            raise _bad_request(f"unexpected {self._peek()[1]!r}")
+
+    def _projection_item(self) -> Tuple[str, List[Any]]:
+        path = self._path(allow_root=False)
+        name = self._expect("name") if self._accept("keyword", "AS") else str(path[-1])
+        return name, path
+
+    def _path(self, allow_root: bool = True) -> List[Any]:
+        alias = self._expect("name")
+        if getattr(self, "alias", alias) != alias:
+            raise _bad_request(f"unknown identifier {alias!r}")
+        path: List[Any] = []
+        while True:
+            if self._accept("punct", "."):
+                # property names may be keywords, e.g. c.value
+                if self._peek()[0] not in ("name", "keyword"):
+                    raise _bad_request("expected a property name")
+                path.append(self._tokens[self._position][2])
+                self._position += 1
+            elif self._accept("punct", "["):
+                kind, value = self._peek()
+                if kind == "number":
+                    path.append(int(self._expect("number")))
+                else:
+                    path.append(self._literal(self._expect("string")))
+                self._expect("punct", "]")
+            else:
+                break
+        if not path and not allow_root:
+            raise _bad_request("expected a property path")
+        return path
+
+    @staticmethod
+    def _literal(token: str) -> str:
+        escapes = {"n": "\n", "t": "\t", "r": "\r"}
+        return re.sub(r"\\(.)", lambda m: escapes.get(m.group(1), m.group(1)), token[1:-1])
+
+    def _or(self) -> Callable[[Any], Any]:
+        left = self._and()
+        while self._accept("keyword", "OR"):
+            right = self._and()
+            left = (lambda l, r: lambda item: _or(l(item), r(item)))(left, right)
+        return left
+
+    def _and(self) -> Callable[[Any], Any]:
+        left = self._not()
+        while self._accept("keyword", "AND"):
+            right = self._not()
+            left = (lambda l, r: lambda item: _and(l(item), r(item)))(left, right)
+        return left
+
+    def _not(self) -> Callable[[Any], Any]:
+        if self._accept("keyword", "NOT"):
+            operand = self._not()
+
+            def negate(item):
+                value = operand(item)
+                return not value if isinstance(value, bool) else UNDEFINED
+            return negate
+        return self._comparison()
+
+    def _comparison(self) -> Callable[[Any], Any]:
+        left = self._operand()
+        op = self._accept("op")
+        if op:
+            right = self._operand()
+            return lambda item: _compare(op, left(item), right(item))
+
+        negate = bool(self._accept("keyword", "NOT"))
+        if self._accept("keyword", "IN"):
+            self._expect("punct", "(")
+            options = [self._operand()]
+            while self._accept("punct", ","):
+                options.append(self._operand())
+            self._expect("punct", ")")
+
+            def contains(item):
+                value = left(item)
+                if value is UNDEFINED:
+                    return UNDEFINED
+                found = any(_compare("=", value, option(item)) is True for option in options)
+                return not found if negate else found
+            return contains
+        if negate:
+            raise _bad_request("expected IN after NOT")
+        return left
+
+    def _operand(self) -> Callable[[Any], Any]:
+        kind, value = self._peek()
+        if kind == "number":
+            self._position += 1
+            number = float(value) if "." in value else int(value)
+            return lambda item: number
+        if kind == "string":
+            self._position += 1
+            text = self._literal(value)
+            return lambda item: text
+        if kind == "param":
+            self._position += 1
+            param = self._param(value)
+            return lambda item: param
+        if kind == "keyword" and value in ("TRUE", "FALSE", "NULL"):
+            self._position += 1
+            constant = {"TRUE": True, "FALSE": False, "NULL": None}[value]
+            return lambda item: constant
+        if self._accept("punct", "("):
+            inner = self._or()
+            self._expect("punct", ")")
+            return inner
+        if kind == "name" and self._peek(1) == ("punct", "(") and value.upper() in _FUNCTIONS:
+            self._position += 2
+            function = _FUNCTIONS[value.upper()]
+            args = []
+            if not self._accept("punct", ")"):
+                args.append(self._or())
+                while self._accept("punct", ","):
+                    args.append(self._or())
+                self._expect("punct", ")")
+            return lambda item: function(*(arg(item) for arg in args))
+        if kind == "name":
+            path = self._path()
+            return lambda item: resolve(item, path)
+        raise _bad_request(f"unexpected {value!r}")
+
+    # -- evaluation ---------------------------------------------------------
+
+    def matches(self, item: Dict[str, Any]) -> bool:
+        return self.where is None or self.where(item) is True
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> List[Any]:
+        rows = [item for item in items if self.matches(item)]
+
+        if self.count:
+            count = len(rows)
+            return [count] if self.value else [{"$1": count}]
+
+        if self.order_by:
+            for path, _ in self.order_by:
+                rows = [row for row in rows if resolve(row, path) is not UNDEFINED]
+            for path, descending in reversed(self.order_by):
+                rows.sort(key=lambda row: _sort_key(resolve(row, path)), reverse=descending)
+
+        rows = rows[self.offset:]
+        if self.limit is not None:
+            rows = rows[:self.limit]
+        if self.top is not None:
+            rows = rows[:self.top]
+
+        if self.projection is None:
+            return rows
+        if self.value:
+            path = self.projection[0][1]
+            return [value for value in (resolve(row, path) for row in rows) if value is not UNDEFINED]
+        results = []
+        for row in rows:
+            projected = {}
+            for name, path in self.projection:
+                value = resolve(row, path)
+                if value is not UNDEFINED:
+                    projected[name] = value
+            results.append(projected)
+        return results
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    rank = _type_rank(value)
+    return (rank, value if rank in (1, 2, 3) else 0)
+
+
+def _and(left: Any, right: Any) -> Any:
+    if left is False or right is False:
+        return False
+    if left is True and right is True:
+        return True
+    return UNDEFINED
+
+
+def _or(left: Any, right: Any) -> Any:
+    if left is True or right is True:
+        return True
+    if left is False and right is False:
+        return False
+    return UNDEFINED
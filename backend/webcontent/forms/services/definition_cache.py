@@ -0,0 +1,251 @@
+import datetime
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULTS: Dict[str, Any] = {
+    "MAX_ENTRIES": 256,
+    "SHARED_CACHE": "default",
+    "TIMEOUT": 60 * 60 * 24,
+    "POINTER_TIMEOUT": 60,
+    "CATALOG_TIMEOUT": 60 * 5,
+    "CATALOG_CHECK_INTERVAL": 5,
+}
+
+
+class FormDefinitionCache:
+    """
+    Two-tier cache for encoded form definition snapshots keyed on (form_id, version).
+
+    - Tier 1 is a bounded in-process LRU.
+    - Tier 2 is an optional Django cache (a ``CACHES`` alias) shared between workers.
+
+    A small "current version" pointer per form_id, holding (version, updated_at),
+    lets a read resolve the version and the HTTP validators without touching the
+    ORM. Definitions themselves are immutable per version, so only the pointer
+    has to be invalidated when a form changes.
+
+    Reads are served from the in-process tier and only go to the shared one on
+    a local miss. A pointer read from the shared tier is kept locally for
+    ``pointer_timeout`` seconds, the bound on serving a version after another
+    worker invalidated it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULTS["MAX_ENTRIES"],
+        shared_alias: Optional[str] = DEFAULTS["SHARED_CACHE"],
+        timeout: Optional[int] = DEFAULTS["TIMEOUT"],
+        pointer_timeout: Optional[int] = DEFAULTS["POINTER_TIMEOUT"],
+    ):
+        self.max_entries = max_entries
+        self.shared_alias = shared_alias
+        self.timeout = timeout
+        self.pointer_timeout = pointer_timeout
+
+        self._local: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        # form_id -> (version, updated_at, monotonic expiry or None)
+        self._pointers: Dict[str, Tuple[int, Optional[datetime.datetime], Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # -- keys ---------------------------------------------------------------
+
+    @staticmethod
+    def _definition_key(form_id: str, version: int) -> str:
+        return f"forms:definition:{form_id}:v{version}"
+
+    @staticmethod
+    def _pointer_key(form_id: str) -> str:
+        return f"forms:definition:{form_id}:current"
+
+    @property
+    def _shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    # -- pointer ------------------------------------------------------------
+
+    def head(self, form_id: str) -> Optional[Tuple[int, Optional[datetime.datetime]]]:
+        """
+        Return the cached (version, updated_at) of a form, or None when unknown.
+        """
+        with self._lock:
+            pointer = self._pointers.get(form_id)
+            if pointer is not None:
+                version, updated_at, expires = pointer
+                if expires is None or expires > time.monotonic():
+                    return version, updated_at
+                del self._pointers[form_id]
+
+        shared = self._shared
+        if shared is None:
+            return None
+        head = shared.get(self._pointer_key(form_id))
+        if head is not None:
+            self._store_head(form_id, *head)
+        return head
+
+    def current_version(self, form_id: str) -> Optional[int]:
+        """
+        Return the cached current version of a form, or None when unknown.
+        """
+        head = self.head(form_id)
+        return head[0] if head else None
+
+    def set_head(self, form_id: str, version: int, updated_at: Optional[datetime.datetime]) -> None:
+        """
+        Mark a version as the current one, for a definition that is already cached.
+        """
+        shared = self._shared
+        if shared is not None:
+            shared.set(self._pointer_key(form_id), (version, updated_at), self.pointer_timeout)
+        self._store_head(form_id, version, updated_at)
+
+    # -- reads / writes -----------------------------------------------------
+
+    def get(self, form_id: str, version: Optional[int] = None) -> Optional[bytes]:
+        """
+        Return the cached definition for a form, or None on a miss.
+
+        :param form_id: The public form id.
+        :param version: A specific version; defaults to the current pointer.
+        """
+        if version is None:
+            version = self.current_version(form_id)
+            if version is None:
+                self._count("misses")
+                return None
+
+        key = (form_id, version)
+        with self._lock:
+            definition = self._local.get(key)
+            if definition is not None:
+                self._local.move_to_end(key)
+                self.hits += 1
+                return definition
+
+        shared = self._shared
+        if shared is not None:
+            definition = shared.get(self._definition_key(form_id, version))
+            if definition is not None:
+                self._store_local(key, definition)
+                self._count("shared_hits")
+                return definition
+
+        self._count("misses")
+        return None
+
+    def set(
+        self,
+        form_id: str,
+        version: int,
+        definition: bytes,
+        updated_at: Optional[datetime.datetime] = None,
+    ) -> None:
+        """
+        Store a definition and mark its version as the current one.
+        """
+        self._store_local((form_id, version), definition)
+
+        shared = self._shared
+        if shared is not None:
+            shared.set(self._definition_key(form_id, version), definition, self.timeout)
+
+        self.set_head(form_id, version, updated_at)
+
+    def invalidate(self, form_id: str) -> None:
+        """
+        Drop the current-version pointer of a form so the next read goes to the database.
+        """
+        shared = self._shared
+        if shared is not None:
+            shared.delete(self._pointer_key(form_id))
+
+        with self._lock:
+            self._pointers.pop(form_id, None)
+            for key in [k for k in self._local if k[0] == form_id]:
+                del self._local[key]
+
+    def clear(self) -> None:
+        """
+        Empty the in-process tier and reset the counters.
+        """
+        with self._lock:
+            self._local.clear()
+            self._pointers.clear()
+            self.hits = self.shared_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss/eviction counters for sizing the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._local),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "sharedHits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRatio": round((self.hits + self.shared_hits) / lookups, 4) if lookups else None,
+            }
+
+    # -- internals ----------------------------------------------------------
+
+    def _store_local(self, key: Tuple[str, int], definition: bytes) -> None:
+        with self._lock:
+            self._local[key] = definition
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+                self.evictions += 1
+
+    def _store_head(self, form_id: str, version: int, updated_at: Optional[datetime.datetime]) -> None:
+        # Without a shared tier invalidate() reaches every copy, so local pointers don't expire.
+        expires = None
+        if self.shared_alias and self.pointer_timeout is not None:
+            expires = time.monotonic() + self.pointer_timeout
+        with self._lock:
+            self._pointers[form_id] = (version, updated_at, expires)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+_cache: Optional[FormDefinitionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_definition_cache() -> FormDefinitionCache:
+    """
+    Return the process-wide form definition cache, configured from
+    ``settings.FORM_DEFINITION_CACHE``.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = {**DEFAULTS, **getattr(settings, "FORM_DEFINITION_CACHE", {})}
+                _cache = FormDefinitionCache(
+                    max_entries=config["MAX_ENTRIES"],
+                    shared_alias=config["SHARED_CACHE"],
+                    timeout=config["TIMEOUT"],
+                    pointer_timeout=config["POINTER_TIMEOUT"],
+                )
+                logger.debug("Initialised form definition cache: %s", config)
+    return _cache
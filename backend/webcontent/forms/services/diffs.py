@@ -0,0 +1,136 @@
+import logging
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.renderers import JSONRenderer
+
+from forms.services.definition_cache import DEFAULTS as CACHE_DEFAULTS
+from forms.services.form_tree import load_form_tree
+from forms.services.versions import get_version, record_version
+
+
+logger = logging.getLogger(__name__)
+
+
+def _config() -> Dict[str, Any]:
+    return {**CACHE_DEFAULTS, **getattr(settings, "FORM_DEFINITION_CACHE", {})}
+
+
+def _diff_key(form_id: str, from_version: int, to_version: int) -> str:
+    return f"forms:diff:{form_id}:v{from_version}:v{to_version}"
+
+
+def _changed(old: Dict[str, Any], new: Dict[str, Any], skip: str = "") -> Dict[str, Any]:
+    return {key: value for key, value in new.items() if key != skip and old.get(key) != value}
+
+
+def _diff_list(old: List[Dict[str, Any]], new: List[Dict[str, Any]], key: str,
+               item_name: str, diff_item: Callable) -> List[Dict[str, Any]]:
+    """
+    Diff two ordered lists, matching items on ``key`` (section title, field label).
+
+    Ops are applied in the order they are returned: removes by old index, from
+    last to first, then adds by new index, from first to last, then updates by
+    new index. A renamed item is paired with its old position and reported as
+    an update rather than a remove and an add.
+    """
+    removes, adds, updates = [], [], []
+    matcher = SequenceMatcher(None, [i.get(key) for i in old], [i.get(key) for i in new], autojunk=False)
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        paired = min(i2 - i1, j2 - j1) if tag in ("equal", "replace") else 0
+        for k in range(paired):
+            changes = diff_item(old[i1 + k], new[j1 + k])
+            if changes:
+                updates.append({"op": "update", "index": j1 + k, **changes})
+        removes.extend({"op": "remove", "index": i} for i in range(i1 + paired, i2))
+        adds.extend({"op": "add", "index": j, item_name: new[j]} for j in range(j1 + paired, j2))
+
+    return removes[::-1] + adds + updates
+
+
+def _diff_field(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    changes = _changed(old, new)
+    return {"set": changes} if changes else {}
+
+
+def _diff_section(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    changes: Dict[str, Any] = {}
+    values = _changed(old, new, skip="fields")
+    if values:
+        changes["set"] = values
+    fields = _diff_list(old.get("fields") or [], new.get("fields") or [], "label", "field", _diff_field)
+    if fields:
+        changes["fields"] = fields
+    return changes
+
+
+def diff_definitions(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Structural diff between two FormDetailView payloads.
+
+    :return: {"set": {changed top-level keys}, "sections": [ops]}, where each
+             section update may carry its own "set" and "fields" ops.
+    """
+    return {
+        "set": _changed(old, new, skip="sections"),
+        "sections": _diff_list(old.get("sections") or [], new.get("sections") or [],
+                               "title", "section", _diff_section),
+    }
+
+
+def _current_schema(form_id: str, version: int) -> Optional[Dict[str, Any]]:
+    form_version = get_version(form_id, version)
+    if form_version is None:
+        # Published before versions were recorded, or the commit hook hasn't run yet.
+        form = load_form_tree(form_id=form_id, is_active=True)
+        if form is None or form.version != version:
+            return None
+        form_version = record_version(form)
+    return form_version.schema
+
+
+def get_definition_diff(form_id: str, from_version: int, to_version: int) -> Optional[bytes]:
+    """
+    Encoded diff from a client's cached version of a form to ``to_version``.
+
+    Version schemas never change, so a diff is cached per version pair. When
+    the older version was never recorded, or the diff would not be smaller
+    than the definition itself, the full definition is returned instead.
+
+    :return: {"formId", "fromVersion", "toVersion"} plus either "diff" or
+             "definition", encoded; None when ``to_version`` is unknown.
+    """
+    config = _config()
+    shared = caches[config["SHARED_CACHE"]] if config["SHARED_CACHE"] else None
+    key = _diff_key(form_id, from_version, to_version)
+
+    if shared is not None:
+        payload = shared.get(key)
+        if payload is not None:
+            return payload
+
+    new = _current_schema(form_id, to_version)
+    if new is None:
+        return None
+
+    body: Dict[str, Any] = {
+        "formId": form_id,
+        "fromVersion": str(from_version),
+        "toVersion": str(to_version),
+    }
+    full = JSONRenderer().render({**body, "definition": new})
+    old = new if from_version == to_version else getattr(get_version(form_id, from_version), "schema", None)
+
+    payload = full
+    if old is not None:
+        diff = JSONRenderer().render({**body, "diff": diff_definitions(old, new)})
+        if len(diff) < len(full):
+            payload = diff
+
+    if shared is not None:
+        shared.set(key, payload, config["TIMEOUT"])
+    logger.debug("Computed %s v%s..v%s diff (%d bytes)", form_id, from_version, to_version, len(payload))
+    return payload
@@ -0,0 +1,95 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db.models import Prefetch, QuerySet
+
+from forms.models import Form, FormField, FormSection
+
+
+logger = logging.getLogger(__name__)
+
+
+def form_tree_queryset(queryset: Optional[QuerySet] = None) -> QuerySet:
+    """
+    Attach the ordered section and field prefetches to a Form queryset.
+
+    Loading any number of forms this way costs three queries: forms (with
+    created_by joined in), sections and fields. Relations must be read with
+    ``.all()`` afterwards; any further filtering or ordering discards the
+    prefetch and falls back to one query per relation.
+    """
+    if queryset is None:
+        queryset = Form.objects.all()
+
+    return queryset.select_related("created_by").prefetch_related(
+        Prefetch("sections", queryset=FormSection.objects.order_by("order", "pk")),
+        Prefetch("sections__fields", queryset=FormField.objects.order_by("order", "pk")),
+    )
+
+
+def load_form_tree(**filters: Any) -> Optional[Form]:
+    """
+    Load a single form with its sections and fields in a fixed number of queries.
+
+    :param filters: Lookups identifying the form, e.g. ``form_id=...``.
+    :return: The form, or None when nothing matches.
+    """
+    return form_tree_queryset(Form.objects.filter(**filters)).first()
+
+
+def load_form_trees(form_ids: Iterable[str], **filters: Any) -> Dict[str, Form]:
+    """
+    Load several forms with their trees in a fixed number of queries.
+
+    :param form_ids: Public form ids to load.
+    :return: A dict mapping form_id to the loaded form; unknown ids are left out.
+    """
+    queryset = Form.objects.filter(form_id__in=list(form_ids), **filters)
+    return {form.form_id: form for form in form_tree_queryset(queryset)}
+
+
+def ensure_form_tree(form: Form) -> Form:
+    """
+    Return ``form`` when its tree is already prefetched, otherwise reload it.
+    """
+    if "sections" in getattr(form, "_prefetched_objects_cache", {}):
+        return form
+    return load_form_tree(pk=form.pk)
+
+
+def build_form_detail(form: Form) -> Dict[str, Any]:
+    """
+    Serialize a form with its sections and fields into the FormDetailView payload.
+    """
+    form = ensure_form_tree(form)
+
+    sections_data: List[Dict[str, Any]] = []
+    for section in form.sections.all():
+        fields: List[Dict[str, Any]] = [
+            {
+            "label": field.label,
+            "description": field.description,
+            "type": field.field_type,
+            "required": field.is_required,
+            "placeholder": field.placeholder,
+            "options": field.options,
+            }
+            for field in section.fields.all()
+        ]
+        sections_data.append({
+            "title": section.title,
+            "description": section.description,
+            "isRepeatable": section.is_repeatable,
+            "repeatableCount": section.repeatable_count,
+            "fields": fields
+        })
+
+    return {
+        "formId": form.form_id,
+        "title": form.title,
+        "icon": form.icon,
+        "description": form.description,
+        "sections": sections_data,
+        "shortDescription": form.short_description,
+        "version": str(form.version),
+    }
@@ -0,0 +1,203 @@
+import datetime
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from forms.models import Form, FormPublishOutbox, PublishAction
+from forms.services.catalog import rebuild_catalog
+from forms.services.definition_cache import get_definition_cache
+from forms.services.form_tree import load_form_tree
+from forms.services.publishing import publish_form, unpublish_form
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULTS: Dict[str, Any] = {
+    "BATCH_SIZE": 50,
+    "LEASE": 60,
+    "BASE_BACKOFF": 2,
+    "MAX_BACKOFF": 60 * 10,
+    "POLL_INTERVAL": 1.0,
+    "EAGER": False,
+}
+
+
+def outbox_config() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, "FORM_PUBLISH_OUTBOX", {})}
+
+
+def enqueue(form_id: str, action: str = PublishAction.PUBLISH, using: Optional[str] = None) -> None:
+    """
+    Write or refresh the outbox entry of a form. Call inside the transaction of
+    the edit, so the entry commits or rolls back with it.
+    """
+    now = timezone.now()
+    changes = {
+        "action": action,
+        "revision": F("revision") + 1,
+        "attempts": 0,
+        "available_at": now,
+        "last_error": "",
+        "updated_at": now,
+    }
+    entries = FormPublishOutbox.objects.using(using)
+    if entries.filter(form_id=form_id).update(**changes):
+        return
+    try:
+        with transaction.atomic(using=using):
+            entries.create(form_id=form_id, action=action, available_at=now)
+    except IntegrityError:
+        # Created by a concurrent transaction in the meantime
+        entries.filter(form_id=form_id).update(**changes)
+
+
+class FormChangeBatch:
+    """
+    The forms changed by one transaction.
+
+    Each form is bumped and enqueued once, inside the transaction; when it
+    commits the cached definitions are dropped and the catalog rebuilt once.
+
+    - ``saved``: forms saved directly; Form.save already bumped their version.
+    - ``touched``: forms whose sections or fields changed.
+    """
+
+    def __init__(self, using: Optional[str] = None):
+        self.using = using
+        self.saved: Set[int] = set()
+        self.touched: Set[int] = set()
+        self.enqueued: Dict[str, str] = {}
+        self.committed = False
+
+    def enqueue(self, form_id: str, action: str) -> None:
+        if self.enqueued.get(form_id) != action:
+            enqueue(form_id, action, self.using)
+            self.enqueued[form_id] = action
+
+    def __call__(self) -> None:
+        self.committed = True
+
+        cache = get_definition_cache()
+        for form_id in self.enqueued:
+            cache.invalidate(form_id)
+        rebuild_catalog()
+
+        if outbox_config()["EAGER"]:
+            drain(form_ids=list(self.enqueued))
+
+
+def _current_batch(using: Optional[str] = None) -> FormChangeBatch:
+    """
+    The batch of the current transaction, scheduled on commit when first used.
+    """
+    connection = transaction.get_connection(using)
+    batch = getattr(connection, "forms_change_batch", None)
+    # A rolled back transaction drops its callbacks, and with them the batch.
+    if batch is None or batch.committed or all(func is not batch for _, func, _ in connection.run_on_commit):
+        batch = FormChangeBatch(using)
+        connection.forms_change_batch = batch
+        transaction.on_commit(batch, using=using)
+    return batch
+
+
+def _in_transaction(func):
+    # Joins the caller's transaction, or opens one when running in autocommit mode.
+    def wrapper(*args, using: Optional[str] = None):
+        with transaction.atomic(using=using, savepoint=False):
+            func(_current_batch(using), *args)
+    return wrapper
+
+
+@_in_transaction
+def form_saved(batch: FormChangeBatch, form: Form) -> None:
+    batch.saved.add(form.pk)
+    batch.enqueue(form.form_id, PublishAction.PUBLISH)
+
+
+@_in_transaction
+def form_touched(batch: FormChangeBatch, form_pk: int) -> None:
+    if form_pk in batch.saved or form_pk in batch.touched:
+        return
+    batch.touched.add(form_pk)
+
+    forms = Form.objects.using(batch.using).filter(pk=form_pk)
+    forms.update(version=F("version") + 1, updated_at=timezone.now())
+    form_id = forms.values_list("form_id", flat=True).first()
+    if form_id:
+        batch.enqueue(form_id, PublishAction.PUBLISH)
+
+
+@_in_transaction
+def form_deleted(batch: FormChangeBatch, form_id: str) -> None:
+    batch.enqueue(form_id, PublishAction.DELETE)
+
+
+# -- worker -----------------------------------------------------------------
+
+def _claim(batch_size: int, form_ids: Optional[Iterable[str]] = None) -> List[Tuple[int, str, str, int, int]]:
+    """
+    Lease due entries so concurrent workers skip them. Entries of a worker that
+    dies mid-batch become due again when the lease runs out.
+    """
+    config = outbox_config()
+    now = timezone.now()
+    with transaction.atomic():
+        entries = FormPublishOutbox.objects.select_for_update(skip_locked=True).filter(available_at__lte=now)
+        if form_ids is not None:
+            entries = entries.filter(form_id__in=form_ids)
+        rows = list(entries
+                    .order_by("available_at")
+                    .values_list("pk", "form_id", "action", "revision", "attempts")[:batch_size])
+        (FormPublishOutbox.objects
+         .filter(pk__in=[row[0] for row in rows])
+         .update(available_at=now + datetime.timedelta(seconds=config["LEASE"])))
+    return rows
+
+
+def publish_entry(form_id: str, action: str) -> None:
+    """
+    Bring the Cosmos document and caches of a form in line with the database.
+    """
+    form = load_form_tree(form_id=form_id) if action == PublishAction.PUBLISH else None
+    if form is None:
+        unpublish_form(form_id)
+    else:
+        publish_form(form)
+
+
+def drain(batch_size: Optional[int] = None, form_ids: Optional[Iterable[str]] = None) -> Tuple[int, int]:
+    """
+    Publish one batch of due outbox entries.
+
+    Published entries are removed unless they were enqueued again meanwhile.
+    Failed ones are retried with exponential backoff; entries are never dropped.
+
+    :param form_ids: Only publish these forms.
+    :return: (published, failed)
+    """
+    config = outbox_config()
+    published = failed = 0
+
+    for pk, form_id, action, revision, attempts in _claim(batch_size or config["BATCH_SIZE"], form_ids):
+        entry = FormPublishOutbox.objects.filter(pk=pk, revision=revision)
+        try:
+            publish_entry(form_id, action)
+        except Exception as e:
+            failed += 1
+            delay = min(config["BASE_BACKOFF"] * 2 ** attempts, config["MAX_BACKOFF"])
+            logger.exception("Publishing %s failed (attempt %d), retrying in %ss", form_id, attempts + 1, delay)
+            entry.update(
+                attempts=attempts + 1,
+                available_at=timezone.now() + datetime.timedelta(seconds=delay),
+                last_error=str(e)[:2000],
+            )
+        else:
+            published += 1
+            entry.delete()
+
+    return published, failed
@@ -0,0 +1,271 @@
+import atexit
+import copy
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from forms.services.progression_codec import encode_progression
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULTS: Dict[str, Any] = {
+    "ENABLED": False,
+    "WINDOW": 2.0,
+    "MAX_DELAY": 10.0,
+    "SHARED_CACHE": "default",
+}
+
+
+def progression_config() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, "FORM_PROGRESSION_WRITE_BEHIND", {})}
+
+
+def _progression_container() -> Any:
+    from forms.services.cosmos_client import get_container
+
+    return get_container(settings.COSMOS["DATABASE_USER_DATA"], settings.COSMOS["CONTAINER_FORM_PROGRESSION"])
+
+
+def _updated_at(doc: Optional[Dict[str, Any]]) -> Optional[datetime.datetime]:
+    try:
+        updated_at = parse_datetime(doc.get("updatedAt") or "") if doc else None
+    except ValueError:
+        return None
+    if updated_at is not None and timezone.is_naive(updated_at):
+        updated_at = timezone.make_aware(updated_at)
+    return updated_at
+
+
+def _is_newer(doc: Dict[str, Any], than: Dict[str, Any]) -> bool:
+    """
+    Whether ``doc`` was saved after ``than``; False when either has no updatedAt.
+    """
+    doc_at, than_at = _updated_at(doc), _updated_at(than)
+    return doc_at is not None and than_at is not None and doc_at > than_at
+
+
+class ProgressionBuffer:
+    """
+    Write-behind buffer for form progression autosaves.
+
+    A PUT stores the document here instead of upserting it. Writes to the same
+    (user, form, version) document are coalesced; the latest state is upserted
+    once the document has been quiet for WINDOW seconds, or MAX_DELAY seconds
+    after its first buffered write while autosaves keep coming. A background
+    thread does the flushing, and whatever is left is flushed at exit.
+
+    With SHARED_CACHE set, the latest document is also kept in that CACHES
+    alias. Reads on any worker see it, and whichever worker flushes upserts
+    the newest state rather than its own copy. Once the shared copy is gone,
+    another worker flushed it, and a remaining local copy is only written when
+    it is newer than the stored document, conditioned on that document's ETag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (pk, doc_id) -> [document, first buffered at, last buffered at]
+        self._pending: Dict[Tuple[str, str], list] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    # -- keys ---------------------------------------------------------------
+
+    @staticmethod
+    def _shared_key(pk: str, doc_id: str) -> str:
+        return f"forms:progression:{pk}:{doc_id}"
+
+    @property
+    def _shared(self):
+        alias = progression_config()["SHARED_CACHE"]
+        return caches[alias] if alias else None
+
+    # -- API ----------------------------------------------------------------
+
+    def put(self, doc: Dict[str, Any]) -> None:
+        """
+        Buffer the latest state of a progression document.
+        """
+        key = (doc["userId"], doc["id"])
+        config = progression_config()
+        shared = self._shared
+        if shared is not None:
+            shared.set(self._shared_key(*key), doc, timeout=config["WINDOW"] + config["MAX_DELAY"] + 60)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(key)
+            self._pending[key] = [copy.deepcopy(doc), entry[1] if entry else now, now]
+        self._ensure_flusher()
+
+    def get(self, pk: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The buffered state of a progression document, or None when nothing
+        newer than Cosmos is buffered.
+        """
+        shared = self._shared
+        if shared is not None:
+            doc = shared.get(self._shared_key(pk, doc_id))
+            if doc is not None:
+                return doc
+        with self._lock:
+            entry = self._pending.get((pk, doc_id))
+            return copy.deepcopy(entry[0]) if entry else None
+
+    def has_pending(self, pk: str, doc_id: str) -> bool:
+        """
+        Whether a state of the document is buffered and not yet upserted, by
+        this process or, through SHARED_CACHE, by another worker.
+        """
+        with self._lock:
+            if (pk, doc_id) in self._pending:
+                return True
+        shared = self._shared
+        return shared is not None and shared.get(self._shared_key(pk, doc_id)) is not None
+
+    def buffered(self, pk: str) -> Dict[str, Dict[str, Any]]:
+        """
+        The progressions of one partition buffered by this process, by id.
+        Other workers' buffers are only seen through get().
+        """
+        with self._lock:
+            return {key[1]: copy.deepcopy(entry[0]) for key, entry in self._pending.items() if key[0] == pk}
+
+    def flush(self, force: bool = False) -> Tuple[int, int]:
+        """
+        Upsert the documents that are due, or every buffered one with ``force``.
+
+        :return: (flushed, failed); failed documents stay buffered and are retried.
+        """
+        config = progression_config()
+        now = time.monotonic()
+        with self._lock:
+            due = {
+                key: entry for key, entry in self._pending.items()
+                if force or now - entry[2] >= config["WINDOW"] or now - entry[1] >= config["MAX_DELAY"]
+            }
+        if not due:
+            return 0, 0
+
+        shared = self._shared
+        container = _progression_container()
+        flushed = failed = 0
+        for key, entry in due.items():
+            # Re-read on every attempt, a failed flush may be retried long after.
+            doc = shared.get(self._shared_key(*key)) if shared is not None else None
+            if doc is None or _is_newer(entry[0], doc):
+                doc = entry[0]
+            try:
+                if shared is not None and doc is entry[0]:
+                    written = self._write_unless_superseded(container, doc)
+                else:
+                    container.upsert_item(encode_progression(doc))
+                    written = True
+            except Exception:
+                logger.exception("Flushing progression %s/%s failed, retrying later", *key)
+                failed += 1
+                continue
+            if written:
+                flushed += 1
+            if shared is not None:
+                # Once upserted, Cosmos holds the state; keep the shared copy
+                # only when a newer autosave replaced it meanwhile.
+                current = shared.get(self._shared_key(*key))
+                if current is not None and current.get("updatedAt") == doc.get("updatedAt"):
+                    shared.delete(self._shared_key(*key))
+            with self._lock:
+                # Keep entries that were written again while flushing.
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+        return flushed, failed
+
+    @staticmethod
+    def _write_unless_superseded(container: Any, doc: Dict[str, Any]) -> bool:
+        """
+        Write a local copy that another worker may have flushed a newer state
+        over: only when the stored document is older, and only if it is still
+        the document that was read.
+
+        :return: False when the stored document is as new or newer.
+        :raises CosmosAccessConditionFailedError: When it changed since the read.
+        """
+        from azure.core import MatchConditions
+        from azure.cosmos import exceptions as CosmosExceptions
+
+        try:
+            stored = container.read_item(doc["id"], partition_key=doc["userId"])
+        except CosmosExceptions.CosmosResourceNotFoundError:
+            container.create_item(encode_progression(doc))
+            return True
+        if _updated_at(stored) is not None and not _is_newer(doc, stored):
+            logger.info("Dropped buffered progression %s/%s, a newer state is stored", doc["userId"], doc["id"])
+            return False
+        container.replace_item(doc["id"], encode_progression(doc), etag=stored["_etag"],
+                               match_condition=MatchConditions.IfNotModified)
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    # -- flusher ------------------------------------------------------------
+
+    def _ensure_flusher(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            # A forked child doesn't inherit the parent's thread.
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="progression-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            config = progression_config()
+            self._wake.wait(min(config["WINDOW"], config["MAX_DELAY"]) / 2)
+            if self._wake.is_set():
+                return
+            # Like a request, each cycle starts and ends without stale database connections.
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Progression flusher failed")
+            finally:
+                close_old_connections()
+
+    def close(self) -> None:
+        """
+        Stop the flusher and flush everything still buffered.
+        """
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self._thread = None
+        self._wake.clear()
+        flushed, failed = self.flush(force=True)
+        if flushed or failed:
+            logger.info("Flushed %d buffered progressions at shutdown, %d failed", flushed, failed)
+
+
+_buffer = ProgressionBuffer()
+atexit.register(_buffer.close)
+
+
+def get_progression_buffer() -> Optional[ProgressionBuffer]:
+    """
+    The process-wide progression buffer, or None when write-behind is disabled
+    (``settings.FORM_PROGRESSION_WRITE_BEHIND['ENABLED']``).
+    """
+    return _buffer if progression_config()["ENABLED"] else None
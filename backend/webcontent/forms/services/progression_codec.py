@@ -0,0 +1,73 @@
+import base64
+import json
+import zlib
+from typing import Any, Dict
+
+from django.conf import settings
+
+
+# Compressed storage of the answers of form progression documents. Long forms
+# with repeatable sections and SAS image URLs make large documents, and Cosmos
+# charges storage and RU by size. Above THRESHOLD bytes the answers are stored
+# as base64 of the zlib-compressed JSON, marked by answersEncoding so older,
+# uncompressed documents keep reading as they are.
+#
+# Compressed answers can't be addressed by Cosmos patch operations, a delta
+# on them falls back to a read-modify-write (see progression_patch).
+
+ENCODING = "zlib+base64/1"
+
+DEFAULTS: Dict[str, Any] = {
+    "ENABLED": False,
+    "THRESHOLD": 2048,
+    "LEVEL": 6,
+}
+
+
+def compression_config() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, "FORM_PROGRESSION_COMPRESSION", {})}
+
+
+def compress_answers(answers: Dict[str, Any], level: int = DEFAULTS["LEVEL"]) -> str:
+    raw = json.dumps(answers, separators=(",", ":"), ensure_ascii=False).encode()
+    return base64.b64encode(zlib.compress(raw, level)).decode("ascii")
+
+
+def decompress_answers(encoded: str) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(base64.b64decode(encoded)))
+
+
+def encode_progression(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The progression document to store: a copy with compressed answers when
+    compression is enabled and the answers are over the threshold, else the
+    document itself.
+    """
+    config = compression_config()
+    answers = doc.get("answers")
+    if not config["ENABLED"] or not isinstance(answers, dict):
+        return doc
+
+    size = len(json.dumps(answers, separators=(",", ":"), ensure_ascii=False).encode())
+    if size < config["THRESHOLD"]:
+        if "answersEncoding" not in doc:
+            return doc
+        return {name: value for name, value in doc.items() if name != "answersEncoding"}
+    return {**doc, "answers": compress_answers(answers, config["LEVEL"]), "answersEncoding": ENCODING}
+
+
+def decode_progression(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A stored progression document with plain answers, whether or not they
+    were stored compressed.
+
+    :raises ValueError: For an encoding this version doesn't know.
+    """
+    encoding = doc.get("answersEncoding")
+    if encoding is None:
+        return doc
+    if encoding != ENCODING:
+        raise ValueError(f"Unknown answers encoding {encoding!r} in progression {doc.get('id')}")
+    decoded = {name: value for name, value in doc.items() if name != "answersEncoding"}
+    decoded["answers"] = decompress_answers(doc["answers"])
+    return decoded
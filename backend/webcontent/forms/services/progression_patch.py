@@ -0,0 +1,244 @@
+import copy
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.utils import timezone
+
+from forms.services.progression_codec import decode_progression, encode_progression
+
+
+logger = logging.getLogger(__name__)
+
+# Delta updates of form progression documents. The client sends per-answer
+# operations, addressed in the progression layout section/instance/field
+# (see answer_validation), which are applied with Cosmos patch operations so
+# a write costs what the change costs, not what the document weighs.
+
+# Cosmos takes at most 10 operations per patch, one of them sets updatedAt.
+MAX_PATCH_OPERATIONS = 10
+MAX_OPERATIONS = 100
+OPERATIONS = ("set", "remove")
+
+# How often a read-modify-write is retried when the document changed in between.
+MAX_ATTEMPTS = 3
+
+Operation = Tuple[str, List[str], Any]
+
+
+class ProgressionConflict(Exception):
+    """
+    The progression kept changing while a delta was applied to it.
+    """
+
+
+def parse_operations(operations: Any) -> Tuple[Optional[List[Operation]], Optional[str]]:
+    """
+    Check the operations of a progression PATCH body.
+
+    Each operation is ``{"op": "set", "path": "0/1/2", "value": ...}`` or
+    ``{"op": "remove", "path": "0/1"}``; paths are section, instance and field
+    indexes. Setting a whole section or instance takes an object value.
+
+    :return: ([(op, path parts, value)], None), or (None, error message).
+    """
+    if not isinstance(operations, list) or not operations:
+        return None, "operations must be a non-empty list"
+    if len(operations) > MAX_OPERATIONS:
+        return None, f"at most {MAX_OPERATIONS} operations are allowed"
+
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            return None, f"operation {index} must have an op of {', '.join(OPERATIONS)}"
+        path = operation.get("path")
+        parts = str(path).strip("/").split("/") if isinstance(path, (str, int)) else []
+        if not 1 <= len(parts) <= 3 or not all(part.isdigit() for part in parts):
+            return None, f"operation {index} needs a path of section/instance/field indexes"
+        parts = [str(int(part)) for part in parts]
+
+        value = operation.get("value")
+        if operation["op"] == "set":
+            if "value" not in operation:
+                return None, f"operation {index} needs a value"
+            if len(parts) < 3 and not isinstance(value, dict):
+                return None, f"operation {index} must set an object on a section or instance"
+        parsed.append((operation["op"], parts, copy.deepcopy(value)))
+    return parsed, None
+
+
+def changed_answers(operations: List[Operation]) -> Dict[str, Any]:
+    """
+    The answers set by the operations in the progression layout, for validation.
+    """
+    answers: Dict[str, Any] = {}
+    for op, parts, value in operations:
+        if op != "set":
+            continue
+        parent = answers
+        for part in parts[:-1]:
+            parent = parent.setdefault(part, {})
+        parent[parts[-1]] = value
+    return answers
+
+
+def apply_operations(answers: Dict[str, Any], operations: List[Operation]) -> Dict[str, Any]:
+    """
+    Apply the operations to a copy of the answers, creating missing sections
+    and instances; removing what isn't there is a no-op.
+    """
+    answers = copy.deepcopy(answers)
+    for op, parts, value in operations:
+        parent = answers
+        for part in parts[:-1]:
+            if not isinstance(parent.get(part), dict):
+                if op == "remove":
+                    break
+                parent[part] = {}
+            parent = parent[part]
+        else:
+            if op == "set":
+                parent[parts[-1]] = copy.deepcopy(value)
+            else:
+                parent.pop(parts[-1], None)
+    return answers
+
+
+def _patch_chunks(operations: List[Operation], updated_at: str) -> List[List[Dict[str, Any]]]:
+    patch = []
+    for op, parts, value in operations:
+        operation = {"op": op, "path": "/answers/" + "/".join(parts)}
+        if op == "set":
+            operation["value"] = value
+        patch.append(operation)
+    size = MAX_PATCH_OPERATIONS - 1
+    return [
+        patch[start:start + size] + [{"op": "set", "path": "/updatedAt", "value": updated_at}]
+        for start in range(0, len(patch), size)
+    ]
+
+
+def new_progression(pk: str, doc_id: str, form_id: str, version: str,
+                    answers: Dict[str, Any], updated_at: str) -> Dict[str, Any]:
+    return {
+        "id": doc_id,
+        "userId": pk,
+        "formId": form_id,
+        "formVersion": version,
+        "answers": answers,
+        "updatedAt": updated_at,
+    }
+
+
+def patch_buffered_progression(buffer: Any, container: Any, pk: str, doc_id: str, form_id: str, version: str,
+                               operations: List[Operation]) -> Dict[str, Any]:
+    """
+    Apply the operations to the latest state of a progression in the
+    write-behind buffer (see progression_buffer), reading it from Cosmos
+    when nothing is buffered yet.
+    """
+    from azure.cosmos import exceptions as CosmosExceptions
+
+    doc = buffer.get(pk, doc_id)
+    if doc is None:
+        try:
+            doc = decode_progression(container.read_item(item=doc_id, partition_key=pk))
+        except CosmosExceptions.CosmosResourceNotFoundError:
+            doc = new_progression(pk, doc_id, form_id, version, {}, "")
+    doc["answers"] = apply_operations(doc.get("answers") or {}, operations)
+    doc["updatedAt"] = f"{timezone.localtime()}"
+    buffer.put(doc)
+
+
+def patch_progression(container: Any, pk: str, doc_id: str, form_id: str, version: str,
+                      operations: List[Operation]) -> Dict[str, Any]:
+    """
+    Apply the operations to a stored progression with Cosmos patch operations.
+
+    Patches hold at most MAX_PATCH_OPERATIONS operations, larger deltas are
+    sent in several; set and remove are idempotent, so a client can resend a
+    delta that failed halfway. When the document doesn't exist yet, or a path
+    doesn't (Cosmos doesn't create missing sections or instances, and rejects
+    removing what isn't there), or the answers are stored compressed (see
+    progression_codec), the delta is applied by a read-modify-write guarded
+    by the document's ETag instead.
+
+    :return: The stored document, with its new ``_etag``.
+    :raises ProgressionConflict: When the document kept changing during the read-modify-write.
+    """
+    from azure.cosmos import exceptions as CosmosExceptions
+
+    updated_at = f"{timezone.localtime()}"
+    try:
+        for chunk in _patch_chunks(operations, updated_at):
+            stored = container.patch_item(doc_id, partition_key=pk, patch_operations=chunk)
+        return stored
+    except CosmosExceptions.CosmosResourceNotFoundError:
+        pass
+    except CosmosExceptions.CosmosHttpResponseError as e:
+        if e.status_code != 400:
+            raise
+        logger.debug("Patching progression %s failed, rewriting it: %s", doc_id, e.message)
+
+    from azure.core import MatchConditions
+
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            doc = decode_progression(container.read_item(item=doc_id, partition_key=pk))
+        except CosmosExceptions.CosmosResourceNotFoundError:
+            try:
+                return container.create_item(encode_progression(new_progression(
+                    pk, doc_id, form_id, version, apply_operations({}, operations), updated_at
+                )))
+            except CosmosExceptions.CosmosResourceExistsError:
+                continue
+
+        doc["answers"] = apply_operations(doc.get("answers") or {}, operations)
+        doc["updatedAt"] = updated_at
+        try:
+            return container.replace_item(doc_id, encode_progression(doc), etag=doc.get("_etag"),
+                                          match_condition=MatchConditions.IfNotModified)
+        except CosmosExceptions.CosmosAccessConditionFailedError:
+            continue
+    raise ProgressionConflict(doc_id)
+
+
+async def apatch_progression(container: Any, pk: str, doc_id: str, form_id: str, version: str,
+                             operations: List[Operation]) -> Dict[str, Any]:
+    """
+    patch_progression for azure.cosmos.aio containers.
+    """
+    from azure.cosmos import exceptions as CosmosExceptions
+
+    updated_at = f"{timezone.localtime()}"
+    try:
+        for chunk in _patch_chunks(operations, updated_at):
+            stored = await container.patch_item(doc_id, partition_key=pk, patch_operations=chunk)
+        return stored
+    except CosmosExceptions.CosmosResourceNotFoundError:
+        pass
+    except CosmosExceptions.CosmosHttpResponseError as e:
+        if e.status_code != 400:
+            raise
+        logger.debug("Patching progression %s failed, rewriting it: %s", doc_id, e.message)
+
+    from azure.core import MatchConditions
+
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            doc = decode_progression(await container.read_item(item=doc_id, partition_key=pk))
+        except CosmosExceptions.CosmosResourceNotFoundError:
+            try:
+                return await container.create_item(encode_progression(new_progression(
+                    pk, doc_id, form_id, version, apply_operations({}, operations), updated_at
+                )))
+            except CosmosExceptions.CosmosResourceExistsError:
+                continue
+
+        doc["answers"] = apply_operations(doc.get("answers") or {}, operations)
+        doc["updatedAt"] = updated_at
+        try:
+            return await container.replace_item(doc_id, encode_progression(doc), etag=doc.get("_etag"),
+                                                match_condition=MatchConditions.IfNotModified)
+        except CosmosExceptions.CosmosAccessConditionFailedError:
+            continue
+    raise ProgressionConflict(doc_id)
@@ -0,0 +1,56 @@
+import logging
+
+from forms.models import Form
+from forms.services.cosmos_builder import (build_form_definition,
+                                          definition_hash, definition_id)
+from forms.services.cosmos_client import delete_item, upsert_item
+from forms.services.definition_cache import get_definition_cache
+from forms.services.snapshots import store_snapshot
+from forms.services.versions import record_version
+
+
+logger = logging.getLogger(__name__)
+
+# Run by the publish_forms worker for each outbox entry, see services/outbox.py.
+
+
+def publish_form(form: Form) -> None:
+    """
+    Publish the committed state of a form from one loaded tree: record its
+    version, pre-render the snapshot, upsert the Cosmos document and drop the
+    cached definition.
+
+    When the definition's content hash matches the one last published, e.g.
+    after a save or a touch that changed nothing but the version, Cosmos is
+    not written at all. Its document keeps the version and updatedAt it was
+    published with, which render the same form as the current version, so
+    Cosmos reads serve (and validate against) that version.
+    """
+    definition = build_form_definition(form)
+    content_hash = definition_hash(definition)
+    record_version(form, content_hash=content_hash)
+    if form.is_active:
+        store_snapshot(form)
+
+    # Publish before invalidating, so a Cosmos read-through never re-caches the old version.
+    if content_hash != form.published_hash:
+        upsert_item(definition)
+        # update() rather than save(), which would bump the version and publish again
+        Form.objects.filter(pk=form.pk).update(published_hash=content_hash)
+        form.published_hash = content_hash
+    else:
+        logger.debug("Skipped publishing %s v%s, its content is unchanged", form.form_id, form.version)
+    get_definition_cache().invalidate(form.form_id)
+
+
+def unpublish_form(form_id: str) -> None:
+    """
+    Remove a deleted form from Cosmos DB and the definition cache.
+    """
+    from azure.cosmos import exceptions as CosmosExceptions
+
+    try:
+        delete_item(definition_id(form_id), form_id)
+    except CosmosExceptions.CosmosResourceNotFoundError:
+        pass
+    get_definition_cache().invalidate(form_id)
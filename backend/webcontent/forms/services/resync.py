@@ -0,0 +1,154 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Set
+
+from django.conf import settings
+
+from forms.models import Form
+from forms.services.cosmos_builder import build_form_definition
+from forms.services.cosmos_client import get_container, iter_query
+from forms.services.form_tree import form_tree_queryset
+
+
+logger = logging.getLogger(__name__)
+
+# Republishes every FormDefinition document, for when the Cosmos container was
+# rebuilt or reindexed. Day-to-day publishing goes through services/outbox.py.
+
+# Before definitions became one document per form, partitioned by form id (see
+# cosmos_builder.definition_id), each version was stored as form_def_{pk}_v{n}
+# without a pk property. A resync deletes what is left of them.
+LEGACY_DEFINITIONS_QUERY = "SELECT * FROM c WHERE c.type = 'FormDefinition' AND NOT IS_DEFINED(c.pk)"
+
+
+@dataclass
+class ResyncReport:
+    forms: int = 0
+    failed: List[str] = field(default_factory=list)
+    bytes: int = 0
+    legacy: int = 0
+    request_charge: float = 0.0
+    charged: int = 0
+    seconds: float = 0.0
+    dry_run: bool = False
+
+    @property
+    def published(self) -> int:
+        return self.forms - len(self.failed)
+
+    @property
+    def per_second(self) -> float:
+        return self.forms / self.seconds if self.seconds else 0.0
+
+
+class _ChargeCounter:
+    """
+    Sums the ``x-ms-request-charge`` header of the upserts, from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0.0
+        self.count = 0
+
+    def __call__(self, headers: Mapping[str, Any], result: Any) -> None:
+        charge = headers.get("x-ms-request-charge") if headers else None
+        if charge is None:
+            return
+        with self._lock:
+            self.total += float(charge)
+            self.count += 1
+
+
+def delete_legacy_definitions(container: Any, dry_run: bool = False) -> int:
+    """
+    Delete the per-version FormDefinition documents of the old id scheme.
+
+    :return: The number of documents found (and, unless dry_run, deleted).
+    """
+    from azure.cosmos import exceptions as CosmosExceptions
+    from azure.cosmos.partition_key import NonePartitionKeyValue
+
+    legacy = [doc["id"] for doc in iter_query(container, LEGACY_DEFINITIONS_QUERY, fields=["id"])]
+    if dry_run:
+        return len(legacy)
+    for doc_id in legacy:
+        try:
+            container.delete_item(doc_id, partition_key=NonePartitionKeyValue)
+        except CosmosExceptions.CosmosResourceNotFoundError:
+            pass
+    if legacy:
+        logger.info("Deleted %d legacy per-version form definitions", len(legacy))
+    return len(legacy)
+
+
+def resync_definitions(is_active: Optional[bool] = None, form_type: Optional[str] = None,
+                       workers: int = 8, chunk_size: int = 100, dry_run: bool = False) -> ResyncReport:
+    """
+    Build and upsert the FormDefinition document of every matching form.
+
+    Forms are streamed in chunks through the prefetched tree loader, so memory
+    and the number of queries stay bounded by ``chunk_size``. Definitions are
+    built on the calling thread (the only one touching the database) and
+    upserted by a pool of ``workers`` threads, with at most twice that many
+    upserts in flight. Definitions left from the old per-version id scheme
+    are deleted afterwards, see delete_legacy_definitions.
+
+    :param is_active: Only resync active (True) or inactive (False) forms, None for all.
+    :param form_type: Only resync forms of this FormType.
+    :param dry_run: Build the documents without writing them.
+    :return: A ResyncReport with the counts, sizes, duration and request charge.
+    """
+    # Also needed for a dry run, to count the legacy documents.
+    queryset = Form.objects.order_by("pk")
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+    if form_type:
+        queryset = queryset.filter(form_type=form_type)
+
+    report = ResyncReport(dry_run=dry_run)
+    charges = _ChargeCounter()
+    container = get_container(settings.COSMOS['DATABASE_FORM_DATA'], settings.COSMOS['CONTAINER_FORM_DEFINITIONS'])
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="form-resync") as executor:
+        pending: Dict[Future, str] = {}
+
+        def collect(done: Set[Future]) -> None:
+            for future in done:
+                form_id = pending.pop(future)
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception("Resyncing form %s failed", form_id)
+                    report.failed.append(form_id)
+
+        for form in form_tree_queryset(queryset).iterator(chunk_size=chunk_size):
+            definition = build_form_definition(form)
+            report.forms += 1
+            report.bytes += len(json.dumps(definition, separators=(",", ":")))
+            if dry_run:
+                continue
+
+            if len(pending) >= 2 * max(workers, 1):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            # Run in a copy of this context, so the upserts count towards the caller's cosmos_scope.
+            upsert = contextvars.copy_context().run
+            pending[executor.submit(upsert, container.upsert_item, definition, response_hook=charges)] = form.form_id
+
+        collect(set(pending))
+
+    # Only a full resync replaces the legacy documents, a filtered one leaves them be.
+    if is_active is None and not form_type:
+        report.legacy = delete_legacy_definitions(container, dry_run=dry_run)
+    report.seconds = time.perf_counter() - started
+    report.request_charge, report.charged = charges.total, charges.count
+    logger.info("Resynced %d form definitions in %.1fs, %d failed, %.1f RU",
+                report.published, report.seconds, len(report.failed), report.request_charge)
+    return report
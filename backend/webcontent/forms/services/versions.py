@@ -0,0 +1,45 @@
+import logging
+from typing import Optional
+
+from forms.models import Form, FormVersion
+from forms.services.form_tree import build_form_detail
+
+
+logger = logging.getLogger(__name__)
+
+
+def record_version(form: Form, content_hash: str = "") -> FormVersion:
+    """
+    Freeze the current version of a form, if it isn't recorded yet.
+
+    FormVersion rows are append-only: an existing (form_id, version) is
+    returned untouched, never overwritten.
+
+    :param content_hash: definition_hash of the version's FormDefinition, when known.
+    """
+    form_version = (FormVersion.objects
+                    .filter(form_id=form.form_id, version=form.version)
+                    .first())
+    if form_version is not None:
+        return form_version
+
+    form_version, created = FormVersion.objects.get_or_create(
+        form_id=form.form_id,
+        version=form.version,
+        defaults={
+            "form_type": form.form_type,
+            "title": form.title,
+            "schema": build_form_detail(form),
+            "content_hash": content_hash,
+        },
+    )
+    if created:
+        logger.debug("Recorded %s v%s", form.form_id, form.version)
+    return form_version
+
+
+def get_version(form_id: str, version: int) -> Optional[FormVersion]:
+    """
+    Fetch the frozen schema of a form version, or None if it was never recorded.
+    """
+    return FormVersion.objects.filter(form_id=form_id, version=version).first()
@@ -1,3 +1,1294 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from azure.core import MatchConditions
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as shared_cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import Role
+
+from .models import (Form, FormDefinitionSnapshot, FormField,
+                     FormPublishOutbox, FormSection, FormSubmission, FormType,
+                     FormVersion, PublishAction)
+from .services.answer_validation import get_validator
+from .services.catalog import (CATALOG_KEY, CATALOG_VERSION_KEY, build_catalog,
+                               catalog_version)
+from .services.cosmos_builder import build_form_definition, definition_id
+from .services.cosmos_client import (CosmosClientRegistry, get_container,
+                                     get_cosmos_registry,
+                                     get_published_definitions)
+from .services.cosmos_local import InMemoryContainer, SQLiteContainer
+from .services.cosmos_metrics import get_cosmos_metrics
+from .services.definition_cache import FormDefinitionCache, get_definition_cache
+from .services.diffs import diff_definitions
+from .services.form_tree import build_form_detail, load_form_tree
+from .services.outbox import drain
+from .services.progression_buffer import get_progression_buffer
+from .services.progression_codec import decode_progression
+from .services.resync import resync_definitions
+from .services.snapshots import rebuild_all_snapshots
+from .services.versions import record_version
+from .views import AsyncFormProgressionView, make_progression_id
+
+
+def make_form(title="Onboarding", sections=2, fields=3, **kwargs) -> Form:
+    """
+    Create a form with its sections and fields, published as one committed edit.
+    """
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        form = Form.objects.create(title=title, **kwargs)
+        for s in range(sections):
+            section = FormSection.objects.create(
+                id=form.pk * 1000 + s, title=f"Section {s}", form=form, order=s
+            )
+            for f in range(fields):
+                FormField.objects.create(
+                    label=f"Field {s}.{f}", field_type="text_field", form_section=section, order=f
+                )
+    return Form.objects.get(pk=form.pk)
+
+
+@override_settings(FORM_PUBLISH_OUTBOX={"EAGER": True})
+class FormsTestCase(TestCase):
+    """
+    Runs against an in-memory FormDefinition container and empty caches.
+    Edits are published as soon as they commit, without a worker.
+    """
+
+    def setUp(self):
+        shared_cache.clear()
+        get_definition_cache().clear()
+        catalog = mock.patch("forms.services.catalog._local_catalog", None)
+        catalog.start()
+        self.addCleanup(catalog.stop)
+
+        self.container = InMemoryContainer(partition_key_path="/pk")
+        patcher = mock.patch("forms.services.cosmos_client._container", return_value=self.container)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class FormDefinitionCacheTests(FormsTestCase):
+
+    def test_cached_read_skips_the_orm(self):
+        form = make_form()
+        url = reverse("form detail", args=[form.form_id])
+
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(get_definition_cache().stats()["hits"], 1)
+
+    def test_warm_reads_stay_in_process(self):
+        form = make_form()
+        url = reverse("form detail", args=[form.form_id])
+        self.client.get(url)
+
+        with mock.patch.object(FormDefinitionCache, "_shared", new_callable=mock.PropertyMock) as shared:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        shared.assert_not_called()
+
+    def test_field_edit_invalidates_definition(self):
+        form = make_form()
+        url = reverse("form detail", args=[form.form_id])
+        self.client.get(url)
+
+        field = FormField.objects.filter(form_section__form=form).first()
+        field.label = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            field.save()
+
+        body = self.client.get(url).json()
+        self.assertEqual(body["sections"][0]["fields"][0]["label"], "Renamed")
+        self.assertEqual(body["version"], str(form.version + 1))
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = FormDefinitionCache(max_entries=2, shared_alias=None)
+        cache.set("a", 1, {"formId": "a"})
+        cache.set("b", 1, {"formId": "b"})
+        cache.get("a")
+        cache.set("c", 1, {"formId": "c"})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class FormTreeLoaderTests(FormsTestCase):
+
+    def test_tree_query_count_is_independent_of_tree_size(self):
+        small = make_form(title="Small", sections=1, fields=1)
+        large = make_form(title="Large", sections=6, fields=8)
+
+        for form in (small, large):
+            # form (with created_by), sections and fields
+            with self.assertNumQueries(3):
+                detail = build_form_detail(load_form_tree(form_id=form.form_id))
+
+        self.assertEqual(len(detail["sections"]), 6)
+        self.assertEqual([f["label"] for f in detail["sections"][1]["fields"]][:2], ["Field 1.0", "Field 1.1"])
+
+    def test_cosmos_builder_uses_prefetched_tree(self):
+        form = load_form_tree(pk=make_form(sections=5, fields=5).pk)
+
+        with self.assertNumQueries(0):
+            doc = build_form_definition(form)
+
+        self.assertEqual(len(doc["sections"]), 5)
+        self.assertEqual(len(doc["sections"][0]["fields"]), 5)
+
+
+class ConditionalGetTests(FormsTestCase):
+
+    def test_detail_revalidation_returns_304(self):
+        form = make_form()
+        url = reverse("form detail", args=[form.form_id])
+        etag = self.client.get(url)["ETag"]
+
+        get_definition_cache().clear()
+        shared_cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_detail_etag_changes_with_version(self):
+        form = make_form()
+        url = reverse("form detail", args=[form.form_id])
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_catalog_etag_tracks_form_changes(self):
+        form = make_form()
+        url = reverse("forms overview")
+        etag = self.client.get(url)["ETag"]
+
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+        form.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 200)
+
+
+class FormsCatalogTests(FormsTestCase):
+
+    def test_overview_is_served_without_queries(self):
+        make_form(title="Manual")
+        make_form(title="Generated", form_type=FormType.AI_GENERATED, order=1)
+        self.client.get(reverse("forms overview"))
+
+        with self.assertNumQueries(0):
+            everything = self.client.get(reverse("forms overview")).json()
+            generated = self.client.get(reverse("forms overview"), {"form_type": FormType.AI_GENERATED}).json()
+            unknown = self.client.get(reverse("forms overview"), {"form_type": "unknown"}).json()
+
+        self.assertEqual([f["title"] for f in everything], ["Manual", "Generated"])
+        self.assertEqual([f["title"] for f in generated], ["Generated"])
+        self.assertEqual(unknown, [])
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                                           "LOCATION": "forms_test_cache"}})
+    def test_overview_reads_neither_the_database_nor_a_database_cache(self):
+        call_command("createcachetable", verbosity=0)
+        make_form(title="Manual")
+        self.client.get(reverse("forms overview"))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("forms overview"))
+        self.assertEqual([f["title"] for f in response.json()], ["Manual"])
+
+    def test_rebuilds_by_other_workers_are_picked_up(self):
+        make_form(title="Manual")
+        self.client.get(reverse("forms overview"))
+
+        other = make_form(title="Other")
+        Form.objects.filter(pk=other.pk).update(title="Renamed")
+        catalog = build_catalog()
+        shared_cache.set_many({CATALOG_KEY: catalog, CATALOG_VERSION_KEY: catalog_version(catalog)})
+
+        later = time.monotonic() + settings.FORM_DEFINITION_CACHE["CATALOG_CHECK_INTERVAL"]
+        with mock.patch("forms.services.catalog.time.monotonic", return_value=later), self.assertNumQueries(0):
+            response = self.client.get(reverse("forms overview"))
+        self.assertEqual([f["title"] for f in response.json()], ["Manual", "Renamed"])
+
+    def test_catalog_is_rebuilt_on_delete(self):
+        form = make_form()
+        self.client.get(reverse("forms overview"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            form.delete()
+
+        self.assertEqual(self.client.get(reverse("forms overview")).json(), [])
+
+
+class CoalescedSyncTests(FormsTestCase):
+
+    def test_edits_in_one_transaction_are_published_once(self):
+        form = make_form(sections=2, fields=20)
+
+        with mock.patch.object(self.container, "upsert_item", wraps=self.container.upsert_item) as upsert:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                for field in FormField.objects.filter(form_section__form=form):
+                    field.label += " (edited)"
+                    field.save()
+                FormSection.objects.filter(form=form).first().delete()
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(upsert.call_count, 1)
+        self.assertEqual(Form.objects.get(pk=form.pk).version, form.version + 1)
+        self.assertEqual(len(upsert.call_args.args[0]["sections"]), 1)
+
+    def test_form_and_field_edits_bump_the_version_once(self):
+        form = make_form()
+        version = form.version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            form.title = "Renamed"
+            form.save()
+            FormField.objects.filter(form_section__form=form).first().save()
+
+        self.assertEqual(Form.objects.get(pk=form.pk).version, version + 1)
+
+
+@override_settings(FORM_PUBLISH_OUTBOX={"EAGER": False, "BASE_BACKOFF": 10})
+class PublishOutboxTests(FormsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.form = make_form()
+        drain()
+
+    def edit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for field in FormField.objects.filter(form_section__form=self.form):
+                field.label += " (edited)"
+                field.save()
+
+    def test_edits_are_enqueued_once_and_published_by_the_worker(self):
+        self.edit()
+        self.assertEqual(FormPublishOutbox.objects.get().form_id, self.form.form_id)
+        self.assertNotIn(" (edited)", json.dumps(self.container.read_item(definition_id(self.form.form_id), self.form.form_id)))
+
+        self.assertEqual(drain(), (1, 0))
+        doc = self.container.read_item(definition_id(self.form.form_id), self.form.form_id)
+        self.assertEqual(doc["sections"][0]["fields"][0]["label"], "Field 0.0 (edited)")
+        self.assertFalse(FormPublishOutbox.objects.exists())
+
+    def test_failed_publication_is_retried_with_backoff(self):
+        self.edit()
+        with mock.patch.object(self.container, "upsert_item", side_effect=RuntimeError("unavailable")):
+            self.assertEqual(drain(), (0, 1))
+
+        entry = FormPublishOutbox.objects.get()
+        self.assertEqual((entry.attempts, entry.last_error), (1, "unavailable"))
+        self.assertEqual(drain(), (0, 0))
+
+        FormPublishOutbox.objects.update(available_at=entry.created_at)
+        self.assertEqual(drain(), (1, 0))
+
+    def test_entry_enqueued_again_while_publishing_is_kept(self):
+        self.edit()
+
+        def edit_during_publish(body, **kwargs):
+            self.edit()
+            return InMemoryContainer.upsert_item(self.container, body)
+
+        with mock.patch.object(self.container, "upsert_item", side_effect=edit_during_publish):
+            self.assertEqual(drain(), (1, 0))
+        self.assertEqual(FormPublishOutbox.objects.get().action, PublishAction.PUBLISH)
+
+    def test_unchanged_definition_is_not_upserted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Form.objects.get(pk=self.form.pk).save()
+
+        writes = ("upsert_item", "create_item", "replace_item", "patch_item", "delete_item")
+        with mock.patch.multiple(self.container, **{name: mock.DEFAULT for name in writes}) as mocks:
+            self.assertEqual(drain(), (1, 0))
+        for name in writes:
+            mocks[name].assert_not_called()
+        hashes = FormVersion.objects.filter(form_id=self.form.form_id).values_list("content_hash", flat=True)
+        self.assertEqual(len(set(hashes)), 1)
+        # the stored document keeps the version its content was published with
+        stored = self.container.read_item(definition_id(self.form.form_id), self.form.form_id)
+        self.assertEqual(stored["version"], str(self.form.version))
+        self.assertEqual(stored["updatedAt"], self.form.updated_at.isoformat())
+
+        self.edit()
+        with mock.patch.object(self.container, "upsert_item") as upsert:
+            self.assertEqual(drain(), (1, 0))
+        upsert.assert_called_once()
+
+    def test_rolled_back_edit_is_not_enqueued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                FormField.objects.filter(form_section__form=self.form).first().save()
+                raise RuntimeError
+            self.assertFalse(FormPublishOutbox.objects.exists())
+            FormField.objects.filter(form_section__form=self.form).first().save()
+
+        self.assertEqual(FormPublishOutbox.objects.count(), 1)
+
+
+class PublishedDefinitionsTests(FormsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username="admin@example.com", password="x", role=Role.ADMIN))
+
+    def test_only_admins_can_list_definitions(self):
+        url = reverse("published form definitions")
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(get_user_model().objects.create_user(username="ann@example.com", password="x"))
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_definitions_are_paged_with_continuation_tokens(self):
+        forms = [make_form(f"Form {n}") for n in range(5)]
+        make_form("Inactive", is_active=False)
+
+        seen, token = [], None
+        while True:
+            params = {"pageSize": 2, "fields": "formId,title"}
+            if token:
+                params["continuationToken"] = token
+            body = self.client.get(reverse("published form definitions"), params).json()
+            self.assertLessEqual(len(body["items"]), 2)
+            seen += body["items"]
+            token = body["continuationToken"]
+            if not token:
+                break
+
+        self.assertEqual(seen, [{"formId": form.form_id, "title": form.title} for form in forms])
+
+    def test_invalid_requests(self):
+        url = reverse("published form definitions")
+        self.assertEqual(self.client.get(url, {"fields": "title) FROM c --"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"continuationToken": "bogus"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"pageSize": 1000}).status_code, 400)
+
+    def test_published_definitions_stream(self):
+        forms = [make_form(f"Form {n}") for n in range(3)]
+
+        ids = [doc["formId"] for doc in get_published_definitions(fields=["formId"], max_item_count=1)]
+
+        self.assertEqual(ids, [form.form_id for form in forms])
+
+
+class ResyncDefinitionsTests(FormsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.active = [make_form(f"Active {n}") for n in range(3)]
+        self.inactive = make_form("Inactive", is_active=False)
+        self.container = InMemoryContainer(partition_key_path="/pk")
+        patcher = mock.patch("forms.services.cosmos_client._container", return_value=self.container)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_every_matching_form_is_republished(self):
+        report = resync_definitions(is_active=True, workers=2, chunk_size=2)
+
+        self.assertEqual((report.published, report.failed), (3, []))
+        for form in self.active:
+            self.assertEqual(self.container.read_item(definition_id(form.form_id), form.form_id),
+                             {**build_form_definition(form), "_etag": mock.ANY, "_ts": mock.ANY})
+        self.assertEqual(list(self.container.query_items("SELECT VALUE COUNT(1) FROM c")), [3])
+
+    def test_dry_run_writes_nothing(self):
+        report = resync_definitions(dry_run=True)
+
+        self.assertEqual(report.forms, 4)
+        self.assertGreater(report.bytes, 0)
+        self.assertEqual(list(self.container.query_items("SELECT VALUE COUNT(1) FROM c")), [0])
+
+    def test_failures_and_request_charge_are_reported(self):
+        def upsert(body, response_hook=None, **kwargs):
+            if body["pk"] == self.active[0].form_id:
+                raise RuntimeError("unavailable")
+            response_hook({"x-ms-request-charge": "10.5"}, body)
+
+        with mock.patch.object(self.container, "upsert_item", side_effect=upsert):
+            report = resync_definitions()
+
+        self.assertEqual(report.failed, [self.active[0].form_id])
+        self.assertEqual((report.request_charge, report.charged), (31.5, 3))
+
+    def test_legacy_per_version_definitions_are_deleted(self):
+        form = self.active[0]
+        self.container.upsert_item({"id": f"form_def_{form.pk}_v1", "type": "FormDefinition", "formId": form.form_id})
+
+        self.assertEqual(resync_definitions(dry_run=True).legacy, 1)
+        self.assertEqual(resync_definitions(is_active=True).legacy, 0)
+        self.assertEqual(resync_definitions().legacy, 1)
+
+        ids = [doc["id"] for doc in self.container.query_items("SELECT c.id FROM c", enable_cross_partition_query=True)]
+        self.assertEqual(sorted(ids), sorted(definition_id(f.form_id) for f in [*self.active, self.inactive]))
+
+
+class FormDefinitionSnapshotTests(FormsTestCase):
+
+    def test_snapshot_is_regenerated_on_commit(self):
+        form = make_form()
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+
+        snapshot = FormDefinitionSnapshot.objects.get(form=form, version=form.version)
+        self.assertEqual(json.loads(bytes(snapshot.payload))["version"], str(form.version))
+
+    def test_detail_serves_snapshot_bytes(self):
+        form = make_form()
+        rebuild_all_snapshots()
+        get_definition_cache().clear()
+        shared_cache.clear()
+
+        # validators lookup + snapshot lookup, no tree loading
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("form detail", args=[form.form_id]))
+
+        snapshot = FormDefinitionSnapshot.objects.get(form=form, version=form.version)
+        self.assertEqual(response.content, bytes(snapshot.payload))
+        self.assertEqual(response["Content-Type"], "application/json")
+
+
+class FormBatchDetailTests(FormsTestCase):
+
+    def test_batch_loads_forms_in_fixed_queries(self):
+        forms = [make_form(title=f"Form {i}", sections=3, fields=4) for i in range(5)]
+        rebuild_all_snapshots()
+        shared_cache.clear()
+        get_definition_cache().clear()
+
+        ids = [form.form_id for form in forms]
+        # one snapshot query; the unknown id falls through to the tree loader,
+        # which stops after the form query when nothing matches
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                reverse("form batch detail"),
+                {"forms": ids + ["does-not-exist"]},
+                content_type="application/json",
+            )
+
+        body = response.json()
+        self.assertEqual([f["formId"] for f in body["forms"]], ids)
+        self.assertEqual(body["missing"], ["does-not-exist"])
+
+    def test_current_client_versions_are_not_resent(self):
+        stale, current = make_form(title="Stale"), make_form(title="Current")
+
+        body = self.client.post(
+            reverse("form batch detail"),
+            {"forms": [
+                {"formId": stale.form_id, "version": str(stale.version - 1)},
+                {"formId": current.form_id, "version": str(current.version)},
+            ]},
+            content_type="application/json",
+        ).json()
+
+        self.assertEqual([f["formId"] for f in body["forms"]], [stale.form_id])
+        self.assertEqual(body["notModified"], [current.form_id])
+
+
+@override_settings(FORM_DEFINITION_SOURCE="cosmos")
+class CosmosReadThroughTests(FormsTestCase):
+
+    def publish(self, form):
+        form.description = f"Published as v{form.version + 1}"
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+        shared_cache.clear()
+        get_definition_cache().clear()
+        return Form.objects.get(pk=form.pk)
+
+    def test_detail_is_read_from_cosmos_without_queries(self):
+        form = self.publish(make_form())
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("form detail", args=[form.form_id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), build_form_detail(form))
+
+    def test_missing_document_falls_back_to_database(self):
+        form = self.publish(make_form())
+        self.container.delete_item(definition_id(form.form_id), partition_key=form.form_id)
+
+        response = self.client.get(reverse("form detail", args=[form.form_id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["version"], str(form.version))
+
+    def test_deleted_form_is_removed_from_cosmos(self):
+        form = self.publish(make_form())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            form.delete()
+
+        self.assertEqual(self.client.get(reverse("form detail", args=[form.form_id])).status_code, 404)
+
+
+class CosmosClientRegistryTests(TestCase):
+
+    @mock.patch("azure.cosmos.CosmosClient")
+    def test_one_client_and_proxy_per_process(self, client_class):
+        registry = CosmosClientRegistry()
+
+        first = registry.container("db", "definitions")
+        self.assertIs(registry.container("db", "definitions"), first)
+        registry.container("db", "progression")
+        self.assertEqual(client_class.call_count, 1)
+
+        with mock.patch("forms.services.cosmos_client.os.getpid", return_value=-1):
+            # a forked child builds its own client
+            registry.container("db", "definitions")
+        self.assertEqual(client_class.call_count, 2)
+
+    def test_boot_does_not_import_azure_sdks(self):
+        boot = ("import sys; from webcontent.wsgi import application; from django.urls import get_resolver; "
+                "get_resolver().url_patterns; print(sorted({m.split('.')[1] for m in sys.modules if m.startswith('azure.')}))")
+        output = subprocess.run([sys.executable, "-c", boot], cwd=settings.BASE_DIR, check=True,
+                                capture_output=True, text=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+
+class LocalCosmosContainerTests(TestCase):
+
+    def setUp(self):
+        self.container = InMemoryContainer(partition_key_path="/userId")
+        for n in range(5):
+            self.container.upsert_item({"id": f"form:{n}", "userId": "user:a" if n < 3 else "user:b",
+                                        "answers": {"q": n}, "tags": ["draft"] if n % 2 else []})
+
+    def test_query_subset(self):
+        rows = list(self.container.query_items(
+            "SELECT VALUE c.id FROM c WHERE c.userId = @user AND c.answers.q >= @min ORDER BY c.answers.q DESC",
+            parameters=[{"name": "@user", "value": "user:a"}, {"name": "@min", "value": 1}],
+        ))
+        self.assertEqual(rows, ["form:2", "form:1"])
+
+        count = self.container.query_items("SELECT VALUE COUNT(1) FROM c WHERE ARRAY_CONTAINS(c.tags, 'draft')",
+                                           enable_cross_partition_query=True)
+        self.assertEqual(list(count), [2])
+
+    def test_pages_continue_from_token(self):
+        pages = self.container.query_items("SELECT * FROM c", max_item_count=2).by_page()
+        self.assertEqual(len(list(next(pages))), 2)
+
+        resumed = self.container.query_items("SELECT * FROM c", max_item_count=2).by_page(pages.continuation_token)
+        self.assertEqual([len(list(page)) for page in resumed], [2, 1])
+
+    def test_patch_operations_and_filter_predicate(self):
+        from azure.cosmos import exceptions as CosmosExceptions
+
+        patched = self.container.patch_item("form:1", partition_key="user:a", patch_operations=[
+            {"op": "set", "path": "/answers/r", "value": "x"},
+            {"op": "incr", "path": "/answers/q", "value": 10},
+            {"op": "remove", "path": "/tags"},
+        ])
+        self.assertEqual(patched["answers"], {"q": 11, "r": "x"})
+        self.assertNotIn("tags", self.container.read_item("form:1", partition_key="user:a"))
+
+        with self.assertRaises(CosmosExceptions.CosmosAccessConditionFailedError):
+            self.container.patch_item("form:1", partition_key="user:a", filter_predicate="FROM c WHERE c.answers.q = 1",
+                                      patch_operations=[{"op": "set", "path": "/answers/q", "value": 0}])
+
+    def test_sqlite_store_is_shared_between_instances(self):
+        path = f"{settings.BASE_DIR}/.cosmos_local_test.sqlite3"
+        self.addCleanup(lambda: [os.remove(f) for f in (path, f"{path}-wal", f"{path}-shm") if os.path.exists(f)])
+
+        SQLiteContainer(path, partition_key_path="/userId").upsert_item({"id": "1", "userId": "user:a"})
+
+        self.assertEqual(SQLiteContainer(path, partition_key_path="/userId").read_item("1", "user:a")["userId"], "user:a")
+
+    def test_backend_is_selected_from_settings(self):
+        registry = get_cosmos_registry()
+        self.addCleanup(registry.reset)
+        user = get_user_model().objects.create_user(username="progress@example.com", password="x")
+        client = APIClient()
+        client.force_authenticate(user)
+        body = {"formId": "form-1", "formVersion": "1", "answers": {"name": "Ann"}}
+
+        with override_settings(COSMOS={**settings.COSMOS, "BACKEND": "memory"}), \
+                mock.patch("azure.cosmos.CosmosClient") as client_class:
+            registry.reset()
+            self.assertEqual(client.put(reverse("form progression"), body, format="json").status_code, 200)
+            response = client.get(reverse("form progression"), {"formId": "form-1", "formVersion": "1"})
+
+        client_class.assert_not_called()
+        self.assertEqual(response.json()["answers"], {"name": "Ann"})
+
+
+class CosmosMetricsTests(TestCase):
+
+    def setUp(self):
+        settings_override = override_settings(COSMOS={**settings.COSMOS, "BACKEND": "memory"})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_cosmos_registry().reset()
+        self.addCleanup(get_cosmos_registry().reset)
+        get_cosmos_metrics().reset()
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username="admin@example.com", password="x", role=Role.ADMIN))
+
+    def test_operations_are_aggregated_per_view(self):
+        with self.assertLogs("forms.middleware", "INFO") as logs:
+            self.client.put(reverse("form progression"), {"formId": "form-1", "formVersion": "1", "answers": {}},
+                            format="json")
+            self.client.get(reverse("form progression"), {"formId": "form-1", "formVersion": "1"})
+            self.client.get(reverse("form progression"), {"formId": "form-2", "formVersion": "1"})
+
+        self.assertIn("cosmos view=form progression ops=1 ru=5.00", logs.output[0])
+        operations = {op["operation"]: op for op in get_cosmos_metrics().stats()["form progression"]["operations"]}
+        self.assertEqual(operations["upsert_item"]["requestCharge"], 5.0)
+        self.assertEqual((operations["read_item"]["count"], operations["read_item"]["errors"]), (2, 1))
+        self.assertEqual(operations["read_item"]["statusCodes"], {"200": 1, "404": 1})
+
+        response = self.client.get(reverse("cosmos metrics"))
+        self.assertEqual(response.json()["form progression"]["count"], 3)
+
+    def test_operations_outside_a_request_are_background(self):
+        container = get_container(settings.COSMOS["DATABASE_USER_DATA"], settings.COSMOS["CONTAINER_USER_PROFILES"])
+        container.upsert_item({"id": "1", "userId": "user:1"})
+        self.assertEqual(list(container.query_items("SELECT * FROM c")), [mock.ANY])
+
+        operations = get_cosmos_metrics().stats()["(background)"]["operations"]
+        self.assertEqual({op["operation"] for op in operations}, {"upsert_item", "query_items"})
+
+    def test_status_codes_are_the_responses(self):
+        container = get_container(settings.COSMOS["DATABASE_USER_DATA"], settings.COSMOS["CONTAINER_USER_PROFILES"])
+        container.create_item({"id": "1", "userId": "user:1"})
+        container.upsert_item({"id": "1", "userId": "user:1"})
+        container.upsert_item({"id": "2", "userId": "user:2"})
+        container.delete_item("1", partition_key="user:1")
+
+        operations = {op["operation"]: op for op in get_cosmos_metrics().stats()["(background)"]["operations"]}
+        self.assertEqual(operations["create_item"]["statusCodes"], {"201": 1})
+        self.assertEqual(operations["upsert_item"]["statusCodes"], {"200": 1, "201": 1})
+        self.assertEqual(operations["delete_item"]["statusCodes"], {"204": 1})
+
+
+class ProgressionWriteBehindTests(TestCase):
+
+    def setUp(self):
+        settings_override = override_settings(
+            COSMOS={**settings.COSMOS, "BACKEND": "memory"},
+            FORM_PROGRESSION_WRITE_BEHIND={"ENABLED": True, "WINDOW": 60, "MAX_DELAY": 120},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_cosmos_registry().reset()
+        self.addCleanup(get_cosmos_registry().reset)
+        shared_cache.clear()
+
+        self.buffer = get_progression_buffer()
+        self.addCleanup(self.buffer.close)
+        self.container = get_container(settings.COSMOS["DATABASE_USER_DATA"],
+                                       settings.COSMOS["CONTAINER_FORM_PROGRESSION"])
+        user = get_user_model().objects.create_user(username="ann@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.pk, self.doc_id = make_progression_id(user_id=str(user.uuid), form_id="form-1", form_version="1")
+
+    def autosave(self, answers):
+        body = {"formId": "form-1", "formVersion": "1", "answers": answers}
+        self.assertEqual(self.client.put(reverse("form progression"), body, format="json").status_code, 200)
+
+    def answers(self):
+        response = self.client.get(reverse("form progression"), {"formId": "form-1", "formVersion": "1"})
+        return response.json()["answers"]
+
+    def test_autosaves_are_coalesced_into_one_upsert(self):
+        with mock.patch.object(self.container, "upsert_item", wraps=self.container.upsert_item) as upsert:
+            for n in range(1, 4):
+                self.autosave({"name": "A" * n})
+                self.assertEqual(self.answers(), {"name": "A" * n})
+
+            self.assertEqual(self.buffer.flush(), (0, 0))
+            self.assertEqual(self.buffer.flush(force=True), (1, 0))
+
+        upsert.assert_called_once()
+        self.assertEqual(self.container.read_item(self.doc_id, self.pk)["answers"], {"name": "AAA"})
+        self.assertEqual(self.buffer.pending(), 0)
+
+    def test_documents_are_flushed_after_the_window_or_max_delay(self):
+        with mock.patch("forms.services.progression_buffer.time.monotonic", return_value=1000):
+            self.autosave({"name": "A"})
+        with mock.patch("forms.services.progression_buffer.time.monotonic", return_value=1100):
+            self.autosave({"name": "B"})
+            self.assertEqual(self.buffer.flush(), (0, 0))
+        with mock.patch("forms.services.progression_buffer.time.monotonic", return_value=1120):
+            # quiet for less than WINDOW, but buffered for MAX_DELAY
+            self.assertEqual(self.buffer.flush(), (1, 0))
+
+    def test_flushed_documents_are_read_from_cosmos(self):
+        self.autosave({"name": "A"})
+        self.assertEqual(self.buffer.flush(force=True), (1, 0))
+
+        response = self.client.get(reverse("form progression"), {"formId": "form-1", "formVersion": "1"})
+        etag = self.container.read_item(self.doc_id, self.pk)["_etag"]
+        self.assertEqual(response.json()["etag"], etag)
+        body = {"formId": "form-1", "formVersion": "1", "answers": {"name": "B"}}
+        response = self.client.put(reverse("form progression"), body, format="json", headers={"If-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_newer_autosaves_stay_shared_after_a_flush(self):
+        self.autosave({"name": "A"})
+        newer = {**self.buffer.get(self.pk, self.doc_id), "answers": {"name": "B"}, "updatedAt": "later"}
+        with mock.patch.object(self.container, "upsert_item",
+                               side_effect=lambda doc: shared_cache.set(self.buffer._shared_key(self.pk, self.doc_id),
+                                                                        newer)):
+            self.buffer.flush(force=True)
+        self.assertEqual(self.buffer.get(self.pk, self.doc_id)["answers"], {"name": "B"})
+
+    def other_worker_flushed(self, answers, updated_at):
+        self.container.upsert_item({**self.buffer.get(self.pk, self.doc_id), "answers": answers,
+                                    "updatedAt": updated_at})
+        shared_cache.delete(self.buffer._shared_key(self.pk, self.doc_id))
+
+    def test_stale_copy_does_not_overwrite_a_newer_flush(self):
+        self.autosave({"name": "A"})
+        with mock.patch.object(self.container, "upsert_item", side_effect=RuntimeError("unavailable")):
+            self.assertEqual(self.buffer.flush(force=True), (0, 1))
+        self.other_worker_flushed({"name": "B"}, f"{timezone.localtime() + timedelta(seconds=1)}")
+
+        self.assertEqual(self.buffer.flush(force=True), (0, 0))
+        self.assertEqual(self.container.read_item(self.doc_id, self.pk)["answers"], {"name": "B"})
+        self.assertEqual(self.buffer.pending(), 0)
+
+    def test_copy_newer_than_a_flush_is_written_conditionally(self):
+        self.autosave({"name": "A"})
+        self.other_worker_flushed({"name": "B"}, f"{timezone.localtime() - timedelta(seconds=1)}")
+
+        with mock.patch.object(self.container, "replace_item", wraps=self.container.replace_item) as replace:
+            self.assertEqual(self.buffer.flush(force=True), (1, 0))
+        self.assertEqual(replace.call_args.kwargs["match_condition"], MatchConditions.IfNotModified)
+        self.assertEqual(self.container.read_item(self.doc_id, self.pk)["answers"], {"name": "A"})
+
+    @override_settings(FORM_PROGRESSION_WRITE_BEHIND={"ENABLED": True, "WINDOW": 0.01, "MAX_DELAY": 0.01})
+    def test_flusher_closes_stale_database_connections(self):
+        with mock.patch("forms.services.progression_buffer.close_old_connections") as close, \
+                mock.patch.object(self.buffer, "flush", side_effect=lambda: self.buffer._wake.set()):
+            self.buffer._run()
+        self.assertEqual(close.call_count, 2)
+        self.buffer._wake.clear()
+
+    def test_failed_flush_is_retried(self):
+        self.autosave({"name": "A"})
+        with mock.patch.object(self.container, "upsert_item", side_effect=RuntimeError("unavailable")):
+            self.assertEqual(self.buffer.flush(force=True), (0, 1))
+        self.assertEqual(self.buffer.pending(), 1)
+
+        self.buffer.close()
+        self.assertEqual(self.container.read_item(self.doc_id, self.pk)["answers"], {"name": "A"})
+
+
+class ProgressionPatchTests(TestCase):
+
+    def setUp(self):
+        settings_override = override_settings(COSMOS={**settings.COSMOS, "BACKEND": "memory"})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_cosmos_registry().reset()
+        self.addCleanup(get_cosmos_registry().reset)
+
+        self.container = get_container(settings.COSMOS["DATABASE_USER_DATA"],
+                                       settings.COSMOS["CONTAINER_FORM_PROGRESSION"])
+        user = get_user_model().objects.create_user(username="ann@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.pk, self.doc_id = make_progression_id(user_id=str(user.uuid), form_id="form-1", form_version="1")
+
+    def patch(self, *operations):
+        body = {"formId": "form-1", "formVersion": "1", "operations": list(operations)}
+        return self.client.patch(reverse("form progression"), body, format="json")
+
+    def answers(self):
+        return self.container.read_item(self.doc_id, self.pk)["answers"]
+
+    def test_first_delta_creates_the_progression(self):
+        self.assertEqual(self.patch({"op": "set", "path": "0/0/1", "value": "Ann"}).status_code, 200)
+        self.assertEqual(self.answers(), {"0": {"0": {"1": "Ann"}}})
+
+    def test_later_deltas_are_patched(self):
+        self.patch({"op": "set", "path": "0/0/1", "value": "Ann"}, {"op": "set", "path": "0/0/2", "value": "x"})
+        with mock.patch.object(self.container, "patch_item", wraps=self.container.patch_item) as patch, \
+                mock.patch.object(self.container, "upsert_item") as upsert, \
+                mock.patch.object(self.container, "replace_item") as replace:
+            response = self.patch({"op": "set", "path": "0/0/1", "value": "Bob"}, {"op": "remove", "path": "0/0/2"})
+
+        self.assertEqual(response.status_code, 200)
+        patch.assert_called_once()
+        upsert.assert_not_called()
+        replace.assert_not_called()
+        self.assertEqual(self.answers(), {"0": {"0": {"1": "Bob"}}})
+
+    def test_missing_paths_fall_back_to_a_guarded_rewrite(self):
+        self.patch({"op": "set", "path": "0/0/1", "value": "Ann"})
+        with mock.patch.object(self.container, "replace_item", wraps=self.container.replace_item) as replace:
+            self.assertEqual(self.patch({"op": "set", "path": "2/0/0", "value": 3}).status_code, 200)
+
+        self.assertIn("etag", replace.call_args.kwargs)
+        self.assertEqual(self.answers(), {"0": {"0": {"1": "Ann"}}, "2": {"0": {"0": 3}}})
+
+    def test_large_deltas_are_split_into_patches_of_ten_operations(self):
+        self.patch({"op": "set", "path": "0/0", "value": {}})
+        operations = [{"op": "set", "path": f"0/0/{n}", "value": n} for n in range(20)]
+        with mock.patch.object(self.container, "patch_item", wraps=self.container.patch_item) as patch:
+            self.assertEqual(self.patch(*operations).status_code, 200)
+
+        self.assertEqual(patch.call_count, 3)
+        self.assertTrue(all(len(call.kwargs["patch_operations"]) <= 10 for call in patch.call_args_list))
+        self.assertEqual(self.answers(), {"0": {"0": {str(n): n for n in range(20)}}})
+
+    def test_concurrent_changes_are_a_conflict(self):
+        self.patch({"op": "set", "path": "0/0/1", "value": "Ann"})
+        stale = self.container.read_item(self.doc_id, self.pk)
+        with mock.patch.object(self.container, "read_item", return_value=stale):
+            self.container.upsert_item({**stale, "answers": {}})
+            response = self.patch({"op": "set", "path": "1/0/0", "value": 1})
+        self.assertEqual(response.status_code, 409)
+
+    def test_invalid_operations_are_rejected(self):
+        self.assertEqual(self.patch().status_code, 400)
+        self.assertEqual(self.patch({"op": "move", "path": "0/0/1"}).status_code, 400)
+        self.assertEqual(self.patch({"op": "set", "path": "answers/0", "value": {}}).status_code, 400)
+        self.assertEqual(self.patch({"op": "set", "path": "0", "value": "Ann"}).status_code, 400)
+
+
+class ProgressionETagTests(TestCase):
+
+    def setUp(self):
+        settings_override = override_settings(COSMOS={**settings.COSMOS, "BACKEND": "memory"})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_cosmos_registry().reset()
+        self.addCleanup(get_cosmos_registry().reset)
+
+        user = get_user_model().objects.create_user(username="ann@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def put(self, answers, etag=None):
+        body = {"formId": "form-1", "formVersion": "1", "answers": answers}
+        headers = {"If-Match": etag} if etag else None
+        return self.client.put(reverse("form progression"), body, format="json", headers=headers)
+
+    def get(self):
+        return self.client.get(reverse("form progression"), {"formId": "form-1", "formVersion": "1"})
+
+    def test_reads_and_writes_return_the_etag(self):
+        written = self.put({"name": "Ann"})
+        response = self.get()
+
+        self.assertEqual(response.json()["etag"], written.json()["etag"])
+        self.assertEqual(response["ETag"], written["ETag"])
+
+    def test_stale_conditional_write_is_rejected(self):
+        etag = self.put({"name": "Ann"}).json()["etag"]
+        tab_b = self.put({"name": "Bob"}, etag=etag)
+        self.assertEqual(tab_b.status_code, 200)
+
+        tab_a = self.put({"name": "Ann Smith"}, etag=etag)
+        self.assertEqual(tab_a.status_code, 412)
+        self.assertEqual(self.get().json()["answers"], {"name": "Bob"})
+        self.assertEqual(self.put({"name": "Ann Smith"}, etag=tab_b.json()["etag"]).status_code, 200)
+
+    def test_conditional_write_of_a_missing_progression_is_rejected(self):
+        self.assertEqual(self.put({"name": "Ann"}, etag='"stale"').status_code, 412)
+
+    def test_conditional_write_skips_the_write_behind_buffer(self):
+        etag = self.put({"name": "Ann"}).json()["etag"]
+        with override_settings(FORM_PROGRESSION_WRITE_BEHIND={"ENABLED": True, "WINDOW": 60, "MAX_DELAY": 120}):
+            buffer = get_progression_buffer()
+            self.addCleanup(buffer.close)
+            written = self.put({"name": "Bob"}, etag=etag)
+            self.assertEqual(written.status_code, 200)
+            self.assertEqual(buffer.pending(), 0)
+
+            self.put({"name": "Cy"})
+            self.assertIsNone(self.get().json()["etag"])
+            # the buffered autosave is newer than the ETag
+            self.assertEqual(self.put({"name": "Dee"}, etag=written.json()["etag"]).status_code, 412)
+
+            buffer.flush(force=True)
+            current = self.get()
+            self.assertEqual(current.json()["answers"], {"name": "Cy"})
+            self.assertEqual(self.put({"name": "Dee"}, etag=current.json()["etag"]).status_code, 200)
+
+
+class InProgressFormsTests(TestCase):
+
+    def setUp(self):
+        settings_override = override_settings(COSMOS={**settings.COSMOS, "BACKEND": "memory"})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_cosmos_registry().reset()
+        self.addCleanup(get_cosmos_registry().reset)
+
+        self.container = get_container(settings.COSMOS["DATABASE_USER_DATA"],
+                                       settings.COSMOS["CONTAINER_FORM_PROGRESSION"])
+        self.user = get_user_model().objects.create_user(username="ann@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def save(self, user, form_id, updated_at, answers=None):
+        pk, doc_id = make_progression_id(user_id=str(user.uuid), form_id=form_id, form_version="1")
+        self.container.upsert_item({"id": doc_id, "userId": pk, "formId": form_id, "formVersion": "1",
+                                    "answers": answers or {"name": "Ann"}, "updatedAt": updated_at})
+
+    def test_lists_the_users_progressions_in_one_query(self):
+        self.save(self.user, "form-1", "2026-01-01")
+        self.save(self.user, "form-2", "2026-02-01")
+        other = get_user_model().objects.create_user(username="bob@example.com", password="x")
+        self.save(other, "form-3", "2026-03-01")
+
+        with mock.patch.object(self.container, "query_items", wraps=self.container.query_items) as query, \
+                mock.patch.object(self.container, "read_item") as read:
+            response = self.client.get(reverse("in progress forms"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"], [
+            {"formId": "form-2", "formVersion": "1", "updatedAt": "2026-02-01"},
+            {"formId": "form-1", "formVersion": "1", "updatedAt": "2026-01-01"},
+        ])
+        query.assert_called_once()
+        self.assertEqual(query.call_args.kwargs["partition_key"], f"user:{self.user.uuid}")
+        self.assertNotIn("SELECT *", query.call_args.kwargs["query"])
+        read.assert_not_called()
+
+    def test_answers_are_optional(self):
+        self.save(self.user, "form-1", "2026-01-01", answers={"0": {"0": {"0": "Ann"}}})
+        response = self.client.get(reverse("in progress forms"), {"answers": "true"})
+        self.assertEqual(response.json()["items"][0]["answers"], {"0": {"0": {"0": "Ann"}}})
+
+    def test_buffered_autosaves_are_included(self):
+        self.save(self.user, "form-1", "2026-01-01")
+        with override_settings(FORM_PROGRESSION_WRITE_BEHIND={"ENABLED": True, "WINDOW": 60, "MAX_DELAY": 120,
+                                                              "SHARED_CACHE": None}):
+            buffer = get_progression_buffer()
+            self.addCleanup(buffer.close)
+            for form_id in ("form-1", "form-2"):
+                body = {"formId": form_id, "formVersion": "1", "answers": {"name": "Bob"}}
+                self.client.put(reverse("form progression"), body, format="json")
+
+            items = self.client.get(reverse("in progress forms")).json()["items"]
+        self.assertEqual(sorted(item["formId"] for item in items), ["form-1", "form-2"])
+        self.assertTrue(all(item["updatedAt"] > "2026-01-01" for item in items))
+
+
+@override_settings(FORM_PROGRESSION_COMPRESSION={"ENABLED": True, "THRESHOLD": 512, "LEVEL": 6})
+class ProgressionCompressionTests(TestCase):
+
+    def setUp(self):
+        settings_override = override_settings(COSMOS={**settings.COSMOS, "BACKEND": "memory"})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_cosmos_registry().reset()
+        self.addCleanup(get_cosmos_registry().reset)
+
+        self.container = get_container(settings.COSMOS["DATABASE_USER_DATA"],
+                                       settings.COSMOS["CONTAINER_FORM_PROGRESSION"])
+        user = get_user_model().objects.create_user(username="ann@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.pk, self.doc_id = make_progression_id(user_id=str(user.uuid), form_id="form-1", form_version="1")
+        sas = "https://account.blob.core.windows.net/images/{}/photo-{}.png?se=2026-01-08&sp=r&sv=2025-05-05&sr=b&sig="
+        self.large = {"0": {str(i): {"0": f"Answer {i}", "1": sas.format(user.uuid, i) + "x" * 44}
+                            for i in range(20)}}
+
+    def put(self, answers):
+        body = {"formId": "form-1", "formVersion": "1", "answers": answers}
+        self.assertEqual(self.client.put(reverse("form progression"), body, format="json").status_code, 200)
+
+    def get(self):
+        response = self.client.get(reverse("form progression"), {"formId": "form-1", "formVersion": "1"})
+        return response.json()["answers"]
+
+    def test_large_answers_are_stored_compressed(self):
+        self.put(self.large)
+
+        stored = self.container.read_item(self.doc_id, self.pk)
+        self.assertEqual(stored["answersEncoding"], "zlib+base64/1")
+        self.assertLess(len(json.dumps(stored["answers"])), len(json.dumps(self.large)) / 2)
+        self.assertEqual(self.get(), self.large)
+        response = self.client.get(reverse("in progress forms"), {"answers": "true"})
+        self.assertEqual(response.json()["items"][0]["answers"], self.large)
+
+    def test_small_answers_are_stored_as_they_are(self):
+        self.put({"0": {"0": {"0": "Ann"}}})
+        stored = self.container.read_item(self.doc_id, self.pk)
+        self.assertNotIn("answersEncoding", stored)
+        self.assertEqual(stored["answers"], {"0": {"0": {"0": "Ann"}}})
+
+    def test_deltas_on_compressed_answers_are_rewritten(self):
+        self.put(self.large)
+        body = {"formId": "form-1", "formVersion": "1", "operations": [{"op": "set", "path": "0/3/0", "value": "B"}]}
+        self.assertEqual(self.client.patch(reverse("form progression"), body, format="json").status_code, 200)
+
+        self.assertEqual(self.container.read_item(self.doc_id, self.pk)["answersEncoding"], "zlib+base64/1")
+        self.assertEqual(self.get()["0"]["3"]["0"], "B")
+
+    def test_compressed_answers_are_read_with_compression_disabled(self):
+        self.put(self.large)
+        with override_settings(FORM_PROGRESSION_COMPRESSION={"ENABLED": False}):
+            self.assertEqual(self.get(), self.large)
+
+    def test_unknown_encodings_are_not_guessed(self):
+        with self.assertRaises(ValueError):
+            decode_progression({"id": "x", "answers": "...", "answersEncoding": "brotli/1"})
+
+
+class AsyncCosmosViewsTests(TestCase):
+
+    def setUp(self):
+        settings_override = override_settings(COSMOS={**settings.COSMOS, "BACKEND": "memory", "LOCAL_LATENCY_MS": 50})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_cosmos_registry().reset()
+        self.addCleanup(get_cosmos_registry().reset)
+
+        user = get_user_model().objects.create_user(username="ann@example.com", password="x")
+        self.auth = f"Bearer {RefreshToken.for_user(user).access_token}"
+        self.view = AsyncFormProgressionView.as_view()
+        self.factory = AsyncRequestFactory()
+
+    def get(self, form_id, auth=None):
+        request = self.factory.get("/", {"formId": form_id, "formVersion": "1"},
+                                   headers={"Authorization": self.auth if auth is None else auth})
+        return self.view(request)
+
+    async def test_progression_round_trip(self):
+        request = self.factory.put("/", {"formId": "form-1", "formVersion": "1", "answers": {"name": "Ann"}},
+                                   content_type="application/json", headers={"Authorization": self.auth})
+        self.assertEqual((await self.view(request)).status_code, 200)
+
+        response = await self.get("form-1")
+        self.assertEqual(json.loads(response.content)["answers"], {"name": "Ann"})
+        self.assertEqual((await self.get("form-2")).status_code, 404)
+        self.assertEqual((await self.get("form-1", auth="Bearer invalid")).status_code, 401)
+
+    async def test_stale_conditional_write_is_rejected(self):
+        def put(name, etag=None):
+            headers = {"Authorization": self.auth, **({"If-Match": etag} if etag else {})}
+            return self.view(self.factory.put("/", {"formId": "form-1", "formVersion": "1", "answers": {"name": name}},
+                                              content_type="application/json", headers=headers))
+
+        etag = json.loads((await put("Ann")).content)["etag"]
+        self.assertEqual((await self.get("form-1"))["ETag"], etag)
+        self.assertEqual((await put("Bob", etag)).status_code, 200)
+        self.assertEqual((await put("Ann Smith", etag)).status_code, 412)
+
+    async def test_cosmos_calls_overlap_on_one_loop(self):
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(self.get(f"form-{n}") for n in range(20)))
+
+        self.assertEqual({response.status_code for response in responses}, {404})
+        # 20 calls of 50 ms each, served concurrently rather than one after another
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+
+class AnswerValidationTests(FormsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.form = make_form(sections=1, fields=0)
+        section = self.form.sections.get()
+        FormField.objects.create(label="Name", field_type="text_field", is_required=True, form_section=section, order=0)
+        FormField.objects.create(label="Email", field_type="email", form_section=section, order=1)
+        FormField.objects.create(label="Colour", field_type="select", options=["red", {"value": "blue", "label": "Blue"}],
+                                 form_section=section, order=2)
+        self.form = Form.objects.get(pk=self.form.pk)
+        self.validator = get_validator(self.form.form_id, self.form.version)
+
+    def test_valid_submission(self):
+        answers = {"Section 0": {"Instance 1": {"Name": "Ann", "Email": "ann@example.com", "Colour": "blue"}}}
+        self.assertEqual(self.validator.validate_submission(answers), [])
+
+    def test_submission_errors(self):
+        answers = {"Section 0": {"Instance 1": {"Email": "not-an-email", "Colour": "green", "Age": "3"}}}
+        errors = {e["path"]: e["error"] for e in self.validator.validate_submission(answers)}
+
+        self.assertEqual(errors, {
+            "Section 0.Instance 1.Email": "invalid email address",
+            "Section 0.Instance 1.Colour": "value is not one of the options",
+            "Section 0.Instance 1.Age": "unknown field",
+            "Section 0.Instance 1.Name": "field is required",
+        })
+
+    def test_progression_allows_partial_answers(self):
+        self.assertEqual(self.validator.validate_progression({"0": {"0": {"1": "ann@example.com"}}}), [])
+        self.assertEqual(len(self.validator.validate_progression({"0": {"1": {"0": "Ann"}}, "3": {}})), 2)
+
+    def test_validator_is_compiled_once_per_version(self):
+        with self.assertNumQueries(0):
+            self.assertIs(get_validator(self.form.form_id, str(self.form.version)), self.validator)
+
+    def test_submit_view_rejects_malformed_answers(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username="ann@example.com", password="x"))
+
+        response = client.post(reverse("submit form"), {
+            "formId": self.form.form_id, "formName": self.form.title,
+            "answers": {"Section 0": {"Instance 1": {"Colour": "green"}}},
+        }, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(FormSubmission.objects.exists())
+
+
+class FormVersionTests(FormsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.form = make_form(sections=1, fields=2)
+        self.user = get_user_model().objects.create_user(username="ann@example.com", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def submit(self):
+        response = self.api.post(reverse("submit form"), {
+            "formId": self.form.form_id, "formName": self.form.title,
+            "answers": {"Section 0": {"Instance 1": {"Field 0.0": "a"}}},
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_submission_keeps_the_version_it_was_filled_in(self):
+        self.submit()
+
+        field = FormField.objects.filter(form_section__form=self.form).first()
+        field.label = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            field.save()
+
+        submission = FormSubmission.objects.get()
+        self.assertEqual(submission.version, self.form.version)
+        self.assertEqual(submission.form_version.schema["sections"][0]["fields"][0]["label"], "Field 0.0")
+        self.assertEqual(FormVersion.objects.filter(form_id=self.form.form_id).count(), 2)
+
+        with self.assertNumQueries(2):
+            # user and submissions, no join back to the form
+            body = self.api.get(reverse("user submitted forms")).json()
+        self.assertEqual(body[0]["formVersion"], str(self.form.version))
+
+    def test_versions_are_append_only(self):
+        first = record_version(self.form)
+        self.form.title = "Changed in place"
+        self.assertEqual(record_version(self.form).pk, first.pk)
+        self.assertEqual(FormVersion.objects.get().title, "Onboarding")
+
+    def test_unknown_versions_are_not_looked_up_again(self):
+        self.assertIsNone(get_validator(self.form.form_id, 999))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_validator(self.form.form_id, 999))
+
+    def test_old_versions_are_validated_against_their_schema(self):
+        record_version(self.form)
+        old_version = self.form.version
+        with self.captureOnCommitCallbacks(execute=True):
+            FormField.objects.filter(form_section__form=self.form).first().delete()
+
+        validator = get_validator(self.form.form_id, old_version)
+        self.assertEqual(validator.validate_progression({"0": {"0": {"1": "b"}}}), [])
+
+        url = reverse("form version detail", args=[self.form.form_id, old_version])
+        self.assertEqual(len(self.client.get(url).json()["sections"][0]["fields"]), 2)
+
+
+class SubmissionListingTests(TestCase):
+
+    def test_missing_versions_are_null(self):
+        admin = get_user_model().objects.create_user(username="admin@example.com", password="x", role=Role.ADMIN)
+        user = get_user_model().objects.create_user(username="ann@example.com", password="x")
+        FormSubmission.objects.create(user=user, form_name="Legacy", form_data={})
+        client = APIClient()
+
+        client.force_authenticate(user)
+        self.assertIsNone(client.get(reverse("user submitted forms")).json()[0]["formVersion"])
+        client.force_authenticate(admin)
+        body = client.get(reverse("fetch user detail"), {"user_id": str(user.uuid)}).json()
+        self.assertIsNone(body["formsFilled"][0]["formVersion"])
+
+
+class FormDiffTests(FormsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.form = make_form(sections=4, fields=6)
+        self.old = record_version(self.form)
+
+    def edit(self, **changes):
+        field = FormField.objects.filter(form_section__form=self.form, label="Field 2.3").get()
+        for name, value in changes.items():
+            setattr(field, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            field.save()
+
+    def test_label_change_is_sent_as_a_single_update(self):
+        self.edit(label="Renamed")
+
+        response = self.client.get(reverse("form diff", args=[self.form.form_id]), {"fromVersion": self.old.version})
+        body = response.json()
+
+        self.assertEqual(body["toVersion"], str(self.form.version + 1))
+        self.assertEqual(body["diff"]["sections"], [
+            {"op": "update", "index": 2, "fields": [{"op": "update", "index": 3, "set": {"label": "Renamed"}}]},
+        ])
+        self.assertEqual(body["diff"]["set"], {"version": str(self.form.version + 1)})
+
+    def test_inserted_and_removed_items(self):
+        old = {"title": "A", "sections": [
+            {"title": "S1", "fields": [{"label": "a"}, {"label": "b"}]},
+            {"title": "S2", "fields": []},
+        ]}
+        new = {"title": "A", "sections": [
+            {"title": "S1", "fields": [{"label": "a"}, {"label": "x"}, {"label": "b"}]},
+        ]}
+
+        self.assertEqual(diff_definitions(old, new), {"set": {}, "sections": [
+            {"op": "remove", "index": 1},
+            {"op": "update", "index": 0, "fields": [{"op": "add", "index": 1, "field": {"label": "x"}}]},
+        ]})
+
+    def test_diff_is_cached_per_version_pair(self):
+        self.edit(label="Renamed")
+        url = reverse("form diff", args=[self.form.form_id])
+        first = self.client.get(url, {"fromVersion": self.old.version})
+
+        with self.assertNumQueries(1):
+            # the current version lookup only
+            second = self.client.get(url, {"fromVersion": self.old.version})
+        self.assertEqual(first.content, second.content)
+
+    def test_unknown_version_gets_the_full_definition(self):
+        body = self.client.get(reverse("form diff", args=[self.form.form_id]), {"fromVersion": 99}).json()
+        self.assertNotIn("diff", body)
+        self.assertEqual(len(body["definition"]["sections"]), 4)
@@ -1,17 +1,29 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import (AvailableFormsOverviewView, ConfirmsOverviewView,
-                    DeleteUserFormView, FormConfirmView, FormDetailView,
+from .views import (AsyncFormProgressionView, AvailableFormsOverviewView,
+                    ConfirmsOverviewView, CosmosMetricsView,
+                    DeleteUserFormView, FormBatchDetailView, FormConfirmView,
+                    FormDefinitionCacheStatsView, FormDetailView, FormDiffView,
                     FormProgressionView, FormsOverviewView,
-                    FormSubmissionsView, FormSubmitView, UploadFormImageView,
+                    FormSubmissionsView, FormSubmitView, FormVersionDetailView,
+                    InProgressFormsView, PublishedDefinitionsView, UploadFormImageView,
                     UserFormSubmissionsView)
 
 urlpatterns = [
-    path("forms-overview", FormsOverviewView.as_view(),name="public forms"),
+    path("forms-overview", FormsOverviewView.as_view(),name="forms overview"),
     path("available-forms-overview", AvailableFormsOverviewView.as_view(), name="avalable forms overview"),
     path("confirms-overview", ConfirmsOverviewView.as_view(),name="public forms"),
-    path("<str:form_id>", FormDetailView.as_view(),name="public forms"),
-    path("progress/", FormProgressionView.as_view(), name="form progression" ),
+    path("batch/", FormBatchDetailView.as_view(), name="form batch detail"),
+    path("published/", PublishedDefinitionsView.as_view(), name="published form definitions"),
+    path("cache-stats/", FormDefinitionCacheStatsView.as_view(), name="form definition cache stats"),
+    path("cosmos-stats/", CosmosMetricsView.as_view(), name="cosmos metrics"),
+    path("<str:form_id>", FormDetailView.as_view(),name="form detail"),
+    path("<str:form_id>/diff", FormDiffView.as_view(), name="form diff"),
+    path("<str:form_id>/versions/<int:version>", FormVersionDetailView.as_view(), name="form version detail"),
+    path("progress/", (AsyncFormProgressionView if settings.ASYNC_COSMOS_VIEWS else FormProgressionView).as_view(),
+         name="form progression" ),
+    path("progress/all/", InProgressFormsView.as_view(), name="in progress forms"),
     path("submit/", FormSubmitView.as_view(), name="submit form" ),
     path("delete/", DeleteUserFormView.as_view(), name="delete form"),
     path("submissions/", FormSubmissionsView.as_view(), name="submitted forms"),
@@ -1,22 +1,49 @@
 import json
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from azure.cosmos import CosmosClient
-from azure.cosmos import exceptions as CosmosExceptions
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import permissions, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from users.models import Role
+from users.services.auth import authenticate_jwt
 
 from forms.models import FormType
 
 from .models import Form, FormSubmission
+from .services.answer_validation import get_validator
 from .services.blob_storage import upload_file_to_storage
+from .services.catalog import get_catalog_partition
+from .services.conditional import (form_etag, form_head, not_modified,
+                                   set_validators)
+from .services.cosmos_aio import (progression_container, read_progression,
+                                  replace_progression, upsert_progression)
+from .services.cosmos_client import (PUBLISHED_DEFINITIONS_QUERY, get_container,
+                                     get_user_progressions, query_page)
+from .services.cosmos_metrics import get_cosmos_metrics
+from .services.cosmos_reader import read_through_cosmos, reads_from_cosmos
+from .services.definition_cache import get_definition_cache
+from .services.diffs import get_definition_diff
+from .services.form_tree import load_form_tree
+from .services.progression_buffer import get_progression_buffer
+from .services.progression_codec import decode_progression, encode_progression
+from .services.progression_patch import (ProgressionConflict, apatch_progression,
+                                         changed_answers, parse_operations,
+                                         patch_buffered_progression,
+                                         patch_progression)
+from .services.snapshots import (get_current_snapshots, get_snapshot_payload,
+                                 store_snapshot)
+from .services.versions import get_version, record_version
 
 
 def make_progression_id(user_id: str, form_id: str, form_version: str):
@@ -66,38 +93,18 @@ class FormsOverviewView(APIView):
     authentication_classes = []
 
     def get(self, request):
-        forms = (Form.objects
-                 .filter(is_active=True)
-                 .only(
-                       "form_id", 
-                       "title",
-                       "description", 
-                       "short_description", 
-                       "icon", 
-                       "version", 
-                       )
-                 .order_by("order", "form_id"))
-        
         form_type = request.query_params.get("form_type")
 
-        if form_type:
-            forms = forms.filter(form_type=form_type)
-        
-        items = [
-            {
-                "formId": f.form_id,
-                "title": f.title,
-                "icon": f.icon, 
-                "formType": f.form_type, 
-                "description": f.description,
-                "shortDescription": f.short_description,
-                "version": str(f.version),
-                
-            }
-            for f in forms 
-        ]
+        # Precomputed per form_type and rebuilt whenever a Form changes.
+        catalog = get_catalog_partition(form_type)
+        etag, last_modified = catalog["etag"], catalog["lastModified"]
 
-        return Response(items)
+        unchanged = not_modified(request, etag, last_modified)
+        if unchanged is not None:
+            return unchanged
+
+        response = HttpResponse(catalog["payload"], content_type="application/json")
+        return set_validators(response, etag, last_modified)
 
 class ConfirmsOverviewView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -138,45 +145,209 @@ class FormDetailView(APIView):
 
 
     def get(self, request, form_id):
-        form = (Form.objects
-                .filter(form_id=form_id, is_active=True)
-                .order_by('version')
-                .first())
+        cache = get_definition_cache()
+
+        # Resolve version and validators from the cache pointer, a Cosmos point
+        # read (FORM_DEFINITION_SOURCE = "cosmos") or one index lookup, so
+        # revalidations are answered before any tree work.
+        head = cached_head = cache.head(form_id)
+        if head is None and reads_from_cosmos():
+            head = read_through_cosmos(form_id)
+        if head is None:
+            head = form_head(form_id)
+        if head is None:
+            return Response({"detail": "Form not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        if not form:
+        version, updated_at = head
+        etag = form_etag(form_id, version, updated_at)
+        unchanged = not_modified(request, etag, updated_at)
+        if unchanged is not None:
+            return unchanged
+
+        # Cached reads never touch the ORM or write to the cache. The payload
+        # is the pre-rendered snapshot and is written to the response as is.
+        payload = cache.get(form_id, version)
+        if payload is not None:
+            if cached_head is None:
+                cache.set_head(form_id, version, updated_at)
+        else:
+            payload = get_snapshot_payload(form_id, version)
+
+            if payload is None:
+                form = load_form_tree(form_id=form_id, is_active=True)
+
+                if not form:
+                    return Response({"detail": "Form not found."}, status=status.HTTP_404_NOT_FOUND)
+
+                payload = store_snapshot(form)
+                version, updated_at = form.version, form.updated_at
+                etag = form_etag(form_id, version, updated_at)
+
+            cache.set(form_id, version, payload, updated_at)
+
+        response = HttpResponse(payload, content_type="application/json", status=200)
+        return set_validators(response, etag, updated_at)
+
+
+class FormVersionDetailView(APIView):
+    """
+    The frozen schema of one published form version, as it was when answered.
+    Versions never change, so clients may cache the response indefinitely.
+    """
+    permission_classes = []
+    authentication_classes = []
+
+    def get(self, request, form_id, version):
+        form_version = get_version(form_id, version)
+        if form_version is None:
+            return Response({"detail": "Form version not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        response = Response(form_version.schema, status=200)
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+class FormDiffView(APIView):
+    """
+    Bring a client's cached copy of a form up to date.
+
+    Query: ?fromVersion=3, the version the client holds. The response carries
+    a structural diff to the current version (see diffs.diff_definitions), or
+    the full definition when that is smaller or the old version is unknown.
+    """
+    permission_classes = []
+    authentication_classes = []
+
+    def get(self, request, form_id):
+        try:
+            from_version = int(request.query_params.get("fromVersion", ""))
+        except ValueError:
+            return Response({"error": "fromVersion must be a version number"}, status=400)
+
+        head = get_definition_cache().head(form_id) or form_head(form_id)
+        if head is None:
             return Response({"detail": "Form not found."}, status=status.HTTP_404_NOT_FOUND)
-        
-        sections_data: List[Dict[str, Any]] = []
-        for section in form.sections.all():
-            fields: List[Dict[str, Any]] = [
-                {
-                "label": field.label, 
-                "description": field.description, 
-                "type": field.field_type, 
-                "required": field.is_required, 
-                "placeholder": field.placeholder, 
-                "options": field.options, 
-                }
-                for field in section.fields.all()
-            ]
-            sections_data.append({
-                "title": section.title, 
-                "description": section.description,
-                "isRepeatable": section.is_repeatable,
-                "repeatableCount": section.repeatable_count, 
-                "fields": fields
-            })
-
-        item = {
-            "formId": form.form_id,
-            "title": form.title,
-            "icon": form.icon,
-            "description": form.description,
-            "sections": sections_data,
-            "shortDescription": form.short_description,
-            "version": str(form.version),
-        }
-        return Response(item, status=200)
+
+        payload = get_definition_diff(form_id, from_version, head[0])
+        if payload is None:
+            return Response({"detail": "Form not found."}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(payload, content_type="application/json", status=200)
+
+
+class FormBatchDetailView(APIView):
+    """
+    Returns several form definitions in one round trip.
+
+    Body: {"forms": ["form-id", {"formId": "form-id", "version": "3"}, ...]}
+    A version marks the copy the client already holds; when it is still
+    current the form is listed under notModified instead of being sent again.
+    """
+    permission_classes = []
+    authentication_classes = []
+
+    MAX_FORMS = 50
+
+    def post(self, request, *args, **kwargs):
+        requested = request.data.get("forms") if isinstance(request.data, dict) else None
+        if not isinstance(requested, list) or not requested:
+            return Response({"error": "request body must include a list of forms"}, status=400)
+        if len(requested) > self.MAX_FORMS:
+            return Response({"error": f"at most {self.MAX_FORMS} forms can be requested at once"}, status=400)
+
+        client_versions: Dict[str, Any] = {}
+        for entry in requested:
+            if isinstance(entry, str):
+                client_versions[entry] = None
+            elif isinstance(entry, dict) and isinstance(entry.get("formId"), str):
+                client_versions[entry["formId"]] = entry.get("version")
+            else:
+                return Response({"error": "forms must be form ids or objects with a formId"}, status=400)
+
+        snapshots = get_current_snapshots(client_versions)
+
+        payloads: List[bytes] = []
+        not_modified_ids: List[str] = []
+        for form_id, client_version in client_versions.items():
+            if form_id not in snapshots:
+                continue
+            version, _, payload = snapshots[form_id]
+            if client_version is not None and str(client_version) == str(version):
+                not_modified_ids.append(form_id)
+            else:
+                payloads.append(payload)
+
+        missing = [form_id for form_id in client_versions if form_id not in snapshots]
+
+        # The snapshots are already encoded JSON, only the envelope is rendered.
+        renderer = JSONRenderer()
+        body = b"".join([
+            b'{"forms":[', b",".join(payloads), b"]",
+            b',"notModified":', renderer.render(not_modified_ids),
+            b',"missing":', renderer.render(missing),
+            b"}",
+        ])
+        return HttpResponse(body, content_type="application/json", status=200)
+
+
+class PublishedDefinitionsView(APIView):
+    """
+    Lists the active FormDefinition documents in Cosmos DB, one page at a time.
+
+    Query: pageSize (at most MAX_PAGE_SIZE), fields (comma separated top-level
+    fields to return) and continuationToken, taken from the previous page.
+    Admins only, the queries run across partitions.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    MAX_PAGE_SIZE = 100
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != Role.ADMIN:
+            return Response({"error":"you don't have the permission to use this view"}, status=401)
+
+        try:
+            page_size = int(request.query_params.get("pageSize", 25))
+        except ValueError:
+            return Response({"error": "pageSize must be a number"}, status=400)
+        if not 1 <= page_size <= self.MAX_PAGE_SIZE:
+            return Response({"error": f"pageSize must be between 1 and {self.MAX_PAGE_SIZE}"}, status=400)
+        fields = [f for f in request.query_params.get("fields", "").split(",") if f] or None
+
+        from azure.cosmos import exceptions as CosmosExceptions
+
+        container = get_container(settings.COSMOS['DATABASE_FORM_DATA'], settings.COSMOS['CONTAINER_FORM_DEFINITIONS'])
+        try:
+            page = query_page(container, PUBLISHED_DEFINITIONS_QUERY, fields=fields, max_item_count=page_size,
+                              continuation_token=request.query_params.get("continuationToken"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        except CosmosExceptions.CosmosHttpResponseError as e:
+            if e.status_code == 400:
+                return Response({"error": "invalid continuationToken"}, status=400)
+            return Response({"error": f"Cosmos DB query failed: {e.message}"}, status=502)
+
+        return Response({"items": page.items, "continuationToken": page.continuation_token}, status=200)
+
+class FormDefinitionCacheStatsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != Role.ADMIN:
+            return Response({"error":"you don't have the permission to use this view"}, status=401)
+
+        return Response(get_definition_cache().stats(), status=200)
+
+class CosmosMetricsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != Role.ADMIN:
+            return Response({"error":"you don't have the permission to use this view"}, status=401)
+
+        return Response(get_cosmos_metrics().stats(), status=200)
 
 class DeleteUserFormView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -250,11 +421,22 @@ class FormSubmitView(APIView):
             except Exception as e:
                 return Response({"error": f"and unexpected error occured {e}"}, status=500)
         
+        form = get_object_or_404(Form, form_id=form_id)
+
+        validator = get_validator(form.form_id, form.version, form=form)
+        errors = validator.validate_submission(form_answers) if validator else []
+        if errors:
+            return Response({"error": "answers don't match the form", "details": errors}, status=400)
+
+        form_version = record_version(form)
+
         try:
-            form = get_object_or_404(Form, form_id=form_id)
             submitted_form = FormSubmission.objects.create(
                 user = user, 
                 form = form, 
+                form_version = form_version,
+                form_key = form.form_id,
+                version = form.version,
                 form_name = form_name,
                 form_data = form_answers, 
             )
@@ -370,9 +552,9 @@ class UserFormSubmissionsView(APIView):
         
         submissions_data = [{
             "submissionId": str(submission.id),
-            "formId": submission.form.form_id,
+            "formId": submission.form_key,
             "formName": submission.form_name,
-            "formVersion": str(submission.form.version),
+            "formVersion": str(submission.version) if submission.version is not None else None,
             "submittedAt": submission.submitted_at.isoformat(),
             "formData": submission.form_data,
             "isConfirmed": submission.is_confirmed, 
@@ -382,13 +564,7 @@ class UserFormSubmissionsView(APIView):
     
 
 def _container_form_progression():
-    client = CosmosClient(
-        settings.COSMOS["ENDPOINT"], 
-        credential=settings.COSMOS["KEY"]
-    )
-
-    db = client.get_database_client(settings.COSMOS["DATABASE_USER_DATA"])
-    return db.get_container_client(settings.COSMOS["CONTAINER_FORM_PROGRESSION"])
+    return get_container(settings.COSMOS["DATABASE_USER_DATA"], settings.COSMOS["CONTAINER_FORM_PROGRESSION"])
 
 def make_progression_id(user_id: str, form_id: str, form_version: str):
     """
@@ -400,6 +576,84 @@ def make_progression_id(user_id: str, form_id: str, form_version: str):
     doc_id = f"form:{form_id}version{form_version}"
     return pk_user_id, doc_id
 
+def progression_document(user_id: str, request_body: Optional[Dict]) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    Validate a progression PUT body and build the progression document.
+
+    :return: (document, None), or (None, error payload) for a 400 response.
+    """
+    if request_body is None: 
+        return None, {"error":"request body returns None type"}
+    
+    form_id = request_body.get("formId")
+    if not form_id:
+        return None, {"error":"form id must be included in request body"}
+    
+    version = request_body.get("formVersion")
+    if not version:
+        return None, {"error":"version must be included in request body"}
+    if not isinstance(version, str):
+        return None, {"error":"version must be a string instance"}
+    
+    answers = request_body.get("answers", {})
+    if not isinstance(answers, dict):
+        return None, {"error": "request body must include answers in dict"}
+    
+    validator = get_validator(form_id, version)
+    errors = validator.validate_progression(answers) if validator else []
+    if errors:
+        return None, {"error": "answers don't match the form", "details": errors}
+
+    pk, doc_id = make_progression_id(user_id=user_id, form_id=form_id, form_version=version)
+    return {
+        "id": doc_id,
+        "userId": pk, 
+        "formId": form_id, 
+        "formVersion": version, 
+        "answers": answers, 
+        "updatedAt": f"{timezone.localtime()}"
+    }, None
+
+def progression_if_match(request) -> Optional[str]:
+    """
+    The ETag a progression write is conditional on (If-Match), or None for
+    an unconditional write. ETags are the document's Cosmos ``_etag``.
+    """
+    etag = request.headers.get("If-Match", "").strip()
+    return etag if etag and etag != "*" else None
+
+def _etag_headers(etag: Optional[str]) -> Optional[Dict[str, str]]:
+    return {"ETag": etag} if etag else None
+
+def progression_delta(request_body: Any) -> Tuple[Optional[Tuple[str, str, List]], Optional[Dict]]:
+    """
+    Validate a progression PATCH body, see services/progression_patch.py.
+
+    :return: ((form_id, version, operations), None), or (None, error payload) for a 400 response.
+    """
+    if not isinstance(request_body, dict):
+        return None, {"error": "request body must be an object"}
+
+    form_id = request_body.get("formId")
+    if not form_id:
+        return None, {"error":"form id must be included in request body"}
+
+    version = request_body.get("formVersion")
+    if not version:
+        return None, {"error":"version must be included in request body"}
+    if not isinstance(version, str):
+        return None, {"error":"version must be a string instance"}
+
+    operations, error = parse_operations(request_body.get("operations"))
+    if error:
+        return None, {"error": error}
+
+    validator = get_validator(form_id, version)
+    errors = validator.validate_progression(changed_answers(operations)) if validator else []
+    if errors:
+        return None, {"error": "answers don't match the form", "details": errors}
+    return (form_id, version, operations), None
+
 class FormProgressionView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -410,16 +664,27 @@ class FormProgressionView(APIView):
         version = request.query_params.get('formVersion')
         pk, doc_id = make_progression_id(user_id=user_id, form_id=form_id, form_version=version)
 
+        # Autosaves buffered for write-behind are newer than Cosmos.
+        buffer = get_progression_buffer()
+        doc = buffer.get(pk, doc_id) if buffer else None
+        if doc is not None:
+            # Buffered documents have no ETag yet.
+            return Response({"answers": doc["answers"], "updatedAt": doc.get("updatedAt"), "etag": None}, status=200)
+
+        from azure.cosmos import exceptions as CosmosExceptions
+
         try: 
             c = _container_form_progression()
-            doc = c.read_item(item=doc_id, partition_key=pk)
+            doc = decode_progression(c.read_item(item=doc_id, partition_key=pk))
 
             answers = doc['answers']
 
             return Response(
                 {"answers": answers,
-                 "updatedAt": doc.get("updatedAt")},
-                status=200
+                 "updatedAt": doc.get("updatedAt"),
+                 "etag": doc.get("_etag")},
+                status=200,
+                headers=_etag_headers(doc.get("_etag"))
             )
         except CosmosExceptions.CosmosResourceNotFoundError as e:
             return Response({"detail":"the requsted resource was not found"}, status=404)
@@ -429,43 +694,206 @@ class FormProgressionView(APIView):
             return Response({"error": f"and unknown error occured: {e}"}, status=500)
 
     def put(self, request, *args, **kwargs): 
-        user_id = str(request.user.uuid)
-        request_body: Dict = request.data 
+        doc, error = progression_document(str(request.user.uuid), request.data)
+        if error:
+            return Response(error, status=400)
 
-        if request_body is None: 
-            return Response({"error":"request body returns None type"}, status=400)
-        
-        form_id = request_body.get("formId")
-        if not form_id:
-            return Response({"error":"form id must be included in request body"}, status=400)
-        
-        version = request_body.get("formVersion")
-        if not version:
-            return Response({"error":"version must be included in request body"}, status=400)
-        if not isinstance(version, str):
-            return Response({"error":"version must be a string instance"}, status=400)
-        
-        answers = request_body.get("answers", {})
-        if not isinstance(answers, dict):
-            return Response({"error": "request body must include answers in dict"}, status=400)
-        
-        pk, doc_id = make_progression_id(user_id=user_id, form_id=form_id, form_version=version)
-        doc = {
-            "id": doc_id,
-            "userId": pk, 
-            "formId": form_id, 
-            "formVersion": version, 
-            "answers": answers, 
-            "updatedAt": f"{timezone.localtime()}"
-        }
+        # Conditional writes go straight to Cosmos, the buffer has no ETags.
+        if_match = progression_if_match(request)
+        buffer = get_progression_buffer()
+        if buffer is not None and if_match is None:
+            buffer.put(doc)
+            return Response({"detail":f"updated {doc['id']}", "etag": None}, status=200)
+
+        from azure.core import MatchConditions
+        from azure.cosmos import exceptions as CosmosExceptions
 
         try: 
             c = _container_form_progression()
-            c.upsert_item(doc)
-            return Response({"detail":f"updated {doc_id}"}, status=200)
+            if if_match is None:
+                stored = c.upsert_item(encode_progression(doc))
+            elif buffer is not None and buffer.has_pending(doc["userId"], doc["id"]):
+                # Unflushed autosaves are newer than any ETag that was handed out.
+                return Response({"error": "the progression was changed since it was read"}, status=412)
+            else:
+                stored = c.replace_item(doc["id"], encode_progression(doc), etag=if_match,
+                                        match_condition=MatchConditions.IfNotModified)
+            etag = stored.get("_etag")
+            return Response({"detail":f"updated {doc['id']}", "etag": etag}, status=200, headers=_etag_headers(etag))
+        except (CosmosExceptions.CosmosAccessConditionFailedError, CosmosExceptions.CosmosResourceNotFoundError):
+            return Response({"error": "the progression was changed since it was read"}, status=412)
         except Exception as e: 
             return Response({"error": f"{e}"}, status=500)
 
+    def patch(self, request, *args, **kwargs):
+        delta, error = progression_delta(request.data)
+        if error:
+            return Response(error, status=400)
+        form_id, version, operations = delta
+        pk, doc_id = make_progression_id(user_id=str(request.user.uuid), form_id=form_id, form_version=version)
+
+        try:
+            buffer = get_progression_buffer()
+            etag = None
+            if buffer is not None:
+                patch_buffered_progression(buffer, _container_form_progression(), pk, doc_id, form_id, version,
+                                           operations)
+            else:
+                stored = patch_progression(_container_form_progression(), pk, doc_id, form_id, version, operations)
+                etag = stored.get("_etag")
+            return Response({"detail":f"updated {doc_id}", "etag": etag}, status=200, headers=_etag_headers(etag))
+        except ProgressionConflict:
+            return Response({"error": "the progression was changed concurrently, retry"}, status=409)
+        except Exception as e:
+            return Response({"error": f"{e}"}, status=500)
+
+
+class InProgressFormsView(APIView):
+    """
+    Lists every form the current user has started, newest first, with one
+    query on the user's progression partition instead of a read per form.
+
+    Query: answers=true to include the answers of each form.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    SUMMARY_FIELDS = ("id", "formId", "formVersion", "updatedAt")
+
+    def get(self, request, *args, **kwargs):
+        with_answers = request.query_params.get("answers", "").lower() in ("1", "true")
+        fields = self.SUMMARY_FIELDS + ("answers", "answersEncoding") if with_answers else self.SUMMARY_FIELDS
+        pk = f"user:{request.user.uuid}"
+
+        from azure.cosmos import exceptions as CosmosExceptions
+
+        try:
+            progressions = {doc["id"]: decode_progression(doc) for doc in get_user_progressions(pk, fields=fields)}
+        except CosmosExceptions.CosmosHttpResponseError as e:
+            return Response({"error": f"Cosmos DB query failed: {e.message}"}, status=502)
+
+        # Autosaves buffered for write-behind are newer than Cosmos.
+        buffer = get_progression_buffer()
+        if buffer is not None:
+            progressions.update(buffer.buffered(pk))
+            for doc_id in list(progressions):
+                doc = buffer.get(pk, doc_id)
+                if doc is not None:
+                    progressions[doc_id] = doc
+
+        items = [
+            {name: doc.get(name) for name in fields if name not in ("id", "answersEncoding")}
+            for doc in progressions.values()
+        ]
+        items.sort(key=lambda item: item["updatedAt"] or "", reverse=True)
+        return Response({"items": items}, status=200)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncFormProgressionView(View):
+    """
+    FormProgressionView on the azure.cosmos.aio data path, for ASGI
+    deployments (ASYNC_COSMOS_VIEWS). The worker's event loop keeps serving
+    other requests while the Cosmos call is in flight. Only JWT Bearer
+    authentication is supported.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user = await authenticate_jwt(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        pk, doc_id = make_progression_id(user_id=user.uuid, form_id=request.GET.get('formId'),
+                                         form_version=request.GET.get('formVersion'))
+
+        buffer = get_progression_buffer()
+        doc = await sync_to_async(buffer.get)(pk, doc_id) if buffer else None
+        if doc is not None:
+            return JsonResponse({"answers": doc["answers"], "updatedAt": doc.get("updatedAt"), "etag": None},
+                                status=200)
+
+        from azure.cosmos import exceptions as CosmosExceptions
+
+        try:
+            doc = await read_progression(doc_id, pk)
+            return JsonResponse({"answers": doc['answers'], "updatedAt": doc.get("updatedAt"), "etag": doc.get("_etag")},
+                                status=200, headers=_etag_headers(doc.get("_etag")))
+        except CosmosExceptions.CosmosResourceNotFoundError:
+            return JsonResponse({"detail":"the requsted resource was not found"}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": f"and unknown error occured: {e}"}, status=500)
+
+    async def put(self, request, *args, **kwargs):
+        user = await authenticate_jwt(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            request_body = json.loads(request.body or b"null")
+        except ValueError:
+            return JsonResponse({"error": "request body must be JSON"}, status=400)
+        if request_body is not None and not isinstance(request_body, dict):
+            return JsonResponse({"error": "request body must be a JSON object"}, status=400)
+
+        doc, error = await sync_to_async(progression_document)(str(user.uuid), request_body)
+        if error:
+            return JsonResponse(error, status=400)
+
+        if_match = progression_if_match(request)
+        buffer = get_progression_buffer()
+        if buffer is not None and if_match is None:
+            await sync_to_async(buffer.put)(doc)
+            return JsonResponse({"detail":f"updated {doc['id']}", "etag": None}, status=200)
+
+        from azure.cosmos import exceptions as CosmosExceptions
+
+        try:
+            if if_match is None:
+                stored = await upsert_progression(doc)
+            elif buffer is not None and await sync_to_async(buffer.has_pending)(doc["userId"], doc["id"]):
+                return JsonResponse({"error": "the progression was changed since it was read"}, status=412)
+            else:
+                stored = await replace_progression(doc, if_match)
+            etag = stored.get("_etag")
+            return JsonResponse({"detail":f"updated {doc['id']}", "etag": etag}, status=200,
+                                headers=_etag_headers(etag))
+        except (CosmosExceptions.CosmosAccessConditionFailedError, CosmosExceptions.CosmosResourceNotFoundError):
+            return JsonResponse({"error": "the progression was changed since it was read"}, status=412)
+        except Exception as e:
+            return JsonResponse({"error": f"{e}"}, status=500)
+
+    async def patch(self, request, *args, **kwargs):
+        user = await authenticate_jwt(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            request_body = json.loads(request.body or b"null")
+        except ValueError:
+            return JsonResponse({"error": "request body must be JSON"}, status=400)
+
+        delta, error = await sync_to_async(progression_delta)(request_body)
+        if error:
+            return JsonResponse(error, status=400)
+        form_id, version, operations = delta
+        pk, doc_id = make_progression_id(user_id=str(user.uuid), form_id=form_id, form_version=version)
+
+        try:
+            buffer = get_progression_buffer()
+            etag = None
+            if buffer is not None:
+                await sync_to_async(patch_buffered_progression)(
+                    buffer, _container_form_progression(), pk, doc_id, form_id, version, operations
+                )
+            else:
+                stored = await apatch_progression(progression_container(), pk, doc_id, form_id, version, operations)
+                etag = stored.get("_etag")
+            return JsonResponse({"detail":f"updated {doc_id}", "etag": etag}, status=200,
+                                headers=_etag_headers(etag))
+        except ProgressionConflict:
+            return JsonResponse({"error": "the progression was changed concurrently, retry"}, status=409)
+        except Exception as e:
+            return JsonResponse({"error": f"{e}"}, status=500)
+
 
 
 
@@ -1,23 +1,22 @@
 from django.core.management.base import BaseCommand
-from azure.cosmos import CosmosClient, exceptions
+from azure.cosmos import exceptions
 from django.conf import settings
 
+from forms.services.cosmos_client import get_cosmos_registry
+
 class Command(BaseCommand):
     help = 'Tests connection to Azure Cosmos DB and queries one item'
 
     def handle(self, *args, **kwargs):
         try:
-            client = CosmosClient(
-                settings.AZURE_COSMOS_ENDPOINT,
-                settings.AZURE_COSMOS_KEY
-            )
-            self.stdout.write(self.style.SUCCESS("✅ Connected to Cosmos DB."))
-
-            db = client.get_database_client(settings.AZURE_COSMOS_DB)
-            self.stdout.write(self.style.SUCCESS(f"✅ Found database: {settings.AZURE_COSMOS_DB}"))
+            registry = get_cosmos_registry()
+            database_name = settings.COSMOS['DATABASE_USER_DATA']
+            container_name = settings.COSMOS['CONTAINER_USER_PROFILES']
 
-            container = db.get_container_client(settings.AZURE_COSMOS_CONTAINER)
-            self.stdout.write(self.style.SUCCESS(f"✅ Found container: {settings.AZURE_COSMOS_CONTAINER}"))
+            container = registry.container(database_name, container_name)
+            backend = "local stand-in" if registry.is_local else "Cosmos DB"
+            self.stdout.write(self.style.SUCCESS(f"✅ Connected to {backend}."))
+            self.stdout.write(self.style.SUCCESS(f"✅ Found container: {database_name}/{container_name}"))
 
             items = list(container.query_items(
                 query="SELECT TOP 1 * FROM c",
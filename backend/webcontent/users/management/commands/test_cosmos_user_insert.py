@@ -1,8 +1,10 @@
 from django.core.management.base import BaseCommand
-from azure.cosmos import CosmosClient, exceptions
+from azure.cosmos import exceptions
 from django.conf import settings
 import uuid
 
+from forms.services.cosmos_client import get_container
+
 class Command(BaseCommand):
     help = 'Inserts a user profile into Azure Cosmos DB'
 
@@ -17,14 +19,11 @@ class Command(BaseCommand):
         goal = options['goal']
 
         try:
-            client = CosmosClient(
-                settings.AZURE_COSMOS_ENDPOINT,
-                settings.AZURE_COSMOS_KEY
+            container = get_container(
+                settings.COSMOS['DATABASE_USER_DATA'],
+                settings.COSMOS['CONTAINER_USER_PROFILES']
             )
 
-            db = client.get_database_client(settings.AZURE_COSMOS_DB)
-            container = db.get_container_client(settings.AZURE_COSMOS_CONTAINER)
-
             item = {
                 "id": user_id,           
                 "userId": user_id,       
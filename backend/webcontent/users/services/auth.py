@@ -0,0 +1,21 @@
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from users.models import User
+
+
+async def authenticate_jwt(request) -> Optional[User]:
+    """
+    Authenticate a plain Django request by its JWT Bearer header, for async
+    views that don't go through DRF's APIView.
+
+    :return: The user, or None when the header is missing or the token is invalid.
+    """
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
@@ -1,12 +1,11 @@
-from azure.cosmos import CosmosClient
 from django.conf import settings
-from dotenv import load_dotenv
 
-load_dotenv()
+from forms.services.cosmos_client import get_container
 
-client = CosmosClient(url=settings.COSMOS['ENDPOINT'], credential=settings.COSMOS['KEY'])
-database = client.get_database_client(settings.COSMOS['DATABASE_USER_DATA'])
-container = database.get_container_client(settings.COSMOS['CONTAINER_USER_PROFILES'])
+
+def _profiles_container():
+    # Proxy of the process-wide Cosmos client, see forms.services.cosmos_client
+    return get_container(settings.COSMOS['DATABASE_USER_DATA'], settings.COSMOS['CONTAINER_USER_PROFILES'])
 
 def save_user_profile(user_id: str, company_type: str, goal: str):
     data = {
@@ -14,7 +13,7 @@ def save_user_profile(user_id: str, company_type: str, goal: str):
         "companyType": company_type,
         "goal": goal
     }
-    container.upsert_item(data)
+    _profiles_container().upsert_item(data)
 
 def update_user_profile(user_data: dict):
-    container.upsert_item(user_data)
\ No newline at end of file
+    _profiles_container().upsert_item(user_data)
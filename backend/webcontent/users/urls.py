@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import RegisterClient, LoginView, LogoutView, UserOnboardingView, UserListView, UserDetailView, AuthenticationStatusView, InviteClient, SetPasswordView, RequestResetPasswordView
+from .views import RegisterClient, LoginView, LogoutView, UserOnboardingView, AsyncUserOnboardingView, UserListView, UserDetailView, AuthenticationStatusView, InviteClient, SetPasswordView, RequestResetPasswordView
 
 
 
@@ -17,7 +18,8 @@ urlpatterns = [
     path("reset-password/", RequestResetPasswordView.as_view(), name="reset password"),
 
     # onboarding
-    path('onboarding/', UserOnboardingView.as_view(), name='user_onboarding'),
+    path('onboarding/', (AsyncUserOnboardingView if settings.ASYNC_COSMOS_VIEWS else UserOnboardingView).as_view(),
+         name='user_onboarding'),
 
     # User management
     path('fetch/', UserListView.as_view(), name='fetch_users'),
@@ -1,5 +1,11 @@
+import json
+
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -11,6 +17,9 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from forms.services.cosmos_aio import upsert_user_profile
+
+from .services.auth import authenticate_jwt
 from .services.cosmosdb import update_user_profile
 
 from .models import User, Role, PasswordResetToken, TypePasswordSetToken
@@ -57,6 +66,21 @@ class SetPasswordView(APIView):
             return Response({"error":f"an unexpected error occured: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def onboarding_profile(user: User, data: dict) -> dict:
+    """
+    The user profile document stored on onboarding.
+    """
+    return {
+        "id": str(user.uuid), 
+        "userId": str(user.uuid), 
+        "firstName": user.first_name,
+        "lastName": user.last_name,
+        "companyName": user.company_name,
+        "companyType": data.get("companyType"),
+        "companyGoal": data.get("companyGoal"),
+        "targetAudience": data.get("targetAudience")
+    }
+
 class UserOnboardingView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -67,16 +91,7 @@ class UserOnboardingView(APIView):
 
         user.has_completed_onboarding = True
         
-        user_data = {
-            "id": str(user.uuid), 
-            "userId": str(user.uuid), 
-            "firstName": user.first_name,
-            "lastName": user.last_name,
-            "companyName": user.company_name,
-            "companyType": data.get("companyType"),
-            "companyGoal": data.get("companyGoal"),
-            "targetAudience": data.get("targetAudience")
-        }
+        user_data = onboarding_profile(user, data)
 
         try:
             update_user_profile(user_data)
@@ -87,6 +102,38 @@ class UserOnboardingView(APIView):
             )
 
         return Response({"detail": "User profile saved successfully."}, status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncUserOnboardingView(View):
+    """
+    UserOnboardingView on the azure.cosmos.aio data path, for ASGI
+    deployments (ASYNC_COSMOS_VIEWS). Only JWT Bearer authentication is supported.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        user = await authenticate_jwt(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "request body must be JSON"}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "request body must be a JSON object"}, status=400)
+
+        user_data = onboarding_profile(user, data)
+
+        try:
+            await upsert_user_profile(user_data)
+        except Exception as e:
+            return JsonResponse(
+                {"detail": f"Failed to insert data into Cosmos DB: {str(e)}"},
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+
+        return JsonResponse({"detail": "User profile saved successfully."}, status=status.HTTP_200_OK)
     
 
 
@@ -306,14 +353,14 @@ class UserDetailView(APIView):
         try:
             user = get_object_or_404(User, uuid=user_id)
             # Get all form submissions for the user
-            forms = user.submissions.all().select_related('form')
+            forms = user.submissions.all()
 
             forms_data = [
                 {
                     "submissionId": str(form.id),
-                    "formId": str(form.form.form_id),
+                    "formId": form.form_key,
                     "formName": form.form_name,
-                    "formVersion": str(form.form.version),
+                    "formVersion": str(form.version) if form.version is not None else None,
                     "submittedAt": form.submitted_at.isoformat(),
                     "formData": form.form_data,
                 }
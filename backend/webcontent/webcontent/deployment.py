@@ -20,6 +20,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "forms.middleware.cosmos_metrics_middleware",
 ]
 
 STORAGES = {
@@ -45,6 +46,23 @@ DATABASES = {
     }
 }
 
+# No publish_forms worker is deployed, so edits are published right after they
+# commit; build_script.sh drains what is left (e.g. failed publications) on deploy.
+# Set FORM_PUBLISH_EAGER=false once a worker runs `manage.py publish_forms`.
+FORM_PUBLISH_OUTBOX = {
+    **FORM_PUBLISH_OUTBOX,
+    'EAGER': os.getenv('FORM_PUBLISH_EAGER', 'true').lower() == 'true',
+}
+
+# Shared by every worker, see CACHES in settings.py. REDIS_URL is the Azure Cache
+# for Redis connection, e.g. rediss://:<access key>@<name>.redis.cache.windows.net:6380/0
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+}
+
 STATIC_ROOT = BASE_DIR / "staticfiles"
 FRONTEND_URL = "https://app.bloomsite.nl"
 
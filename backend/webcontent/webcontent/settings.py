@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os 
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -59,6 +60,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "forms.middleware.cosmos_metrics_middleware",
 ]
 
 ROOT_URLCONF = "webcontent.urls"
@@ -172,6 +174,9 @@ AUTH_USER_MODEL = "users.User"
 
 # CORS Headers 
 CORS_ALLOW_ALL_ORIGINS = True
+# Progression writes can be conditional on the ETag handed out with the read.
+CORS_ALLOW_HEADERS = (*default_headers, "if-match")
+CORS_EXPOSE_HEADERS = ["ETag"]
 
 # Restframework Settings 
 REST_FRAMEWORK = {
@@ -214,13 +219,25 @@ SIMPLE_JWT = {
 AZURE_COSMOS_ENDPOINT = os.getenv('AZURE_COSMOS_ENDPOINT')
 AZURE_COSMOS_KEY = os.getenv('AZURE_COSMOS_KEY')
 
-AZURE_COSMOS_DATABASE_USER_DATA = os.getenv('AZURE_COSMOS_DATABASE_USER_DATA')
-AZURE_COSMOS_DATABASE_FORM_DATA = os.getenv('AZURE_COSMOS_DATABASE_FORM_DATA')
+AZURE_COSMOS_DATABASE_USER_DATA = os.getenv('AZURE_COSMOS_DATABASE_USER_DATA', 'UserData')
+AZURE_COSMOS_DATABASE_FORM_DATA = os.getenv('AZURE_COSMOS_DATABASE_FORM_DATA', 'FormData')
 
-AZURE_COSMOS_CONTAINER_USER_PROFILES = os.getenv('AZURE_COSMOS_CONTAINER_USER_PROFILES')
-AZURE_COSMOS_CONTAINER_FORM_DEFINITIONS = os.getenv('AZURE_COSMOS_CONTAINER_FORM_DEFINITIONS')
-AZURE_COSMOS_CONTAINER_FORM_PROGRESSION = os.getenv('AZURE_COSMOS_CONTAINER_FORM_PROGRESSION')
-AZURE_COSMOS_CONTAINER_FORM_CONFIRMATION = os.getenv('AZURE_COSMOS_CONTAINER_FORM_CONFIRMATION')
+AZURE_COSMOS_CONTAINER_USER_PROFILES = os.getenv('AZURE_COSMOS_CONTAINER_USER_PROFILES', 'UserProfiles')
+AZURE_COSMOS_CONTAINER_FORM_DEFINITIONS = os.getenv('AZURE_COSMOS_CONTAINER_FORM_DEFINITIONS', 'FormDefinition')
+AZURE_COSMOS_CONTAINER_FORM_PROGRESSION = os.getenv('AZURE_COSMOS_CONTAINER_FORM_PROGRESSION', 'FormProgression')
+AZURE_COSMOS_CONTAINER_FORM_CONFIRMATION = os.getenv('AZURE_COSMOS_CONTAINER_FORM_CONFIRMATION', 'FormConfirmation')
+
+# "azure" talks to the account above. "memory" and "sqlite" swap in a local container
+# stand-in (forms.services.cosmos_local) for tests, local runs and benchmarks; "sqlite"
+# keeps the documents in COSMOS_LOCAL_PATH, shared between processes.
+AZURE_COSMOS_BACKEND = os.getenv('COSMOS_BACKEND', 'azure')
+AZURE_COSMOS_LOCAL_PATH = os.getenv('COSMOS_LOCAL_PATH', str(BASE_DIR / 'cosmos_local.sqlite3'))
+AZURE_COSMOS_LOCAL_LATENCY_MS = float(os.getenv('COSMOS_LOCAL_LATENCY_MS', '0'))
+
+# Serve the Cosmos-bound views (form progression, onboarding) from async views on
+# azure.cosmos.aio. Only enable under an ASGI server (webcontent.asgi), a WSGI worker
+# would open a new event loop and Cosmos connection pool per request.
+ASYNC_COSMOS_VIEWS = os.getenv('ASYNC_COSMOS_VIEWS', 'false').lower() == 'true'
 
 # Email server settings 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -245,6 +262,78 @@ COSMOS = {
     'CONTAINER_FORM_DEFINITIONS': AZURE_COSMOS_CONTAINER_FORM_DEFINITIONS, 
     'CONTAINER_FORM_PROGRESSION': AZURE_COSMOS_CONTAINER_FORM_PROGRESSION, 
     'CONTAINER_FORM_CONIFRMATION': AZURE_COSMOS_CONTAINER_FORM_CONFIRMATION, 
+
+    # Local stand-in
+    'BACKEND': AZURE_COSMOS_BACKEND,
+    'LOCAL_PATH': AZURE_COSMOS_LOCAL_PATH,
+    'LOCAL_LATENCY_MS': AZURE_COSMOS_LOCAL_LATENCY_MS,
+
+    # Partition key path per container, the local backends can't read it from the account
+    'PARTITION_KEYS': {
+        AZURE_COSMOS_CONTAINER_USER_PROFILES: '/userId',
+        AZURE_COSMOS_CONTAINER_FORM_DEFINITIONS: '/pk',
+        AZURE_COSMOS_CONTAINER_FORM_PROGRESSION: '/userId',
+        AZURE_COSMOS_CONTAINER_FORM_CONFIRMATION: '/userId',
+    },
+}
+
+# The SHARED_CACHE aliases below must be one cache for all workers: publish invalidation,
+# the forms catalog, definition diffs and buffered autosaves rely on it. Locally this is
+# the process's memory (one runserver process); deployment.py uses Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Form definition cache (forms.services.definition_cache)
+# SHARED_CACHE is a CACHES alias shared between workers, None keeps the cache in-process only.
+# POINTER_TIMEOUT bounds how long a worker can serve a form version after it was changed,
+# CATALOG_TIMEOUT does the same for the precomputed forms overview (forms.services.catalog).
+# Workers keep their own copy of the overview and compare its version with the shared one
+# at most every CATALOG_CHECK_INTERVAL seconds.
+FORM_DEFINITION_CACHE = {
+    'MAX_ENTRIES': 256,
+    'SHARED_CACHE': 'default',
+    'TIMEOUT': 60 * 60 * 24,
+    'POINTER_TIMEOUT': 60,
+    'CATALOG_TIMEOUT': 60 * 5,
+    'CATALOG_CHECK_INTERVAL': 5,
+}
+
+# Where FormDetailView reads definitions on a cache miss: "database" or "cosmos".
+# In "cosmos" mode the FormDefinition document is point-read first, Postgres is the fallback.
+FORM_DEFINITION_SOURCE = os.getenv('FORM_DEFINITION_SOURCE', 'database')
+
+# Form publishing outbox (forms.services.outbox), drained by `manage.py publish_forms`.
+# Failed publications are retried after BASE_BACKOFF * 2^attempts seconds, capped at MAX_BACKOFF.
+# EAGER publishes right after the edit commits, for local runs without a worker.
+FORM_PUBLISH_OUTBOX = {
+    'BATCH_SIZE': 50,
+    'LEASE': 60,
+    'BASE_BACKOFF': 2,
+    'MAX_BACKOFF': 60 * 10,
+    'POLL_INTERVAL': 1.0,
+    'EAGER': os.getenv('FORM_PUBLISH_EAGER', 'false').lower() == 'true',
+}
+
+# Write-behind for FormProgressionView autosaves (forms.services.progression_buffer).
+# Writes to one progression are coalesced and upserted once they were quiet for WINDOW
+# seconds, or at the latest MAX_DELAY seconds after the first buffered write. SHARED_CACHE
+# is a CACHES alias that lets every worker read the buffered answers, None keeps them in-process.
+FORM_PROGRESSION_WRITE_BEHIND = {
+    'ENABLED': os.getenv('FORM_PROGRESSION_WRITE_BEHIND', 'false').lower() == 'true',
+    'WINDOW': 2.0,
+    'MAX_DELAY': 10.0,
+    'SHARED_CACHE': 'default',
+}
+
+# Progression answers larger than THRESHOLD bytes (as JSON) are stored zlib-compressed
+# (at LEVEL) and base64-encoded. Documents are decoded on read whatever this says.
+FORM_PROGRESSION_COMPRESSION = {
+    'ENABLED': os.getenv('FORM_PROGRESSION_COMPRESSION', 'false').lower() == 'true',
+    'THRESHOLD': 2048,
+    'LEVEL': 6,
 }
 
 STATIC_ROOT = BASE_DIR / "staticfiles"